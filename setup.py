@@ -38,6 +38,7 @@ setup(
     keywords='wis',
     name='wis',
     packages=find_packages(include=['wis']),
+    scripts=['scripts/wis'],
     setup_requires=setup_requirements,
     test_suite='tests',
     tests_require=test_requirements,
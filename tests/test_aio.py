@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import sys
+import asyncio
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import aio
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_aio_posns_A():
+    """
+    Test that concurrent async requests are coalesced into a single batch,
+    and that each caller gets back the same positions as a direct call to wis.wis
+    """
+    times = [ Time([2451545.0, 2451546.0], format='jd', scale='tdb'),
+              Time([2451547.0], format='jd', scale='tdb'),
+              Time([2451548.0, 2451549.0, 2451550.0], format='jd', scale='tdb') ]
+    obscodes = ['F51', 'F51', '-95']
+
+    async def query(coalescer):
+        return await asyncio.gather( *[aio.posns(o, t, coalescer=coalescer) for o,t in zip(obscodes, times)] )
+
+    C = aio.Coalescer(window=0.05)
+    results = asyncio.run( query(C) )
+    C.close()
+
+    # All three requests share (center, frame, abcorr), so should be evaluated in one batch
+    assert C.n_requests == 3 and C.n_batches == 1
+
+    # Each caller should get back what a direct call would have given
+    for obscode, t, posns in zip(obscodes, times, results):
+        W = wis.wis(obscode, t)
+        expected = W.hXYZ if isinstance(W, wis.Ground) else W.posns
+        assert posns.shape == (t.size, 3)
+        assert np.allclose(posns, expected, rtol=1e-12, atol=1e-12), \
+            ' Not close enough to expected values: returned=[%r], expected=[%r]' % (posns , expected)
+
+
+def test_aio_posns_B():
+    """ Test that a request with uncovered epochs fails without failing the other requests for the same obscode """
+    times = [ Time([2458400.5], format='jd', scale='utc'),
+              Time([2440587.5], format='jd', scale='utc'),
+              Time([2458400.5], format='jd', scale='utc') ]
+    obscodes = ['F51', 'F51', 'ZZZ']
+
+    async def query(coalescer):
+        return await asyncio.gather( *[aio.posns(o, t, coalescer=coalescer) for o,t in zip(obscodes, times)], return_exceptions=True )
+
+    C = aio.Coalescer(window=0.05)
+    results = asyncio.run( query(C) )
+    C.close()
+    assert C.n_batches == 1
+    assert np.allclose(results[0], wis.wis('F51', times[0]).hXYZ, rtol=0, atol=1e-12)
+    assert isinstance(results[1], RuntimeError) and 'uncovered epoch' in str(results[1])
+    assert results[2] is None
+
+
+def test_aio_posns_C():
+    """ Test that merging requests keeps both parts of each julian date (i.e. exactly the times of a direct call) """
+    times = [ Time(2458400.0, [0.123456789012345, 0.5], format='jd', scale='tdb'),
+              Time(2458401.0, [0.987654321098765], format='jd', scale='tdb') ]
+
+    async def query(coalescer):
+        return await asyncio.gather( *[aio.posns('F51', t, coalescer=coalescer) for t in times] )
+
+    C = aio.Coalescer(window=0.05)
+    results = asyncio.run( query(C) )
+    C.close()
+    for t, posns in zip(times, results):
+        assert np.all( posns == wis.wis('F51', t).hXYZ )
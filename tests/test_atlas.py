@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import atlas
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_Atlas_A(tmpdir):
+    """ Test that positions looked up in an atlas match those evaluated by wis() """
+    filepath = str(tmpdir.join('stations.atlas'))
+    A = atlas.build(filepath, 2458400.5, 2458403.0, timeformat='jd_tdb')
+    assert len(A) == len(wis.ground_obscode_dict) and 'F51' in A and 'C51' not in A
+    assert isinstance(A.buffer, np.memmap) and A.geocenter.base is not None
+    
+    # Vectorized lookups for mixed obscodes (& utc times)
+    # -----------------------------------------------
+    rng      = np.random.default_rng(1)
+    obscodes = rng.choice(['F51', '568', '309', 'I41'], 500)
+    jd_utc   = rng.uniform(2458400.51, 2458402.99, 500)
+    posns    = atlas.Atlas(filepath).posns(obscodes, jd_utc, timeformat='jd_utc')
+    for code in np.unique(obscodes):
+        W = wis.wis(code, jd_utc[obscodes == code], timeformat='jd_utc')
+        assert np.allclose(posns[obscodes == code], W.hXYZ, rtol=0, atol=1e-12), 'Atlas positions differ from wis() for %r' % code
+    
+    # Times outside the window are rejected
+    with pytest.raises(AssertionError):
+        A.posns('F51', [2458410.5], timeformat='jd_tdb')
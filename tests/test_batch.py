@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import batch
+import kernels
+import kernel_store
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_evaluate_A():
+    """ Test that a mixed batch evaluates every row it can, flagging the rest with NaNs & a status code """
+    obscodes = np.array(['F51', '-95', 'ZZZ', 'F51', '247', '-95', 'F51'])
+    jd_utc   = np.array([2458400.5, 2458400.5, 2458400.5, 2458401.0, 2458400.5, 2458402.0, 2440587.5])
+    posns, ltts, status = batch.evaluate(obscodes, jd_utc, timeformat='jd_utc')
+    assert posns.shape == (7, 3) and ltts.shape == (7,) and status.shape == (7,)
+    assert list(status) == [batch.OK, batch.OK, batch.UNKNOWN_OBSCODE, batch.OK, batch.EXCLUDED, batch.OK, batch.UNCOVERED]
+
+    # Failing rows are NaN, while the others are as evaluated by wis() directly
+    # -----------------------------------------------
+    ok = status == batch.OK
+    assert np.all(np.isnan(posns[~ok])) and np.all(np.isnan(ltts[~ok]))
+    for code in ['F51', '-95']:
+        rows = ok & (obscodes == code)
+        W = wis.wis(code, jd_utc[rows], timeformat='jd_utc')
+        assert np.allclose(posns[rows], W.hXYZ if hasattr(W, 'hXYZ') else W.posns, rtol=0, atol=1e-12)
+        assert np.allclose(ltts[rows], W.ltts, rtol=0, atol=1e-15)
+
+def test_screen_A(tmpdir, monkeypatch):
+    """ Test that an obscode whose kernels cannot be downloaded is flagged without raising """
+    S = kernel_store.KernelStore(root=str(tmpdir.join('store')), mirrors=['file://' + str(tmpdir.mkdir('mirror'))])
+    K = kernels.KernelSpecifier(obscode='-997', name='MISSING', files=['https://nowhere.invalid/missing.bsp'], store=S)
+    monkeypatch.setitem(wis.satellite_obscode_dict, '-997', K)
+    status = batch.screen('-997', np.array([2458400.5, 2458401.5]), timeformat='jd_utc')
+    assert list(status) == [batch.KERNEL_MISSING] * 2
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import cli
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_cli_A(tmpdir):
+    """ Test that csv rows are evaluated in chunks, & that the output is the same as from wis.wis() """
+    obscodes = ['F51', '-95', 'F51', '568', 'ZZZ']
+    times    = [2458337.829157830, 2458337.829157830, 2458338.829157830, 2458337.5, 2458337.5]
+    infile, outfile = str(tmpdir.join('in.csv')), str(tmpdir.join('out.csv'))
+    with open(infile, 'w') as f:
+        f.write('obscode,time\n' + ''.join('%s,%.9f\n' % row for row in zip(obscodes, times)))
+
+    assert cli.main([infile, '-o', outfile, '--chunk', '2', '--units', 'km', '-q']) == 0
+    out = np.genfromtxt(outfile, delimiter=',', names=True, dtype=None, encoding='utf-8')
+    assert list(out['obscode']) == obscodes and np.allclose(out['time'], times, rtol=0, atol=1e-9)
+
+    for i, obscode in enumerate(obscodes[:-1]):
+        W = wis.wis(obscode, np.array([times[i]]), timeformat='jd_utc')
+        posns = W.hXYZ if hasattr(W, 'hXYZ') else W.posns
+        assert np.allclose([out['x'][i], out['y'][i], out['z'][i]], posns[0] * wis.au_km, rtol=0, atol=1e-6)
+        assert np.isclose(out['lt'][i], W.ltts[0] * wis.day_s, rtol=0, atol=1e-9)
+
+    # Unknown obscodes give NaN
+    assert np.isnan(out['x'][-1])
+
+
+def test_cli_B(tmpdir):
+    """ Test npy input & output (with the same results from a separate worker process) """
+    rows = np.array([('F51', 2458337.829157830), ('-95', 2458338.829157830)], dtype=[('obscode', 'U4'), ('time', 'f8')])
+    infile = str(tmpdir.join('in.npy'))
+    np.save(infile, rows)
+    for workers in ['1', '2']:
+        outfile = str(tmpdir.join('out_%s.npy' % workers))
+        assert cli.main([infile, '-o', outfile, '--workers', workers, '-q']) == 0
+    one, two = np.load(str(tmpdir.join('out_1.npy'))), np.load(str(tmpdir.join('out_2.npy')))
+    assert one.dtype.names == ('obscode', 'time', 'x', 'y', 'z', 'lt') and len(one) == 2
+    assert np.all(one == two)
+
+
+
+def test_cli_C(tmpdir, capsys):
+    """ Test that csv rows without a time field (including a one-column first line) are reported as a usage error """
+    infile, outfile = str(tmpdir.join('in.csv')), str(tmpdir.join('out.csv'))
+    for text in ['F51\n', 'F51,2458337.5\n568\n']:
+        with open(infile, 'w') as f:
+            f.write(text)
+        with pytest.raises(SystemExit) as excinfo:
+            cli.main([infile, '-o', outfile, '-q'])
+        assert excinfo.value.code == 2 and 'has no time field' in capsys.readouterr().err
+
+
+def test_cli_D(tmpdir):
+    """ Test that rows that cannot be evaluated (e.g. epochs outside kernel coverage) are NaN, without aborting the run """
+    infile, outfile = str(tmpdir.join('in.csv')), str(tmpdir.join('out.csv'))
+    with open(infile, 'w') as f:
+        f.write('F51,2458400.5\nF51,2440587.5\n-95,2458400.5\n')
+    assert cli.main([infile, '-o', outfile, '-q']) == 0
+    out = np.genfromtxt(outfile, delimiter=',', names=True, dtype=None, encoding='utf-8')
+    assert np.all(np.isfinite(out['x'][[0, 2]])) and np.isnan(out['x'][1]) and np.isnan(out['lt'][1])
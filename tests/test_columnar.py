@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import columnar
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+@pytest.mark.parametrize('filename', ['posns.npz', 'posns', 'posns.arrow', 'posns.parquet'])
+def test_columnar_A(tmpdir, filename):
+    """ Test that columns & metadata are written & read back in each format """
+    if filename.endswith(('.arrow', '.parquet')):
+        pytest.importorskip('pyarrow')
+    times = Time([2458337.829157830, 2458338.829157830, 2458339.829157830], format='jd', scale='tdb')
+    W = wis.wis('F51', times, center='SSB', frame='ECLIPJ2000')
+    filepath = str(tmpdir.join(filename))
+    columnar.write(filepath, W)
+
+    columns, metadata = columnar.read(filepath)
+    assert sorted(columns) == ['epoch', 'ltt', 'posn']
+    assert np.all(columns['posn'] == W.hXYZ) and np.all(columns['epoch'] == W.epochs) and np.all(columns['ltt'] == W.ltts)
+    assert metadata['obscode'] == 'F51' and metadata['center'] == 'SSB' and metadata['frame'] == 'ECLIPJ2000'
+    assert metadata['units']['posn'] == 'AU' and metadata['kernelset'] == 'GROUND'
+    assert 'de430.bsp' in [ k['file'] for k in metadata['kernels'] ]
+
+    # With several centers & frames, the base center & frame (those of the positions written) are recorded
+    W = wis.wis('F51', times, center=['SSB', 'SUN'], frame=['ECLIPJ2000', 'J2000'])
+    columnar.write(filepath, W)
+    columns, metadata = columnar.read(filepath)
+    assert np.all(columns['posn'] == W.hXYZ)
+    assert metadata['center'] == 'SSB' and metadata['frame'] == 'ECLIPJ2000'
+
+
+def test_columnar_B():
+    """ Test that positions are handed to Arrow without copying (for the default layout) """
+    pytest.importorskip('pyarrow')
+    times = Time([2458337.829157830, 2458338.829157830], format='jd', scale='tdb')
+    W = wis.wis('-95', times)
+    table = columnar.to_arrow(columnar.get_columns(W), columnar.get_metadata(W))
+    assert table.column('posn').chunk(0).values.buffers()[1].address == W.posns.ctypes.data
+
+    # The 'columns' layout is converted to Nx3
+    W = wis.wis('-95', times, layout='columns')
+    assert np.all( columnar.get_columns(W)['posn'] == W.posns.T )
+
+    # So is a supplied (3,N) buffer (with the default layout)
+    W = wis.wis('-95', times, out=np.zeros((3, 2)))
+    posns = columnar.get_columns(W)['posn']
+    assert posns.shape == (2, 3) and np.all( posns == W.posns.T )
+
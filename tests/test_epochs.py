@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import os
+import sys
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import epochs
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_to_et_A():
+    """ Test that the vectorized UTC->ET conversion matches spiceypy's utc2et (incl. across leapseconds) """
+    wis.GRND.load()
+    jd_utc   = np.concatenate([ 2441317.5 + np.linspace(0, 20000, 1001), [2457754.5 - 1e-6, 2457754.5, 2430000.5] ])
+    expected = np.array([sp.utc2et('JD'+str(jdutc)) for jdutc in jd_utc])
+    assert np.allclose(epochs.to_et(jd_utc, 'jd_utc'), expected, rtol=0, atol=1e-5)
+    assert np.allclose(epochs.to_et(jd_utc - 2400000.5, 'mjd_utc'), expected, rtol=0, atol=1e-4)
+
+
+def test_to_et_B():
+    """ Test TDB julian dates & ET seconds """
+    assert np.allclose(epochs.to_et([2451545.0, 2451546.0], 'jd_tdb'), [0.0, 86400.0])
+    assert np.allclose(epochs.to_et(1.0e8, 'et'), [1.0e8])
+
+
+def test_numeric_times_via_wis():
+    """ Test that numeric times give the same observer positions as astropy Time objects """
+    jd_tdb  = np.array([2451545.000742869, 2451546.000742869])
+    time    = Time(jd_tdb, format='jd', scale='tdb')
+    for obscode in ['F51', '-95']:
+        W  = wis.wis(obscode, time)
+        Wn = wis.wis(obscode, jd_tdb, timeformat='jd_tdb')
+        posns, posns_n = (W.hXYZ, Wn.hXYZ) if isinstance(W, wis.Ground) else (W.posns, Wn.posns)
+        # agree to within ~10 m (astropy & spice TDB models differ at the ~10 microsecond level)
+        assert np.allclose(posns, posns_n, rtol=0, atol=1e-2/wis.au_km), \
+            ' Not close enough to expected values: returned=[%r], expected=[%r]' % (posns_n , posns)
+
+
+def test_deduplicate_A():
+    """ Test that times are sorted & deduplicated, and that scatter() restores the original order """
+    jd_tdb = np.array([2451546.5, 2451545.0, 2451546.5, 2451545.0, 2451547.25])
+    unique, inverse, stats = epochs.deduplicate(jd_tdb, 'jd_tdb')
+    assert np.all(unique == [2451545.0, 2451546.5, 2451547.25])
+    assert np.all(epochs.scatter(unique, inverse) == jd_tdb)
+    assert stats == {'n' : 5, 'n_unique' : 3, 'dedup_ratio' : 5/3}
+
+    # Already sorted & unique times are returned as they are
+    unique, inverse, stats = epochs.deduplicate(jd_tdb[[1,0,4]], 'jd_tdb')
+    assert inverse is None and stats['dedup_ratio'] == 1.
+
+    # Times within the tolerance [s] are merged
+    et = np.array([0.0, 0.2, 10.0, 10.1, 0.1])
+    unique, inverse, stats = epochs.deduplicate(et, 'et', tolerance=1.)
+    assert np.all(unique == [0.0, 10.0]) and stats['n_unique'] == 2
+    assert np.all(epochs.scatter(unique, inverse) == [0.0, 0.0, 10.0, 10.0, 0.0])
+
+    # Time objects
+    time = Time(jd_tdb, format='jd', scale='tdb')
+    unique, inverse, stats = epochs.deduplicate(time)
+    assert isinstance(unique, Time) and stats['n_unique'] == 3
+    assert np.all(unique[inverse].tdb.jd == jd_tdb)
+
+
+def test_deduplicate_via_wis():
+    """ Test that repeated times give the same observer positions as evaluating every time """
+    jd_tdb   = np.array([2451546.000742869, 2451545.000742869, 2451546.000742869, 2451545.000742869])
+    for obscode in ['F51', '-95']:
+        W  = wis.wis(obscode, jd_tdb, timeformat='jd_tdb', center=['SUN', 'SSB'])
+        Ws = [ wis.wis(obscode, jd_tdb[i:i+1], timeformat='jd_tdb', center=['SUN', 'SSB']) for i in range(len(jd_tdb)) ]
+        assert W.stats['dedup_ratio'] == 2.
+        for center in ['SUN', 'SSB']:
+            assert np.allclose(W.centers[center], np.concatenate([ w.centers[center] for w in Ws ]), rtol=0, atol=1e-12)
+        assert np.allclose(W.epochs, np.concatenate([ w.epochs for w in Ws ]), rtol=0, atol=0)
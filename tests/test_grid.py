@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import grid
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+@pytest.mark.parametrize('obscode', ['F51', '-95'])
+def test_grid_A(obscode, tmpdir):
+    """ Test that a grid written in chunks to file matches positions evaluated by wis() """
+    filepath = str(tmpdir.join('grid.npy'))
+    table = grid.grid(obscode, 2458400.5, 2458401.5, 600., timeformat='jd_tdb', filepath=filepath, chunk=50, interpolate=False)
+    assert len(table) == 145 and np.all(np.diff(table['et']) == 600.)
+    assert table['et'][0] == (2458400.5 - 2451545.0) * wis.day_s and table['et'][-1] == (2458401.5 - 2451545.0) * wis.day_s
+    
+    W = wis.wis(obscode, table['et'], timeformat='et')
+    posns = W.hXYZ if hasattr(W, 'hXYZ') else W.posns
+    saved = np.load(filepath)
+    assert np.all(saved == table)
+    assert np.allclose(np.column_stack([saved['x'], saved['y'], saved['z']]), posns, rtol=0, atol=1e-15)
+    assert np.allclose(saved['lt'], W.ltts, rtol=0, atol=1e-15)
+
+def test_grid_B():
+    """ Test that dense grids for ground-based obscodes are interpolated accurately """
+    table = grid.grid('F51', 2458400.5, 2458402.5, 60., timeformat='jd_tdb', chunk=1000)
+    assert len(table) == 2 * 1440 + 1
+    W = wis.wis('F51', table['et'], timeformat='et')
+    assert np.allclose(np.column_stack([table['x'], table['y'], table['z']]), W.hXYZ, rtol=0, atol=1e-12)
+    assert np.allclose(table['lt'], W.ltts, rtol=0, atol=1e-14)
@@ -119,7 +119,7 @@ Geometric states/elements have no aberrations applied.
     obscode = 'F51'
     
     # Call wis.wis
-    W = wis.wis(obscode, time)
+    W = wis.wis(obscode, time, keep_intermediates=True)
     
     # Because we input a *SATELLITE* obs-code, we expect to get back a Satellite-Class object
     assert isinstance(W, wis.Ground )
@@ -230,7 +230,7 @@ Geometric states/elements have no aberrations applied.
     obscode = 'F51'
     
     # Call wis.wis
-    W = wis.wis(obscode, time)
+    W = wis.wis(obscode, time, keep_intermediates=True)
     
     # Because we input a *SATELLITE* obs-code, we expect to get back a Satellite-Class object
     assert isinstance(W, wis.Ground )
@@ -340,7 +340,7 @@ Geometric states/elements have no aberrations applied.
     obscode = 'F51'
     
     # Call wis.wis
-    W = wis.wis(obscode, time)
+    W = wis.wis(obscode, time, keep_intermediates=True)
     
     # Because we input a *SATELLITE* obs-code, we expect to get back a Satellite-Class object
     assert isinstance(W, wis.Ground )
@@ -361,3 +361,34 @@ Geometric states/elements have no aberrations applied.
 
 
 
+
+
+
+def test_Ground_D():
+    """
+    Test that the observatory position can be written into a supplied buffer,
+    and with a selectable dtype & layout
+    """
+    time    = Time([2451545.000742869, 2451546.000742869], format='jd', scale='tdb')
+    obscode = 'F51'
+    expectedPosns = wis.wis(obscode, time).hXYZ
+
+    # Supplied (float32) buffer is written into in-place
+    out = np.zeros((2,3), dtype=np.float32)
+    W = wis.wis(obscode, time, out=out)
+    assert W.hXYZ is out
+    assert np.allclose(out, expectedPosns, rtol=1e-06, atol=0)
+
+    # Supplied structured buffer
+    out = np.zeros(2, dtype=[('x','f8'),('y','f8'),('z','f8')])
+    W = wis.wis(obscode, time, out=out)
+    assert np.allclose(out['z'], expectedPosns[:,2], rtol=1e-12, atol=0)
+
+    # Columnar layout
+    W = wis.wis(obscode, time, layout='columns')
+    assert W.hXYZ.shape == (3,2)
+    assert np.allclose(W.hXYZ.T, expectedPosns, rtol=1e-12, atol=0)
+
+    # A buffer of the wrong shape is rejected (without exiting the interpreter)
+    with pytest.raises(AssertionError):
+        wis.wis(obscode, time, out=np.zeros((3,3)))
@@ -23,6 +23,7 @@ code_dir = os.path.join(wis_dir, 'wis')
 sys.path.insert(0,code_dir)
 import wis
 import kernels
+import kernel_store
 
 # -----------------------------------------
 # Test Functions
@@ -93,6 +94,281 @@ def test_KernelLoader_B():
 
 
 
+# ------- Coverage ------------------------
+
+def test_uncovered_mask_A():
+    """ Test the vectorized lookup of epochs against (overlapping, unsorted) coverage intervals """
+    intervals = [[10., 20.], [0., 5.], [15., 30.], [40., 50.]]
+    epochs    = np.array([-1., 0., 5., 7., 12., 30., 35., 45., 51.])
+    expected  = np.array([True, False, False, True, False, False, True, False, True])
+    assert np.all( kernels.uncovered_mask(epochs, intervals) == expected )
+
+
+def test_coverage_index_A():
+    """ Test that the coverage index for the ground-based kernels is built & used to select kernels """
+    G = wis.GRND
+    G.load()
+    index = G.build_coverage_index()
+    assert sorted(index.keys()) == sorted([os.path.basename(_) for _ in G.expected_local_kernel_filepaths])
+    assert index['de430.bsp']['kind'] == 'SPK' and '399' in index['de430.bsp']['coverage']
+
+    # Text kernels are always selected, & the order of the files is preserved
+    selected = G.select_kernels(window=(0., 86400.))
+    expected = [ os.path.realpath(_) for _ in G.expected_local_kernel_filepaths ]
+    assert os.path.realpath(os.path.join(G.define_download_subdir(), 'naif0012.tls')) in selected
+    assert selected == [ _ for _ in expected if _ in selected ]
+
+    # Epochs far outside of de430 are flagged as uncovered
+    assert np.all( G.uncovered(np.array([0., 1.e11]), 399) == [False, True] )
+
+
+def test_share_kernels_A():
+    """ Test that identical kernels (TESS's copy of de430 & the ground-based de430) are stored & furnished once """
+    time = Time([2458337.829157830], format='jd', scale='tdb')
+    wis.wis('F51', time)
+    wis.wis('-95', time)
+    grnd = [ _ for _ in wis.GRND.expected_local_kernel_filepaths if _.endswith('de430.bsp') ][0]
+    tess = [ _ for _ in wis.satellite_obscode_dict['-95'].expected_local_kernel_filepaths if _.endswith('de430.bsp') ][0]
+    assert os.path.islink(grnd) and os.path.islink(tess)
+    assert os.path.realpath(grnd) == os.path.realpath(tess)
+    assert os.path.basename(os.path.realpath(grnd)) == kernels.file_sha256(grnd) + '.bsp'
+    assert kernels.POOL.n_files == sp.ktotal('ALL')
+
+
+# ------- KernelStore ---------------------
+
+def test_KernelStore_A(tmp_path):
+    """ Test that the store records kernels in its manifest, de-duplicates their content & persists the manifest """
+    wis.GRND.load()
+    source = [ _ for _ in wis.GRND.expected_local_kernel_filepaths if _.endswith('naif0012.tls') ][0]
+    S = kernel_store.KernelStore(root=str(tmp_path))
+    first, second = [ os.path.join(S.directory(subdir), 'naif0012.tls') for subdir in (None, '-95') ]
+    for f in (first, second):
+        shutil.copy(source, f)
+        S.add(f, url='https://example.com/naif0012.tls')
+    
+    # Both expected files are links to the same stored content
+    assert S.has(first) and S.has(second) and not S.has(os.path.join(str(tmp_path), 'missing.bsp'))
+    assert S.resolve(first) == S.resolve(second) == os.path.realpath(first)
+    assert os.listdir(S.shared_dir) == [ kernels.file_sha256(source) + '.tls' ]
+    assert S.get(second)['kind'] == 'KPL/LSK' and S.get(second)['url'] == 'https://example.com/naif0012.tls'
+    assert S.age_in_days(first) < 1.0 and S.age_in_days('missing.bsp') is None
+    
+    # The manifest is read back by a new store, & removed entries are forgotten
+    S.remove(second)
+    T = kernel_store.KernelStore(root=str(tmp_path))
+    assert T.has(first) and not T.has(second) and not os.path.exists(second)
+    assert T.get(first) == S.get(first)
+
+
+def test_KernelStore_C(tmp_path):
+    """ Test that re-adding changed content under the same name deletes the old (no longer referenced) content """
+    wis.GRND.load()
+    source = [ _ for _ in wis.GRND.resolve_kernels() if _.endswith('.tls') ][0]
+    S = kernel_store.KernelStore(root=str(tmp_path))
+    f = os.path.join(S.directory(), 'naif0012.tls')
+    shutil.copy(source, f)
+    S.add(f)
+    old = S.resolve(f)
+    
+    # A refreshed copy (as in KernelSpecifier._download(): remove, then add the new content)
+    S.remove(f, save=False)
+    shutil.copy(source, f)
+    with open(f, 'a') as fh:
+        fh.write('\n')
+    S.add(f)
+    assert S.resolve(f) != old and not os.path.exists(old)
+    assert os.listdir(S.shared_dir) == [ os.path.basename(S.resolve(f)) ]
+    
+    # Content that is still referenced by another kernel is kept
+    g = os.path.join(S.directory('-95'), 'naif0012.tls')
+    shutil.copy(f, g)
+    S.add(g)
+    S.remove(f)
+    assert os.path.exists(S.resolve(g))
+
+
+def test_KernelStore_B(tmpdir):
+    """ Test downloading from a file:// mirror into one store, then using it as a read-only shared store for another """
+    wis.wis('-95', Time([2458337.829157830], format='jd', scale='tdb'))
+    files     = ['https://naif.jpl.nasa.gov/pub/naif/generic_kernels/lsk/naif0012.tls']
+    wildcards = {'https://archive.stsci.edu/missions/tess/models/' : 'TESS_EPH_DEF*'}
+    
+    # A mirror of the upstream hosts' directory trees
+    mirror = tmpdir.mkdir('mirror')
+    sources = [ wis.GRND.resolve_kernels()[ [ os.path.basename(_) for _ in wis.GRND.expected_local_kernel_filepaths ].index('naif0012.tls') ] ]
+    sources+= [ f for f in wis.satellite_obscode_dict['-95'].resolve_kernels() if f.endswith('.bsp') ][:1]
+    for url, source in zip([files[0], 'https://archive.stsci.edu/missions/tess/models/TESS_EPH_DEF_2018.bsp'], sources):
+        target = os.path.join(str(mirror), url.split('/', 3)[-1])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy(source, target)
+    
+    # Everything is fetched from the mirror (upstream urls are recorded in the manifest)
+    cluster = kernel_store.KernelStore(root=str(tmpdir.join('cluster')), mirrors=['file://' + str(mirror)])
+    K = kernels.KernelSpecifier(obscode='-999', name='MIRRORTEST', files=files, wildcards=wildcards, store=cluster)
+    assert [ os.path.basename(_) for _ in K.expected_local_kernel_filepaths ] == ['naif0012.tls', 'TESS_EPH_DEF_2018.bsp']
+    assert K.download_data() and K.kernels_have_been_downloaded()
+    assert cluster.get(K.expected_local_kernel_filepaths[0])['url'] == files[0]
+    
+    # A user's store finds the kernels in the (read-only) shared store, so nothing is downloaded or written
+    user = kernel_store.KernelStore(root=str(tmpdir.join('user')), shared_roots=[str(tmpdir.join('cluster'))], mirrors=['file:///nonexistent'])
+    U = kernels.KernelSpecifier(obscode='-999', name='MIRRORTEST', files=files, wildcards={}, store=user)
+    assert U.kernels_have_been_downloaded()
+    assert U.resolve_kernels() == K.resolve_kernels()[:1] and U.resolve_kernels()[0].startswith(str(tmpdir.join('cluster')))
+    U.load()
+    kernels.POOL.unload('MIRRORTEST')
+    assert not os.path.exists(user.manifest_filepath)
+    with pytest.raises(AssertionError):
+        user.shared[0].add(U.resolve_kernels()[0])
+    
+    # The store can be configured from the environment
+    os.environ.update({'WIS_KERNEL_DIR' : str(tmpdir.join('env')), 'WIS_SHARED_KERNEL_DIRS' : str(tmpdir.join('cluster')), 'WIS_KERNEL_MIRRORS' : 'file:///a, file:///b'})
+    try:
+        E = kernel_store.KernelStore.from_environment()
+        assert E.root == str(tmpdir.join('env')) and E.mirrors == ['file:///a', 'file:///b'] and E.shared[0].root == str(tmpdir.join('cluster'))
+        assert E.sources(files[0]) == ['file:///a/pub/naif/generic_kernels/lsk/naif0012.tls', 'file:///b/pub/naif/generic_kernels/lsk/naif0012.tls']
+    finally:
+        for key in ['WIS_KERNEL_DIR', 'WIS_SHARED_KERNEL_DIRS', 'WIS_KERNEL_MIRRORS']:
+            del os.environ[key]
+
+
+def test_sync_A(tmpdir):
+    """ Test that wildcard listings are recorded & that sync() only downloads/furnishes newly published files """
+    wis.wis('-95', Time([2458337.829157830], format='jd', scale='tdb'))
+    files     = ['https://naif.jpl.nasa.gov/pub/naif/generic_kernels/lsk/naif0012.tls']
+    wildcards = {'https://archive.stsci.edu/missions/tess/models/' : 'TESS_EPH_DEF*'}
+    
+    # A mirror with an lsk & the first published ephemeris
+    mirror = tmpdir.mkdir('mirror')
+    models = mirror.mkdir('missions').mkdir('tess').mkdir('models')
+    lsk    = mirror.mkdir('pub').mkdir('naif').mkdir('generic_kernels').mkdir('lsk')
+    tess   = [ f for f in wis.satellite_obscode_dict['-95'].resolve_kernels() if f.endswith('.bsp') ]
+    shutil.copy([ f for f in wis.GRND.resolve_kernels() if f.endswith('.tls') ][0], str(lsk.join('naif0012.tls')))
+    shutil.copy(tess[-1], str(models.join('TESS_EPH_DEF_2018.bsp')))
+    
+    S = kernel_store.KernelStore(root=str(tmpdir.join('store')), mirrors=['file://' + str(mirror)])
+    K = kernels.KernelSpecifier(obscode='-998', name='SYNCTEST', files=files, wildcards=wildcards, store=S)
+    K.load()
+    try:
+        assert [ os.path.basename(f) for f in K.expected_local_kernel_filepaths ] == ['naif0012.tls', 'TESS_EPH_DEF_2018.bsp']
+        before = [ S.get(f) for f in K.expected_local_kernel_filepaths ]
+        
+        # A newly published file is the only one downloaded, & it is furnished into the running process
+        shutil.copy(tess[0], str(models.join('TESS_EPH_DEF_2019.bsp')))
+        added = K.sync()
+        assert [ os.path.basename(f) for f in added ] == ['TESS_EPH_DEF_2019.bsp'] and K.expected_local_kernel_filepaths[2] == added[0]
+        assert [ S.get(f) for f in K.expected_local_kernel_filepaths[:2] ] == before
+        assert S.resolve(added[0]) in kernels.POOL.contents()[-1]['files']
+        assert K.sync() == []
+        
+        # The recorded listing is reused by other specifiers (until it is older than LISTING_MAX_AGE)
+        os.remove(str(models.join('TESS_EPH_DEF_2019.bsp')))
+        L = kernels.KernelSpecifier(obscode='-998', name='SYNCTEST2', files=files, wildcards=wildcards, store=kernel_store.KernelStore(root=str(tmpdir.join('store'))))
+        assert sorted( os.path.basename(f) for f in L.expected_local_kernel_filepaths ) == ['TESS_EPH_DEF_2018.bsp', 'TESS_EPH_DEF_2019.bsp', 'naif0012.tls']
+        assert L.kernels_have_been_downloaded()
+    finally:
+        kernels.POOL.unload('SYNCTEST')
+
+
+# ------- KernelPool ----------------------
+
+def test_KernelPool_A():
+    """ Test that the pool unloads least-recently-used sets & restores priority when a set is re-used """
+    time = Time([2458337.829157830], format='jd', scale='tdb')
+    P = kernels.POOL
+    P.clear()
+    try:
+        wis.wis('F51', time)
+        wis.wis('-95', time)
+        assert [ c['name'] for c in P.contents() ] == ['GROUND', 'TESS']
+        assert P.n_files == sp.ktotal('ALL')
+
+        # Re-using GROUND puts its kernels back on top of the spice priority list
+        wis.wis('F51', time)
+        assert [ c['name'] for c in P.contents() ] == ['TESS', 'GROUND']
+        assert sp.kdata(sp.ktotal('ALL') - 1, 'ALL')[0] == os.path.realpath(wis.GRND.expected_local_kernel_filepaths[-1])
+
+        # Capping the pool evicts the least-recently-used set (TESS)
+        P.max_files = len(wis.GRND.expected_local_kernel_filepaths)
+        P.enforce()
+        assert [ c['name'] for c in P.contents() ] == ['GROUND']
+        assert P.n_files == sp.ktotal('ALL')
+    finally:
+        P.max_files = None
+
+def test_KernelPool_B(tmpdir, monkeypatch):
+    """ Test that files added by a later windowed load are furnished in their specified order (not on top) """
+    wis.GRND.load()
+    day, et1, et2 = 86400., 0., 100 * 86400.
+    url  = 'https://naif.jpl.nasa.gov/pub/naif/generic_kernels/spk/'
+    spk  = tmpdir.mkdir('mirror').mkdir('pub').mkdir('naif').mkdir('generic_kernels').mkdir('spk')
+    shutil.copy([ f for f in wis.GRND.resolve_kernels() if f.endswith('.tls') ][0], str(spk.join('order.tls')))
+    
+    # 'late.bsp' covers both windows, 'early.bsp' (specified before it, so of lower priority) only the second
+    for name, start, position in [('late.bsp', et1 - day, [1e8, 0., 0.]), ('early.bsp', et2 - day, [2e8, 0., 0.])]:
+        handle = sp.spkopn(str(spk.join(name)), name, 0)
+        sp.spkw08(handle, 399, 10, 'J2000', start, et2 + day, name, 1, 2, [position + [0., 0., 0.]] * 2, start, et2 + day - start)
+        sp.spkcls(handle)
+    
+    S = kernel_store.KernelStore(root=str(tmpdir.join('store')), mirrors=['file://' + str(tmpdir.join('mirror'))])
+    K = kernels.KernelSpecifier(obscode='-997', name='ORDERTEST', files=[url + 'order.tls', url + 'early.bsp', url + 'late.bsp'], wildcards={}, store=S)
+    try:
+        K.load(window=(et1, et1 + 60.))
+        assert [ os.path.basename(f) for f in kernels.POOL.contents()[-1]['files'] ] == [ os.path.basename(f) for f in K.resolve_kernels()[::2] ]
+        furnished = []
+        monkeypatch.setattr(kernels.sp, 'furnsh', lambda files, furnsh=sp.furnsh: furnished.append(list(files)) or furnsh(files))
+        K.load(window=(et2, et2 + 60.))
+        
+        # The set is re-furnished in the specified order from the addition onward: 'late.bsp' still has priority
+        loaded = [ sp.kdata(i, 'ALL')[0] for i in range(sp.ktotal('ALL')) ]
+        assert [ f for f in loaded if f in K.resolve_kernels() ] == K.resolve_kernels()
+        assert furnished == [ K.resolve_kernels()[1:] ]
+        assert np.allclose(sp.spkpos('399', et2, 'J2000', 'NONE', '10')[0], [1e8, 0., 0.])
+    finally:
+        kernels.POOL.unload('ORDERTEST')
+
+
+def test_KernelPool_C(tmpdir):
+    """ Test that refreshing a loaded time-critical kernel swaps the new copy in, before the old copy is deleted """
+    wis.GRND.load()
+    et  = 0.
+    url = 'https://naif.jpl.nasa.gov/pub/naif/generic_kernels/spk/'
+    spk = tmpdir.mkdir('mirror').mkdir('pub').mkdir('naif').mkdir('generic_kernels').mkdir('spk')
+    shutil.copy([ f for f in wis.GRND.resolve_kernels() if f.endswith('.tls') ][0], str(spk.join('tc.tls')))
+    
+    def write_spk(name, body, position):
+        filepath = str(spk.join(name))
+        if os.path.isfile(filepath):
+            os.remove(filepath)
+        handle = sp.spkopn(filepath, name, 0)
+        sp.spkw08(handle, body, 10, 'J2000', et - 86400., et + 86400., name, 1, 2, [position + [0., 0., 0.]] * 2, et - 86400., 2 * 86400.)
+        sp.spkcls(handle)
+    write_spk('tc.bsp', 399, [1e8, 0., 0.])
+    write_spk('other.bsp', 301, [3e8, 0., 0.])
+    
+    S = kernel_store.KernelStore(root=str(tmpdir.join('store')), mirrors=['file://' + str(tmpdir.join('mirror'))])
+    K = kernels.KernelSpecifier(obscode='-996', name='TCTEST', files=[url + 'tc.tls', url + 'tc.bsp', url + 'other.bsp'],
+                                wildcards={}, timecritical=[url + 'tc.bsp'], store=S)
+    try:
+        K.load()
+        stale = K.resolve_kernels()[1]
+        
+        # A day later, the time-critical kernel has been updated upstream
+        write_spk('tc.bsp', 399, [2e8, 0., 0.])
+        S.manifest[ S.key(K.local_filepath(url + 'tc.bsp')) ]['mtime'] -= 2 * 86400.
+        K.load()
+        
+        # The new copy has taken the old copy's place (nothing else is dropped) & the old copy is deleted
+        assert kernels.POOL.contents()[-1]['files'] == K.resolve_kernels() and stale not in K.resolve_kernels()
+        assert not os.path.exists(stale)
+        loaded = [ sp.kdata(i, 'ALL')[0] for i in range(sp.ktotal('ALL')) ]
+        assert stale not in loaded and [ f for f in loaded if f in K.resolve_kernels() ] == K.resolve_kernels()
+        assert np.allclose(sp.spkpos('399', et, 'J2000', 'NONE', '10')[0], [2e8, 0., 0.])
+        assert np.allclose(sp.spkpos('301', et, 'J2000', 'NONE', '10')[0], [3e8, 0., 0.])
+    finally:
+        kernels.POOL.unload('TCTEST')
+
+
 
 
 # -----------------------------------------
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import os
+import sys
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import obs80
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_calendar_to_jd_A():
+    """ Test conversion of calendar dates to julian dates """
+    jd = obs80.calendar_to_jd([2000, 2018, 1999], [1, 8, 12], [1.5, 12.329157830, 31.0])
+    assert np.allclose(jd, [2451545.0, 2458342.829157830, 2451543.5], rtol=0, atol=1e-9)
+
+
+def test_geodetic_to_body_fixed_A():
+    """ Test geodetic conversion against spice """
+    lon, lat, alt = np.array([203.7441, -70.73]), np.array([20.7071888, -30.24]), np.array([3.0763821, 2.7])
+    expected = [ sp.georec(np.radians(a), np.radians(b), c, wis.Rearth_km, obs80.Fearth) for a,b,c in zip(lon,lat,alt) ]
+    assert np.allclose(obs80.geodetic_to_body_fixed(lon, lat, alt), expected, rtol=0, atol=1e-6)
+
+
+def test_obs80_posns_A(tmpdir):
+    """
+    Test that ground-based, satellite & roving observations are read from an 80-column file
+    and that the observer positions are consistent with those from the Ground class
+    """
+    lines = [
+     convenience_function_for_obs80_line(' ', '2000 01 01.5', 'F51'),
+     convenience_function_for_obs80_line('S', '2000 01 01.5', 'C51'),
+     convenience_function_for_obs80_line('s', '2000 01 01.5', 'C51', [(32,'1'),(34,'-'),(35,' 5634.1734'),(46,'+'),(47,' 2466.2657'),(58,'-'),(59,' 3038.3924')]),
+     convenience_function_for_obs80_line('V', '2000 01 01.5', '247'),
+     convenience_function_for_obs80_line('v', '2000 01 01.5', '247', [(34,'203.744100'),(45,'+20.707189'),(56,' 3076')]),
+     convenience_function_for_obs80_line(' ', '2000 01 01.5', 'ZZZ'),
+    ]
+    filepath = str(tmpdir.join('test.obs'))
+    with open(filepath, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    obs, posns = obs80.obs80_posns(filepath)
+    assert list(obs['obscode']) == ['F51', 'C51', '247', 'ZZZ']
+    assert np.allclose(obs['jd_utc'], 2451545.0)
+    assert np.allclose(obs['offset_km'][1], [-5634.1734, 2466.2657, -3038.3924])
+    assert posns.shape == (4,3)
+
+    # The ground-based observation should match the Ground class
+    W = wis.wis('F51', Time([2451545.0], format='jd', scale='utc'), keep_intermediates=True)
+    assert np.allclose(posns[0], W.hXYZ[0], rtol=0, atol=1e-12)
+
+    # The satellite observation is the supplied offset from the geocenter
+    assert np.allclose(posns[1], W.posns[0] + obs['offset_km'][1]/wis.au_km, rtol=0, atol=1e-12)
+
+    # The roving observer was put at (roughly) the location of F51
+    assert np.linalg.norm(posns[2] - posns[0]) * wis.au_km < 1.0
+
+    # Unknown obscodes give NaN
+    assert np.all(np.isnan(posns[3]))
+
+
+
+# -----------------------------------------
+# Convenience Functions
+# -----------------------------------------
+
+def convenience_function_for_obs80_line(note2, date, obscode, fields=()):
+    """ Create an 80-column line with the supplied (0-based column, text) fields """
+    line = list(' '*80)
+    line[5:12]  = 'K06L00C'
+    line[14]    = note2
+    line[15:32] = date.ljust(17)
+    for col, text in fields:
+        line[col:col+len(text)] = text
+    line[77:80] = obscode
+    return ''.join(line)
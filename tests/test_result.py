@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import sys
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import result
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_Result_A():
+    """ Test that the columns of a Result are contiguous views of one buffer, & slicing/concatenation """
+    R = result.Result.empty(5, velocities=True, obscode='F51', center='SUN', frame='J2000', abcorr='NONE')
+    assert not hasattr(R, '__dict__')
+    for column in R.columns.values():
+        assert column.flags['C_CONTIGUOUS'] and np.shares_memory(column, R.buffer)
+    assert R.buffer.nbytes == R.nbytes == 5 * 8 * 8
+    R.epochs[:], R.posns[:], R.vels[:], R.ltts[:] = np.arange(5), np.arange(15).reshape(5,3), 0., 1.
+
+    # Slices are views of the same buffer
+    S = R[1:3]
+    assert len(S) == 2 and S.buffer is R.buffer and np.shares_memory(S.posns, R.buffer)
+    assert np.all(S.posns == [[3,4,5],[6,7,8]]) and S.obscode == 'F51'
+    assert np.all(R[-1].epochs == [4])
+
+    # Concatenation copies into a new buffer
+    C = result.concatenate([R[3:], R[:3]])
+    assert not np.shares_memory(C.buffer, R.buffer)
+    assert np.all(C.epochs == [3,4,0,1,2]) and np.all(C.posns[2] == [0,1,2]) and C.vels is not None
+    assert result.concatenate([R, result.Result.empty(1, obscode='C51')]).obscode is None
+
+
+def test_Result_B():
+    """ Test that wis() returns its positions in a Result, and releases intermediates by default """
+    time = Time([2451545.0, 2451546.0], format='jd', scale='utc')
+    for obscode in ['F51', '-95']:
+        W = wis.wis(obscode, time)
+        posns = W.hXYZ if isinstance(W, wis.Ground) else W.posns
+        assert W.result.posns is posns and W.result.epochs is W.epochs and W.result.ltts is W.ltts
+        assert np.shares_memory(posns, W.result.buffer)
+        assert W.result.obscode == obscode and W.result.center == 'SUN'
+
+    W = wis.wis('F51', time)
+    assert not hasattr(W, 'obs_vec_rot') and not hasattr(W, 'posns')
+    W = wis.wis('F51', time, keep_intermediates=True)
+    assert np.allclose(W.hXYZ, W.posns + W.obs_vec_rot_AU, rtol=0, atol=1e-12)
+
+    # A supplied (or non-default) buffer is used for the positions instead
+    W = wis.wis('F51', time, dtype=np.float32)
+    assert W.result.posns is W.hXYZ and W.hXYZ.dtype == np.float32
+
+
+def test_Result_merge_A():
+    """ Test in-place merging: sorted insertion, appending & amortized growth of the buffer """
+    def make(epochs):
+        R = result.Result.empty(len(epochs))
+        R.epochs[:], R.posns[:], R.ltts[:] = epochs, np.asarray(epochs)[:,None] * [1,2,3], -np.asarray(epochs)
+        return R
+    R = make([0., 2., 4.])
+    R.merge( make([5., 1., 3.]) )
+    assert np.all(R.epochs == [0,1,2,3,4,5]) and np.all(R.posns[:,2] == 3*R.epochs) and np.all(R.ltts == -R.epochs)
+    assert R.capacity == 6
+
+    # Appending within the capacity does not reallocate
+    R.merge( make([6.]) )
+    buffer = R.buffer
+    R.merge( make([7.]) )
+    assert R.buffer is buffer and R.capacity == 12 and np.all(R.epochs == np.arange(8))
+
+    # Slices are copied into their own buffer before being extended
+    S = R[:2].merge( make([0.5]) )
+    assert S.buffer is not R.buffer and np.all(S.epochs == [0, 0.5, 1]) and np.all(R.epochs == np.arange(8))
+
+
+def test_extend_A():
+    """ Test that extending a result to more times matches evaluating all of the times at once """
+    jd_utc = 2458337.5 + np.arange(8) / 24.
+    for obscode in ['F51', '-95']:
+        W = wis.wis(obscode, jd_utc[:4], timeformat='jd_utc', keep_intermediates=True)
+        assert W.extend(jd_utc[2:6], timeformat='jd_utc') == 2
+        assert W.extend(Time(jd_utc[5:], format='jd', scale='utc')) == 2
+        expected = wis.wis(obscode, jd_utc, timeformat='jd_utc')
+        posns, expected_posns = (W.hXYZ, expected.hXYZ) if isinstance(W, wis.Ground) else (W.posns, expected.posns)
+        assert np.allclose(W.epochs, expected.epochs, rtol=0, atol=1e-5)
+        assert np.allclose(posns, expected_posns, rtol=0, atol=1e-2/wis.au_km) and posns is W.result.posns
+        assert np.allclose(W.ltts, expected.ltts, rtol=0, atol=1e-12)
+        assert not hasattr(W, 'obs_vec_rot')
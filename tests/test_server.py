@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import threading
+import numpy as np
+from astropy.time import Time
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import server
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_server_A(tmpdir):
+    """ Test that positions evaluated by a server match those of wis() """
+    path = str(tmpdir.join('wis.sock'))
+    S = server.Server(path)
+    thread = threading.Thread(target=S.serve_forever, daemon=True)
+    thread.start()
+    try:
+        jd_utc = np.array([2458337.829157830, 2458338.829157830, 2458337.829157830])
+        with server.Client(path) as client:
+            for obscode in ['F51', '-95']:
+                W = wis.wis(obscode, jd_utc, timeformat='jd_utc', center='SSB')
+                R = client.wis(obscode, jd_utc, timeformat='jd_utc', center='SSB')
+                assert np.all(R.posns == W.result.posns) and np.all(R.ltts == W.ltts) and np.all(R.epochs == W.epochs)
+                assert R.obscode == obscode and R.center == 'SSB'
+
+            # astropy Time objects, unknown obscodes & errors
+            # (agree to within ~10 m, as astropy & spice TDB models differ at the ~10 microsecond level)
+            R = client.wis('F51', Time(jd_utc, format='jd', scale='utc'))
+            assert np.allclose(R.posns, wis.wis('F51', jd_utc, timeformat='jd_utc').hXYZ, rtol=0, atol=1e-2/wis.au_km)
+            assert client.wis('ZZZ', jd_utc, timeformat='jd_utc') is None
+            with pytest.raises(RuntimeError):
+                client.wis('F51', jd_utc, timeformat='jd_utc', center='NOT-A-BODY')
+
+            # Lists of centers/frames are rejected before anything is sent (so the connection stays usable)
+            with pytest.raises(AssertionError):
+                client.wis('F51', jd_utc, timeformat='jd_utc', center=['SSB', 'SUN'])
+            with pytest.raises(AssertionError):
+                server.remote_wis('F51', jd_utc, timeformat='jd_utc', frame=['J2000', 'ECLIPJ2000'], path=path)
+
+        # The module-level client keeps its connection
+        R = server.remote_wis('F51', jd_utc, timeformat='jd_utc', path=path)
+        assert len(R) == 3 and S.n_requests == 6
+    finally:
+        if path in server._clients:
+            server._clients.pop(path).close()
+        S.shutdown()
+        S.server_close()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import session
+import kernels
+import kernel_store
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+def test_Session_A(tmpdir):
+    """ Test that two kernel sets can be used in one process, switching the pool only when the session changes """
+    jd_tdb = np.array([2458400.5, 2458401.25, 2458405.0])
+    A = wis.wis('F51', jd_tdb, timeformat='jd_tdb', keep_intermediates=True)
+    epochs, hXYZ, geocenter = A.epochs.copy(), A.hXYZ.copy(), A.posns.copy()
+    
+    # A second planetary ephemeris (published on a mirror), in which the earth is fixed w.r.t. the sun
+    # -----------------------------------------------
+    url    = 'https://naif.jpl.nasa.gov/pub/naif/generic_kernels/spk/planets/de440.bsp'
+    mirror = tmpdir.mkdir('mirror').mkdir('pub').mkdir('naif').mkdir('generic_kernels').mkdir('spk').mkdir('planets')
+    fixed  = np.array([1e8, 2e7, 3e6])
+    handle = sp.spkopn(str(mirror.join('de440.bsp')), 'de440', 0)
+    sp.spkw08(handle, 399, 10, 'J2000', epochs[0] - 86400., epochs[-1] + 86400., 'fixed', 1, 2,
+              [list(fixed) + [0., 0., 0.]] * 2, epochs[0] - 86400., epochs[-1] - epochs[0] + 2 * 86400.)
+    sp.spkcls(handle)
+    
+    store = kernel_store.KernelStore(root=str(tmpdir.join('store')), shared_roots=[wis.GRND.store.root], mirrors=['file://' + str(tmpdir.join('mirror'))])
+    DE440 = session.Session('de440', ground_files=wis.GRND.files + [url], store=store)
+    B = wis.wis('F51', jd_tdb, timeformat='jd_tdb', keep_intermediates=True, session=DE440)
+    assert DE440.active and not session.DEFAULT.active and B.session is DE440
+    assert np.allclose(B.posns, fixed / wis.au_km, rtol=0, atol=1e-12)
+    assert np.allclose(B.hXYZ - B.posns, hXYZ - geocenter, rtol=0, atol=1e-12)
+    
+    # Switching back to the default kernels re-furnishes them (without reloading/downloading anything)
+    # -----------------------------------------------
+    loaded = kernels.POOL.contents()
+    A = wis.wis('F51', jd_tdb, timeformat='jd_tdb', keep_intermediates=True)
+    assert session.DEFAULT.active and kernels.POOL.contents() == loaded
+    assert np.allclose(A.hXYZ, hXYZ, rtol=0, atol=1e-12) and np.allclose(A.posns, geocenter, rtol=0, atol=1e-12)
+    
+    # Repeated use of the active session does not touch the pool, & each session keeps its own caches
+    # -----------------------------------------------
+    C = wis.wis('F51', jd_tdb, frame=['J2000', 'ECLIPJ2000'], timeformat='jd_tdb', session=DE440)
+    D = wis.wis('F51', jd_tdb, frame=['J2000', 'ECLIPJ2000'], timeformat='jd_tdb', session=DE440)
+    assert np.all(C.frames['ECLIPJ2000'] == D.frames['ECLIPJ2000'])
+    assert ('J2000', 'ECLIPJ2000') in DE440.rotations
+    DE440.clear()
+    assert DE440.pool.n_files == 0
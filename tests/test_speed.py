@@ -14,6 +14,7 @@ import shutil
 import numpy as np
 from astropy.time import Time
 from timeit import default_timer as timer
+import subprocess
 
 # -----------------------------------------
 # Local imports
@@ -58,3 +59,23 @@ def test_speed_Ground_A():
     assert elapsed < 1.0
     
 test_speed_Ground_A()
+
+
+def test_speed_import_A():
+    """
+    Test that importing wis is quick & does not import the heavy / network dependencies
+    (astropy is only needed by the caller, requests/bs4/wget only when downloading)
+    Initial tests suggest ~0.2s, dominated by numpy & spiceypy
+    """
+    script = "; ".join([ "import sys, time",
+                         "before = set(sys.modules)",
+                         "start  = time.perf_counter()",
+                         "import wis",
+                         "print(time.perf_counter() - start)",
+                         "print(' '.join(set(sys.modules) - before))" ])
+    output = subprocess.run([sys.executable, '-c', script], cwd=code_dir, capture_output=True, text=True, check=True).stdout.split('\n')
+    elapsed, imported = float(output[0]), output[1].split()
+    assert elapsed < 1.0
+    for module in ['astropy', 'bs4', 'requests', 'wget']:
+        assert module not in imported, '%r imported by wis' % module
+
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import pytest
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import wis
+import targets
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+@pytest.mark.parametrize('abcorr', ['NONE', 'LT', 'CN'])
+def test_target_vectors_A(abcorr):
+    """ Test batched observer->target vectors against spice's own light-time corrected vectors """
+    jd_tdb  = np.array([2458400.5, 2458401.25, 2458405.0])
+    epochs  = (jd_tdb - 2451545.0) * wis.day_s
+    names   = ['MOON', 'SUN', 'EARTH']
+    vecs, ltts = targets.target_vectors(['F51', '-95', 'ZZZ'], names, jd_tdb, timeformat='jd_tdb', abcorr=abcorr)
+    assert vecs.shape == (3, 3, 3, 3) and ltts.shape == (3, 3, 3)
+    assert np.all(np.isnan(vecs[2])), 'Unknown obscodes should give NaN'
+
+    # Ground-based observers are not spice bodies: compare with a constant-position observer
+    obs_vec = wis.ground_obscode_dict['F51'] * wis.Rearth_km
+    for j, target in enumerate(names):
+        expected = np.array([ sp.spkcpo(target, et, 'J2000', 'OBSERVER', abcorr, obs_vec, 'EARTH', 'ITRF93')[0][:3] for et in epochs ])
+        assert np.allclose(vecs[0, j] * wis.au_km, expected, rtol=0, atol=1e-6)
+
+        expected, expected_ltts = sp.spkpos(target, epochs, 'J2000', abcorr, '-95')
+        assert np.allclose(vecs[1, j] * wis.au_km, expected, rtol=0, atol=1e-6)
+        assert np.allclose(ltts[1, j] * wis.day_s, expected_ltts, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('frame', ['ITRF93', 'IAU_EARTH', 'NOT-A-FRAME'])
+def test_target_vectors_B(frame):
+    """ Test that non-inertial (& unknown) frames are rejected """
+    with pytest.raises(AssertionError, match='not a known inertial frame'):
+        targets.target_vectors(['F51'], ['MOON'], np.array([2458400.5]), frame=frame, timeformat='jd_tdb')
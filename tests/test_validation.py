@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `wis` package."""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import pytest
+import os
+import sys
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+test_dir = os.path.dirname(os.path.realpath(__file__))
+wis_dir  = os.path.dirname(test_dir)
+code_dir = os.path.join(wis_dir, 'wis')
+sys.path.insert(0,code_dir)
+import validation
+
+reference_filepath = os.path.join(test_dir, 'data', 'reference_positions.json')
+
+# -----------------------------------------
+# Test Functions
+# -----------------------------------------
+
+@pytest.mark.parametrize('mode', ['spice', 'astropy'])
+def test_validation_A(mode):
+    """ Test the default modes against the (Horizons) reference positions, within each case's tolerance """
+    report = validation.validate(mode, filepath=reference_filepath)
+    validation.check(report)
+
+
+def test_validation_B():
+    """ Test that the harness measures the errors of an approximate mode & enforces limits on them """
+    cases = [ case for case in validation.load_cases(reference_filepath) if case['obscode'] in ['F51', '-95'] ]
+    for case in cases:
+        case['xyz_km'] = validation.spice_posns(case['obscode'], case['times'], center=case['center'], frame=case['frame'], timeformat=case['timeformat'])
+
+    # An "approximate" mode that is 1 km off in x
+    def approximate(*args, **kwargs):
+        return validation.spice_posns(*args, **kwargs) + np.array([1., 0., 0.])
+
+    report = validation.validate(approximate, cases=cases, repeat=1)
+    assert report['n'] == sum( len(case['times']) for case in cases ) and report['evals_per_s'] > 0
+    assert np.isclose(report['max_km'], 1.) and np.isclose(report['rms_km'], 1.)
+    assert np.isclose(report['max_mas'], np.max([ 1. / np.linalg.norm(case['xyz_km'], axis=1) for case in cases ]) * validation.MAS_PER_RADIAN)
+    validation.check(report, max_km=1.01)
+    with pytest.raises(AssertionError):
+        validation.check(report, max_km=0.99)
+    assert 'ALL (mode=approximate)' in validation.format_report(report)
+
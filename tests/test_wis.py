@@ -66,3 +66,31 @@ def test_excluded_via_wis():
     
     # Because we input obscode 247, we expect to get back a NoneType object
     assert isinstance(W, type(None) )
+
+
+def test_multiple_centers_via_wis():
+    """ Test that positions w.r.t. several centers in one pass match separate calls for each center """
+    time    = Time([2458337.829157830, 2458338.829157830], format='jd', scale='tdb')
+    centers = ['SUN', 'SSB', 'EARTH']
+    for obscode in ['F51', '-95']:
+        W = wis.wis(obscode, time, center=centers)
+        assert sorted(W.centers.keys()) == sorted(centers)
+        for center in centers:
+            S = wis.wis(obscode, time, center=center)
+            expected = S.hXYZ if isinstance(S, wis.Ground) else S.posns
+            assert np.allclose(W.centers[center], expected, rtol=0, atol=1e-6/wis.au_km), \
+                ' Not close enough to expected values: returned=[%r], expected=[%r]' % (W.centers[center] , expected)
+
+
+def test_multiple_frames_via_wis():
+    """ Test that positions in several inertial frames in one pass match separate calls for each frame """
+    time    = Time([2458337.829157830, 2458338.829157830], format='jd', scale='tdb')
+    frames  = ['J2000', 'ECLIPJ2000']
+    for obscode in ['F51', '-95']:
+        W = wis.wis(obscode, time, frame=frames)
+        assert sorted(W.frames.keys()) == sorted(frames)
+        for frame in frames:
+            S = wis.wis(obscode, time, frame=frame)
+            expected = S.hXYZ if isinstance(S, wis.Ground) else S.posns
+            assert np.allclose(W.frames[frame], expected, rtol=0, atol=1e-6/wis.au_km), \
+                ' Not close enough to expected values: returned=[%r], expected=[%r]' % (W.frames[frame] , expected)
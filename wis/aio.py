@@ -0,0 +1,231 @@
+"""
+    Asynchronous front-end to wis.py
+
+    Lets async applications (e.g. web-services) ask for observer positions
+    without blocking the event loop:
+
+        posns = await aio.posns(obscode, times)
+
+    CSPICE is not thread-safe, so *ALL* spice work (kernel loading & position
+    evaluation) is sent to a single executor-thread owned by a "Coalescer".
+
+    Requests that arrive within a short window of one another are
+    micro-batched: all of the times requested for the same obscode are
+    evaluated in a single vectorized call to wis() (see batch.evaluate()),
+    and the results are then split back to each caller.
+
+    N.B. Nothing else in the process should be calling spice from another
+    thread while a Coalescer is in use.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+import batch
+from wis import is_astropy_time
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+class Coalescer(object):
+    """
+        Object to coalesce concurrent position requests into batches
+        that are evaluated on a single, dedicated spice-thread.
+
+        Parameters
+        ----------
+        window : float
+            Time (in seconds) to wait for further requests to arrive before
+            evaluating the pending batch
+        max_batch : int
+            Number of pending times that triggers an immediate evaluation
+            (i.e. without waiting for the window to close)
+
+        Attributes
+        ----------
+        executor : concurrent.futures.ThreadPoolExecutor
+            single-thread executor that performs all spice work
+        n_requests : int
+            number of requests received
+        n_batches : int
+            number of batches evaluated
+    """
+
+    def __init__(self, window = 0.002, max_batch = 100000):
+        self.window, self.max_batch = window, max_batch
+        self.executor   = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wis-spice')
+        self.n_requests = 0
+        self.n_batches  = 0
+
+        # Pending requests are keyed on (center, frame, abcorr)
+        # Each value is a list of (obscode, times, future) tuples
+        self._pending   = {}
+        self._n_pending = 0
+        self._handle    = None
+        self._loop      = None
+
+    async def posns(self, obscode, times, center="SUN", frame = "J2000", abcorr = "NONE"):
+        """
+            Queue a request & wait for the observer positions
+
+            Parameters
+            ----------
+            obscode : MPC observation code
+                3 or 4 character string
+            times   : astropy Time object
+                http://docs.astropy.org/en/stable/time/
+            center  : coordinate center
+                ...
+            frame   : coordinate frame
+                ...
+            abcorr  :
+                ...
+
+            Returns
+            ----------
+            posns : positions of observer
+                Nx3 array of XYZ in [AU]
+                (None if wis() does not know how to handle the obscode)
+        """
+        assert is_astropy_time(times)
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        assert loop is self._loop, 'A Coalescer can only be used from a single event loop'
+
+        # Add request to the pending batch
+        # -----------------------------------------------
+        future = loop.create_future()
+        self._pending.setdefault((center, frame, abcorr), []).append((obscode, times, future))
+        self._n_pending += times.size
+        self.n_requests += 1
+
+        # Make sure that the batch will be evaluated
+        # -----------------------------------------------
+        if self._n_pending >= self.max_batch:
+            self._flush()
+        elif self._handle is None:
+            self._handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def close(self,):
+        """ Shut down the spice-thread """
+        self.executor.shutdown(wait=True)
+
+    def _flush(self,):
+        """ Send all pending requests to the spice-thread """
+        if self._handle is not None:
+            self._handle.cancel()
+        pending, self._pending, self._n_pending, self._handle = self._pending, {}, 0, None
+
+        for key, requests in pending.items():
+            self.n_batches += 1
+            evaluated = self._loop.run_in_executor(self.executor, self._evaluate, key, requests)
+            evaluated.add_done_callback( lambda evaluated, requests=requests: self._distribute(evaluated, requests) )
+
+    @staticmethod
+    def _evaluate(key, requests):
+        """
+            Evaluate a batch of requests (runs on the spice-thread)
+
+            The requests are evaluated together by batch.evaluate()
+            (so all times for the same obscode are evaluated in a single call to wis())
+
+            Returns
+            ----------
+            list of (result, exception) tuples, one per request
+        """
+        from astropy.time import Time
+
+        # Merge the requested times (keeping both parts of each julian date, so no precision is lost)
+        # -----------------------------------------------
+        center, frame, abcorr = key
+        utc      = [ times.utc for obscode, times, future in requests ]
+        sizes    = [ _.size for _ in utc ]
+        obscodes = np.repeat([ obscode for obscode, times, future in requests ], sizes)
+        times    = Time( np.concatenate([ np.atleast_1d(_.jd1) for _ in utc ]), np.concatenate([ np.atleast_1d(_.jd2) for _ in utc ]), format='jd', scale='utc')
+        posns, _, status = batch.evaluate(obscodes, times, center=center, frame=frame, abcorr=abcorr, timeformat=None)
+
+        # Split the results back to each request
+        # -----------------------------------------------
+        split = np.cumsum(sizes)[:-1]
+        return [ Coalescer._result(p, s) for p, s in zip(np.split(posns, split), np.split(status, split)) ]
+
+    @staticmethod
+    def _result(posns, status):
+        """
+            The (result, exception) of a single request, from its rows' positions & status codes (see batch.STATUS)
+            (the result is None if wis() does not know how to handle the obscode)
+        """
+        if np.all(status == batch.OK):
+            return (posns, None)
+        if np.all( (status == batch.UNKNOWN_OBSCODE) | (status == batch.EXCLUDED) ):
+            return (None, None)
+        failed = status[status != batch.OK]
+        return (None, RuntimeError('%d of %d times could not be evaluated (%s)' % (len(failed), len(status), ', '.join( batch.STATUS[_] for _ in np.unique(failed) ))))
+
+    @staticmethod
+    def _distribute(evaluated, requests):
+        """ Hand the results of an evaluated batch back to each caller """
+        try:
+            results = evaluated.result()
+        except Exception as e:
+            results = [(None, e)] * len(requests)
+        for (obscode, times, future), (posns, exception) in zip(requests, results):
+            if future.cancelled():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(posns)
+
+
+
+# Default Coalescer, created on first use
+# --------------------------------------------------------------------------
+_coalescer = None
+
+def get_coalescer():
+    """ Return the default Coalescer (creating it if necessary) """
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = Coalescer()
+    return _coalescer
+
+async def posns(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", coalescer=None):
+    """
+        Asynchronously evaluate the position of the observer at the supplied times
+
+        Uses the default Coalescer unless one is explicitly supplied
+
+        Parameters
+        ----------
+        obscode : MPC observation code
+            3 or 4 character string
+        times   : astropy Time object
+            http://docs.astropy.org/en/stable/time/
+        center  : coordinate center
+            ...
+        frame   : coordinate frame
+            ...
+        abcorr  :
+            ...
+        coalescer : Coalescer
+            optional
+
+        Returns
+        ----------
+        posns : positions of observer
+            Nx3 array of XYZ in [AU]
+    """
+    coalescer = get_coalescer() if coalescer is None else coalescer
+    return await coalescer.posns(obscode, times, center=center, frame=frame, abcorr=abcorr)
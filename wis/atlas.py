@@ -0,0 +1,274 @@
+"""
+    Station atlas: precomputed, memory-mapped positions of the ground-based observatories
+
+    The position of a ground-based observatory is that of the geocenter plus the
+    (earth-fixed) observatory vector rotated into the requested frame. Both of these
+    are smooth in time, & are shared by every observatory, so an atlas stores
+     - Chebyshev coefficients of the geocenter position (per interval, by default 1 day)
+     - Chebyshev coefficients of the ITRF93 -> frame rotation matrix (per interval, by default 2 hours)
+     - the earth-fixed vector of every observatory (with an index of their obscodes)
+    rather than a table per observatory: an atlas of all ~2,000 observatories in obscode.dat
+    costs ~4 MB per year. The coefficients are fitted to positions evaluated by Ground(),
+    so they use the same kernels (& coverage checks) as wis() itself.
+
+        import atlas
+        atlas.build('stations.atlas', 2458000.5, 2459000.5, timeformat='jd_tdb')    # (once)
+
+        A = atlas.Atlas('stations.atlas')
+        posns = A.posns(obscodes, jd_utc, timeformat='jd_utc')                      # Nx3 [AU]
+
+    Lookups are vectorized Chebyshev evaluations, without any spice calls (the
+    leapseconds needed to convert UTC are stored in the atlas). The atlas is a single
+    file (a json header/index, followed by the float64 blocks) which is memory-mapped
+    read-only, so every process using it shares the same pages.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import sys
+import json
+import struct
+import argparse
+import numpy as np
+from numpy.polynomial import chebyshev
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis                import Ground, body_fixed_rotations
+from kernel_spec_ground import ground_obscode_dict
+from constants          import Rearth_km, au_km, day_s
+from epochs             import to_et, epoch_window, leapseconds, TIMEFORMATS
+from session            import get_session
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+MAGIC   = b'WISATLAS'
+PREFIX  = struct.Struct('<8sQ')     # magic, length of the json header
+ALIGN   = 64                        # blocks start on 64-byte boundaries
+VERSION = 1
+
+
+def build(filepath, start, stop, timeformat='jd_tdb', obscodes=None, center="SUN", frame = "J2000",
+          interval=1.0, degree=8, rotation_interval=1/12., rotation_degree=10, session=None):
+    """
+        Build an atlas of observatory positions for the time-window [start, stop]
+
+        Parameters
+        ----------
+        filepath : str
+            file to write
+        start, stop : float
+            time-window (in timeformat)
+        timeformat : str
+            format of start & stop (see epochs.to_et())
+        obscodes : list of str, optional
+            ground-based obscodes to include (default: all of ground_obscode_dict)
+        center, frame : str
+            coordinate center & (inertial) frame of the positions
+        interval, degree : float, int
+            length [days] of the intervals for (& degree of) the geocenter Chebyshev fits
+        rotation_interval, rotation_degree : float, int
+            length [days] of the intervals for (& degree of) the rotation-matrix Chebyshev fits
+        session : session.Session, optional
+            kernel set to use (default: the module-level kernels)
+
+        Returns
+        ----------
+        Atlas (opened from the written file)
+    """
+    obscodes = sorted(ground_obscode_dict) if obscodes is None else list(obscodes)
+    assert obscodes and all( code in ground_obscode_dict for code in obscodes ), 'Atlas obscodes must be ground-based obscodes'
+    session = get_session(session).activate()
+    session.ground.load(window=epoch_window([start, stop], timeformat))
+    start, stop = to_et([start, stop], timeformat)
+    assert stop > start, 'Atlas window must have stop > start'
+
+    # Fit the geocenter position (evaluated by Ground) & the rotation matrices
+    # -----------------------------------------------
+    nodes = chebyshev_nodes(start, stop, interval * day_s, degree)
+    W = Ground(obscodes[0], nodes.ravel(), center=center, frame=frame, timeformat='et', keep_intermediates=True, session=session)
+    geocenter = fit( W.posns.reshape(nodes.shape + (3,)) )
+
+    nodes = chebyshev_nodes(start, stop, rotation_interval * day_s, rotation_degree)
+    rotation = fit( body_fixed_rotations(nodes.ravel(), frame=frame).reshape(nodes.shape + (9,)) )
+
+    # Observatory vectors [AU]
+    # -----------------------------------------------
+    stations = np.array([ ground_obscode_dict[code] for code in obscodes ]) * (Rearth_km / au_km)
+
+    header = {'version' : VERSION, 'obscodes' : obscodes, 'center' : center, 'frame' : frame,
+              'start' : start, 'stop' : stop, 'deltet' : leapseconds()}
+    write(filepath, header, {'geocenter' : geocenter, 'rotation' : rotation, 'stations' : stations})
+    return Atlas(filepath)
+
+
+def chebyshev_nodes(start, stop, interval, degree):
+    """
+        The epochs at which to sample a function to fit Chebyshev polynomials
+
+        The window is split into equal intervals (no longer than interval [s]),
+        each of which is sampled at the degree+1 Chebyshev nodes
+
+        Returns
+        ----------
+        nodes : (n_intervals, degree+1) array of ET
+    """
+    n     = int(np.ceil( (stop - start) / interval ))
+    width = (stop - start) / n
+    x     = np.cos( np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1) )
+    return start + width * (np.arange(n)[:, np.newaxis] + 0.5 + 0.5 * x[np.newaxis])
+
+
+def fit(values):
+    """
+        Chebyshev coefficients from values sampled at the nodes of each interval (see chebyshev_nodes())
+
+        Parameters
+        ----------
+        values : (n_intervals, degree+1, m) array
+
+        Returns
+        ----------
+        coeffs : (n_intervals, degree+1, m) array
+    """
+    N = values.shape[1]
+    T = chebyshev.chebvander( np.cos( np.pi * (np.arange(N) + 0.5) / N ), N - 1 )
+    coeffs = np.einsum('ikm,kj->ijm', values, T) * (2. / N)
+    coeffs[:, 0] /= 2.
+    return coeffs
+
+
+def evaluate(coeffs, start, stop, epochs):
+    """
+        Evaluate Chebyshev coefficients (see fit()) at epochs
+
+        Returns
+        ----------
+        values : (n_epochs, m) array
+    """
+    n, N  = coeffs.shape[:2]
+    width = (stop - start) / n
+    i = np.clip( np.floor( (epochs - start) / width ).astype(int), 0, n - 1 )
+    x = 2. * (epochs - start) / width - (2. * i + 1.)
+    return np.einsum('nj,njm->nm', chebyshev.chebvander(x, N - 1), coeffs[i])
+
+
+def write(filepath, header, blocks):
+    """ Write a json header (with the offset & shape of each block) followed by the (aligned) float64 blocks """
+    offset, header['blocks'] = 0, {}
+    for name, block in blocks.items():
+        header['blocks'][name] = {'offset' : offset, 'shape' : list(block.shape)}
+        offset += _aligned(block.nbytes)
+    text = json.dumps(header).encode('utf-8')
+    with open(filepath, 'wb') as f:
+        f.write( PREFIX.pack(MAGIC, len(text)) + text )
+        f.write( b'\0' * (_aligned(PREFIX.size + len(text)) - PREFIX.size - len(text)) )
+        for block in blocks.values():
+            f.write( np.ascontiguousarray(block, dtype='<f8').tobytes() )
+            f.write( b'\0' * (_aligned(block.nbytes) - block.nbytes) )
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+class Atlas(object):
+    """
+        Atlas-Object
+
+        A (read-only, memory-mapped) atlas of observatory positions, as written by build()
+
+        Parameters
+        ----------
+        filepath : str
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            magic, n = PREFIX.unpack( f.read(PREFIX.size) )
+            assert magic == MAGIC, '%r is not a wis atlas' % filepath
+            self.header = json.loads( f.read(n).decode('utf-8') )
+        assert self.header['version'] == VERSION, 'Atlas version [%r] is not supported' % self.header['version']
+
+        # One (shared, read-only) mapping of the data, of which each block is a view
+        # -----------------------------------------------
+        self.buffer = np.memmap(filepath, dtype=np.uint8, mode='r', offset=_aligned(PREFIX.size + n))
+        for name, block in self.header['blocks'].items():
+            shape = tuple(block['shape'])
+            setattr(self, name, self.buffer[block['offset'] : block['offset'] + 8 * int(np.prod(shape))].view('<f8').reshape(shape))
+        self.index = { code : i for i, code in enumerate(self.header['obscodes']) }
+        self.start, self.stop = self.header['start'], self.header['stop']
+        self.center, self.frame = self.header['center'], self.header['frame']
+
+    def posns(self, obscodes, times, timeformat='jd_utc'):
+        """
+            Positions of observatories at times
+
+            Parameters
+            ----------
+            obscodes : str or N array of str
+                obscodes in the atlas
+            times : N array of floats
+                numeric times (see epochs.to_et())
+            timeformat : str
+                format of the times
+
+            Returns
+            ----------
+            posns : Nx3 array of XYZ in [AU] (w.r.t. the atlas center, in the atlas frame)
+        """
+        assert timeformat in TIMEFORMATS, 'Supplied timeformat [%r] is not in known/allowed formats [%r]' % (timeformat, TIMEFORMATS)
+        epochs = to_et(times, timeformat, deltet=self.header['deltet'])
+        codes, inverse = np.unique( np.broadcast_to(np.atleast_1d(obscodes), epochs.shape), return_inverse=True )
+        unknown = [ code for code in codes if code not in self.index ]
+        assert not unknown, 'Supplied obscodes %r are not in the atlas' % unknown
+        stations = self.stations[ [ self.index[code] for code in codes ] ][ inverse.reshape(-1) ]
+        return self.geocenter_posns(epochs) + np.einsum('nij,nj->ni', self.rotations(epochs), stations)
+
+    def geocenter_posns(self, epochs):
+        """ Positions of the geocenter [AU] at epochs (ET) """
+        self._check_window(epochs)
+        return evaluate(self.geocenter, self.start, self.stop, epochs)
+
+    def rotations(self, epochs):
+        """ The ITRF93 -> frame rotation matrices (Nx3x3) at epochs (ET) """
+        self._check_window(epochs)
+        return evaluate(self.rotation, self.start, self.stop, epochs).reshape(-1, 3, 3)
+
+    def _check_window(self, epochs):
+        assert np.all( (epochs >= self.start) & (epochs <= self.stop) ), \
+            'Epochs must be within the atlas window [%r, %r]: e.g. %r' % (self.start, self.stop, epochs[(epochs < self.start) | (epochs > self.stop)][:5])
+
+    def __contains__(self, obscode):
+        return obscode in self.index
+
+    def __len__(self,):
+        return len(self.index)
+
+    def __repr__(self,):
+        return 'Atlas(%r, %d obscodes, ET %.1f to %.1f, center=%r, frame=%r)' % (self.filepath, len(self), self.start, self.stop, self.center, self.frame)
+
+
+
+def main(argv=None):
+    """ Build an atlas from the command line, e.g. python atlas.py stations.atlas 2458000.5 2459000.5 """
+    parser = argparse.ArgumentParser(prog='atlas', description='Build an atlas of ground-based observatory positions')
+    parser.add_argument('filepath', help='atlas file to write')
+    parser.add_argument('start', type=float, help='start of the time-window')
+    parser.add_argument('stop', type=float, help='end of the time-window')
+    parser.add_argument('--timeformat', choices=TIMEFORMATS, default='jd_tdb', help='format of start & stop')
+    parser.add_argument('--center', default='SUN', help='coordinate center')
+    parser.add_argument('--frame', default='J2000', help='coordinate frame')
+    args = parser.parse_args(argv)
+    print( build(args.filepath, args.start, args.stop, timeformat=args.timeformat, center=args.center, frame=args.frame), file=sys.stderr )
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+    Error-tolerant batch evaluation of observer positions
+
+    wis() evaluates all of the times for an obscode in one vectorized call,
+    so a single epoch outside kernel coverage makes spice raise for the whole
+    call (& unknown/excluded obscodes give None). For production batches,
+    evaluate() instead evaluates every row that it can, & returns NaN plus a
+    per-row status code for every row that it cannot:
+
+        posns, ltts, status = batch.evaluate(obscodes, jd_utc, timeformat='jd_utc')
+        posns[status == batch.OK]
+
+    Rows that would fail are identified up-front (unknown/excluded obscodes,
+    kernels that cannot be loaded, & epochs outside the coverage recorded in
+    the kernel index), so they are never sent to spice & nothing is retried.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis                    import wis, get_epochs
+from kernel_spec_ground     import ground_obscode_dict
+from session                import get_session
+from constants              import excluded_obscode_dict
+from epochs                 import epoch_window
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+# Per-row status codes
+# --------------------------------------------------------------------------
+OK              = 0     # evaluated
+UNCOVERED       = 1     # epoch outside the coverage of the obscode's kernels
+UNKNOWN_OBSCODE = 2     # obscode unknown by wis
+EXCLUDED        = 3     # obscode that wis specifically excludes (e.g. roving observer 247)
+KERNEL_MISSING  = 4     # kernels could not be loaded/downloaded (or do not contain the observer)
+FAILED          = 5     # evaluation raised an (unexpected) error
+
+STATUS = {OK : 'ok', UNCOVERED : 'uncovered epoch', UNKNOWN_OBSCODE : 'unknown obscode',
+          EXCLUDED : 'excluded obscode', KERNEL_MISSING : 'kernel missing', FAILED : 'failed'}
+
+
+def evaluate(obscodes, times, center="SUN", frame = "J2000", abcorr = "NONE", timeformat='jd_utc', session=None):
+    """
+        Evaluate observer positions for arrays of (obscode, time), tolerating failures
+
+        All (covered) times for the same obscode are evaluated in a single call to wis()
+
+        Parameters
+        ----------
+        obscodes : N array of str
+            MPC observation codes
+        times : N array of floats
+            numeric times (see epochs.to_et()), or an astropy Time object if timeformat is None
+        center, frame, abcorr :
+            see wis()
+        timeformat : str
+            format of numeric times
+        session : session.Session, optional
+            kernel set to use (default: the module-level kernels)
+
+        Returns
+        ----------
+        posns : Nx3 array of XYZ in [AU] (NaN unless status == OK)
+        ltts : N array of light-times in [days] (NaN unless status == OK)
+        status : N array of status codes (see STATUS)
+    """
+    obscodes = np.atleast_1d(obscodes)
+    times    = times if timeformat is None else np.atleast_1d( np.asarray(times, dtype=float) )
+    posns  = np.full((len(times), 3), np.nan)
+    ltts   = np.full(len(times), np.nan)
+    status = np.full(len(times), OK, dtype=np.uint8)
+
+    codes, inverse = np.unique(obscodes, return_inverse=True)
+    for i, code in enumerate(codes):
+        rows = np.flatnonzero(inverse == i)
+        code = str(code)
+
+        # Screen the rows: only those that can be evaluated are sent to spice
+        # -----------------------------------------------
+        status[rows] = screen(code, times[rows], timeformat, session=session)
+        rows = rows[ status[rows] == OK ]
+        if not len(rows):
+            continue
+
+        # Evaluate
+        # -----------------------------------------------
+        try:
+            W = wis(code, times[rows], center=center, frame=frame, abcorr=abcorr, timeformat=timeformat, session=session)
+            posns[rows] = W.hXYZ if hasattr(W, 'hXYZ') else W.posns
+            ltts[rows]  = W.ltts
+        except Exception:
+            status[rows] = FAILED
+    return posns, ltts, status
+
+
+def screen(obscode, times, timeformat='jd_utc', session=None):
+    """
+        Status of each time for an obscode, evaluated without calling spkpos
+
+        Loads the obscode's kernels (for the window spanning the times), then
+        flags the epochs that are outside the coverage recorded in the kernel index
+        (of the observer - or the earth & its orientation - for satellite / ground-based obscodes)
+
+        Returns
+        ----------
+        status : array of status codes (OK, UNCOVERED, UNKNOWN_OBSCODE, EXCLUDED or KERNEL_MISSING)
+    """
+    status    = np.full(len(times), OK, dtype=np.uint8)
+    specifier = get_session(session).specifier(obscode)
+    if specifier is not None:
+        required = [('399', 'SPK'), (3000, 'PCK')] if obscode in ground_obscode_dict else [(obscode, 'SPK')]
+    else:
+        status[:] = EXCLUDED if obscode in excluded_obscode_dict else UNKNOWN_OBSCODE
+        return status
+
+    # Kernels that cannot be loaded (or that do not contain the observer) fail every row
+    # (N.B. KernelSpecifier.download_data() reports an unsuccessful download with sys.exit())
+    # -----------------------------------------------
+    try:
+        specifier.load( window=epoch_window(times, timeformat) )
+        epochs = get_epochs(times, timeformat)
+        masks  = [ specifier.uncovered(epochs, idcode, kind=kind) for idcode, kind in required ]
+    except (Exception, SystemExit):
+        status[:] = KERNEL_MISSING
+        return status
+    if any( mask is None for mask in masks ):
+        status[:] = KERNEL_MISSING
+        return status
+
+    status[ np.any(masks, axis=0) ] = UNCOVERED
+    return status
@@ -0,0 +1,289 @@
+"""
+    Command-line interface to wis.py
+
+    Reads (obscode, time) rows, evaluates the observer position for each row,
+    and writes the positions & light-times, e.g.
+
+        wis observations.csv -o posns.csv --center SSB --units km
+        cat observations.csv | wis > posns.csv
+        wis observations.obs --format mpc --workers 4 -o posns.npy
+        wis --serve                 # keep kernels warm in a server (see server.py)
+
+    Input formats
+     - csv : lines of "obscode,time" (an optional header line is skipped)
+     - npy : structured array with fields 'obscode' & 'time'
+     - mpc : MPC 80-column observations (satellite & roving observations are
+             handled using their second lines, see obs80.py; times are UTC)
+
+    Output formats
+     - csv : "obscode,time,x,y,z,lt" lines (streamed as each chunk is evaluated)
+     - npy : structured array with the same fields
+
+    Rows are read & evaluated in chunks: within a chunk, all of the times for
+    an obscode are evaluated in a single call to wis() (see batch.py: rows that
+    cannot be evaluated, e.g. epochs outside kernel coverage, are output as NaN).
+    CSPICE is not thread-safe, so --workers > 1 evaluates chunks in separate
+    processes (each of which loads its own kernels).
+
+    Light-times are those returned by wis() (for mpc input, where satellite &
+    roving observers are not known to wis(), the geometric light-time |r|/c)
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import sys
+import io
+import argparse
+import itertools
+import contextlib
+import multiprocessing
+from timeit import default_timer as timer
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import batch
+from constants  import au_km, day_s
+from epochs     import TIMEFORMATS
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+FORMATS     = ['csv', 'npy', 'mpc']
+EXTENSIONS  = {'.csv' : 'csv', '.txt' : 'csv', '.npy' : 'npy', '.obs' : 'mpc', '.mpc' : 'mpc', '.80' : 'mpc'}
+UNITS       = {'au' : (1., 1.), 'km' : (au_km, day_s)}   # position & light-time multipliers (from AU & days)
+OUT_DTYPE   = [('obscode', 'U4'), ('time', 'f8'), ('x', 'f8'), ('y', 'f8'), ('z', 'f8'), ('lt', 'f8')]
+
+
+class InputError(ValueError):
+    """ Malformed input rows """
+
+
+def main(argv=None):
+    """
+        Run the command-line interface
+
+        Parameters
+        ----------
+        argv : list of str, optional
+            command-line arguments (default is sys.argv[1:])
+
+        Returns
+        ----------
+        exit status (0 on success)
+    """
+    args   = get_parser().parse_args(argv)
+    if args.serve:
+        from server import serve
+        return serve(args.socket)
+    fmt    = args.format or EXTENSIONS.get( os.path.splitext(args.input or '')[1], 'csv')
+    outfmt = args.output_format or ('npy' if os.path.splitext(args.output or '')[1] == '.npy' else 'csv')
+    if fmt == 'mpc' and args.input is None:
+        get_parser().error('mpc input must be read from a file')
+    options = {'center' : args.center, 'frame' : args.frame, 'abcorr' : args.abcorr, 'timeformat' : args.timeformat}
+
+    # Evaluate the chunks (in order), writing the results as they arrive
+    # (malformed input rows are reported as a usage error)
+    # -----------------------------------------------
+    start, n_rows, n_chunks = timer(), 0, 0
+    chunks = ( (fmt, chunk, options) for chunk in read_chunks(args.input, fmt, args.chunk) )
+    try:
+        with open_output(args.output, outfmt) as write:
+            with worker_pool(args.workers) as pool:
+                for chunk, posns, ltts in (pool.imap(evaluate_chunk, chunks) if pool is not None else map(evaluate_chunk, chunks)):
+                    write( format_rows(chunk, posns, ltts, args.units) )
+                    n_rows, n_chunks = n_rows + len(ltts), n_chunks + 1
+    except InputError as e:
+        get_parser().error(str(e))
+
+    # Report throughput
+    # -----------------------------------------------
+    if not args.quiet:
+        elapsed = timer() - start
+        print('wis: %d rows in %d chunks, %.3f s (%.0f rows/s, %d worker%s)' %
+              (n_rows, n_chunks, elapsed, n_rows / max(elapsed, 1e-9), args.workers, '' if args.workers == 1 else 's'), file=sys.stderr)
+    return 0
+
+
+def get_parser():
+    """ Define the command-line arguments """
+    parser = argparse.ArgumentParser(prog='wis', description='Evaluate observer positions for (obscode, time) rows')
+    parser.add_argument('input', nargs='?', default=None, help='input file (default: stdin)')
+    parser.add_argument('-o', '--output', default=None, help='output file (default: stdout)')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='input format (default: from the file extension, else csv)')
+    parser.add_argument('--output-format', choices=['csv', 'npy'], default=None, help='output format (default: from the file extension, else csv)')
+    parser.add_argument('--timeformat', choices=TIMEFORMATS, default='jd_utc', help='format of the input times (csv & npy input)')
+    parser.add_argument('--center', default='SUN', help='coordinate center')
+    parser.add_argument('--frame', default='J2000', help='coordinate frame')
+    parser.add_argument('--abcorr', default='NONE', help='aberration correction')
+    parser.add_argument('--units', choices=sorted(UNITS), default='au', help='au (positions in AU, light-times in days) or km (km & seconds)')
+    parser.add_argument('--chunk', type=int, default=100000, help='number of rows evaluated together')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report throughput')
+    parser.add_argument('--serve', action='store_true', help='run a server (with kernels kept loaded) on a Unix socket, instead of reading input')
+    parser.add_argument('--socket', default=None, help='path of the server socket (default: $WIS_SOCKET, else a per-user path in the temp directory)')
+    return parser
+
+
+# Input
+# ----------------------------------------------
+def read_chunks(filepath, fmt, chunksize):
+    """
+        Read rows in chunks
+
+        Yields
+        ----------
+        chunk : dict of arrays
+            'obscode' & 'time' (+ the other fields returned by obs80.read_obs80() for mpc input)
+    """
+    if fmt == 'csv':
+        f = sys.stdin if filepath is None else open(filepath, 'r')
+        try:
+            lines = ( line for line in f if line.strip() )
+            first = next(lines, None)
+            if first is not None and _is_header(first.split(',')):
+                first = None
+            lines = itertools.chain([] if first is None else [first], lines)
+            while True:
+                rows = [ line.split(',') for line in itertools.islice(lines, chunksize) ]
+                if not rows:
+                    break
+                missing = [ ','.join(row).strip() for row in rows if len(row) < 2 ]
+                if missing:
+                    raise InputError('csv input rows must be "obscode,time": %r has no time field' % missing[0])
+                yield {'obscode' : np.array([ row[0].strip() for row in rows ], dtype='U4'),
+                       'time'    : np.array([ row[1] for row in rows ], dtype=float)}
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    elif fmt == 'npy':
+        rows = np.load(filepath, mmap_mode='r') if filepath is not None else np.load( io.BytesIO(sys.stdin.buffer.read()) )
+        for i in range(0, len(rows), chunksize):
+            yield {'obscode' : np.asarray(rows['obscode'][i:i+chunksize], dtype='U4'),
+                   'time'    : np.asarray(rows['time'][i:i+chunksize], dtype=float)}
+
+    else:
+        from obs80 import read_obs80
+        obs = read_obs80(filepath)
+        for i in range(0, len(obs['obscode']), chunksize):
+            chunk = { key : value[i:i+chunksize] for key, value in obs.items() }
+            chunk['time'] = chunk['jd_utc']
+            yield chunk
+
+
+def _is_header(fields):
+    """ Whether the fields of the first csv line are a header (i.e. their time field is not a number) """
+    return len(fields) > 1 and not _is_number(fields[1])
+
+
+def _is_number(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+# Evaluation
+# ----------------------------------------------
+def evaluate_chunk(job):
+    """
+        Evaluate the observer positions for a chunk of rows
+        (runs in a worker process if --workers > 1)
+
+        Parameters
+        ----------
+        job : tuple
+            (fmt, chunk, options) : options are passed to wis() / obs80.observer_posns()
+
+        Returns
+        ----------
+        chunk, posns [AU], ltts [days]
+    """
+    fmt, chunk, options = job
+
+    # Anything printed by wis (or during downloads) must not end up in the output
+    with contextlib.redirect_stdout(sys.stderr):
+        if fmt == 'mpc':
+            from obs80 import observer_posns
+            import spiceypy as sp
+            posns = observer_posns(chunk, center=options['center'], frame=options['frame'], abcorr=options['abcorr'])
+            ltts  = np.linalg.norm(posns, axis=1) * au_km / sp.clight() / day_s
+        else:
+            posns, ltts = evaluate(chunk['obscode'], chunk['time'], **options)
+    return chunk, posns, ltts
+
+
+def evaluate(obscodes, times, center="SUN", frame = "J2000", abcorr = "NONE", timeformat='jd_utc'):
+    """
+        Evaluate observer positions for arrays of (obscode, time)
+
+        Rows are evaluated by batch.evaluate() (all covered times for the same obscode in a single call to wis()),
+        so rows that cannot be evaluated (unknown obscodes, uncovered epochs, missing kernels, ...) are NaN
+
+        Returns
+        ----------
+        posns : Nx3 array of XYZ in [AU]
+        ltts  : N array of light-times in [days]
+    """
+    posns, ltts, _ = batch.evaluate(obscodes, times, center=center, frame=frame, abcorr=abcorr, timeformat=timeformat)
+    return posns, ltts
+
+
+@contextlib.contextmanager
+def worker_pool(workers):
+    """ A pool of worker processes (None if workers == 1, so that chunks are evaluated in this process) """
+    if workers <= 1:
+        yield None
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            yield pool
+
+
+# Output
+# ----------------------------------------------
+def format_rows(chunk, posns, ltts, units='au'):
+    """ Combine a chunk of rows & their results into a structured array (in the requested units) """
+    scale_posns, scale_ltts = UNITS[units]
+    rows = np.empty(len(ltts), dtype=OUT_DTYPE)
+    rows['obscode'], rows['time'], rows['lt'] = chunk['obscode'], chunk['time'], ltts * scale_ltts
+    for i, coord in enumerate('xyz'):
+        rows[coord] = posns[:, i] * scale_posns
+    return rows
+
+
+@contextlib.contextmanager
+def open_output(filepath, fmt):
+    """
+        Open the output, yielding a function that writes each chunk of rows
+        (csv is written as it arrives, npy is written once all rows are available)
+    """
+    if fmt == 'csv':
+        f = sys.stdout if filepath is None else open(filepath, 'w')
+        try:
+            f.write(','.join(name for name, _ in OUT_DTYPE) + '\n')
+            yield lambda rows: np.savetxt(f, rows, fmt=['%s', '%.9f', '%.15e', '%.15e', '%.15e', '%.15e'], delimiter=',')
+        finally:
+            if f is not sys.stdout:
+                f.close()
+            else:
+                f.flush()
+    else:
+        chunks = []
+        yield chunks.append
+        rows = np.concatenate(chunks) if chunks else np.empty(0, dtype=OUT_DTYPE)
+        if filepath is None:
+            np.save(sys.stdout.buffer, rows)
+        else:
+            np.save(filepath, rows)
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
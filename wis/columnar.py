@@ -0,0 +1,206 @@
+"""
+    Columnar input/output of the observer positions evaluated by wis.py
+
+    The results held by a Ground/Satellite object are written as columns
+     - 'epoch' : ephemeris-time (ET, TDB seconds past J2000)
+     - 'posn'  : Nx3 XYZ position [AU]
+     - 'ltt'   : light-time [days]
+    together with metadata recording the obscode, center, frame, abcorr,
+    units & the kernel set (file-names & sha256 hashes) used to evaluate them.
+
+    Formats
+     - 'arrow'   : Arrow IPC file (*.arrow, *.feather)     [requires pyarrow]
+     - 'parquet' : Parquet file (*.parquet)                [requires pyarrow]
+     - 'npz'     : numpy .npz file (*.npz)
+     - 'npy'     : directory of one .npy file per column (+ metadata.json)
+
+    Columns are handed to Arrow without copying where possible (i.e. when
+    the positions were evaluated with layout='rows', the default), and
+    Arrow IPC / npy files are memory-mapped when read.
+
+    pyarrow is optional: it is only imported when an Arrow/Parquet file
+    is written or read.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import json
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis                    import Ground
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+FORMATS     = ['arrow', 'parquet', 'npz', 'npy']
+EXTENSIONS  = {'.arrow' : 'arrow', '.feather' : 'arrow', '.parquet' : 'parquet', '.npz' : 'npz'}
+UNITS       = {'epoch' : 'ET [s]', 'posn' : 'AU', 'ltt' : 'day'}
+METADATA_KEY= b'wis'
+
+
+def get_columns(W):
+    """
+        Get the columns of results held by a Ground/Satellite object
+
+        The position column is the Nx3 view of the positions held by the Result
+        (w.r.t. the first of the requested centers, in the first of the requested frames),
+        whatever the layout of the positions (or of a supplied out buffer), so is not copied
+        if the positions were evaluated with layout='rows'
+
+        Returns
+        ----------
+        columns : dict of arrays
+            'epoch', 'posn', 'ltt'
+    """
+    return {'epoch' : W.epochs, 'posn' : W.result.posns, 'ltt' : W.ltts}
+
+
+def get_metadata(W):
+    """
+        Get the metadata describing the results held by a Ground/Satellite object
+
+        The center & frame recorded are those of the position column (i.e. the
+        base center & frame, if several centers/frames were requested)
+
+        Returns
+        ----------
+        metadata : dict
+            'obscode', 'center', 'frame', 'abcorr', 'units', 'kernelset', 'kernels'
+    """
+    specifier = W.session.ground if isinstance(W, Ground) else W.session.satellites[W.obscode]
+    kernels   = [ {'file' : os.path.basename(f), 'sha256' : specifier.store.get(f)['sha256'] if specifier.store.has(f) else None}
+                  for f in specifier.expected_local_kernel_filepaths ]
+    return {'obscode'   : W.obscode,
+            'center'    : W.result.center,
+            'frame'     : W.result.frame,
+            'abcorr'    : W.abcorr,
+            'units'     : UNITS,
+            'kernelset' : specifier.name,
+            'kernels'   : kernels}
+
+
+def write(filepath, W, fmt=None):
+    """
+        Write the results held by a Ground/Satellite object to a columnar file
+
+        Parameters
+        ----------
+        filepath : str
+        W : Ground or Satellite object
+        fmt : str, optional
+            one of FORMATS (default is inferred from the extension of filepath: 'npy' if there is none)
+    """
+    write_columns(filepath, get_columns(W), get_metadata(W), fmt=fmt)
+
+
+def write_columns(filepath, columns, metadata, fmt=None):
+    """
+        Write columns (dict of 1-D or NxK arrays) & metadata (json-serializable dict) to a columnar file
+    """
+    fmt = get_format(filepath, fmt)
+    if fmt == 'arrow':
+        pa = _pyarrow()
+        table = to_arrow(columns, metadata)
+        with pa.OSFile(filepath, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    elif fmt == 'parquet':
+        _pyarrow()
+        import pyarrow.parquet as pq
+        pq.write_table(to_arrow(columns, metadata), filepath)
+    elif fmt == 'npz':
+        np.savez(filepath, __metadata__=np.array(json.dumps(metadata)), **columns)
+    else:
+        os.makedirs(filepath, exist_ok=True)
+        for name, column in columns.items():
+            np.save(os.path.join(filepath, name + '.npy'), column)
+        with open(os.path.join(filepath, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+
+def read(filepath, fmt=None):
+    """
+        Read a columnar file written by write() / write_columns()
+
+        Returns
+        ----------
+        columns : dict of arrays
+        metadata : dict
+    """
+    fmt = get_format(filepath, fmt)
+    if fmt == 'arrow':
+        pa = _pyarrow()
+        with pa.memory_map(filepath, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        return from_arrow(table)
+    elif fmt == 'parquet':
+        _pyarrow()
+        import pyarrow.parquet as pq
+        return from_arrow( pq.read_table(filepath) )
+    elif fmt == 'npz':
+        with np.load(filepath) as npz:
+            return { name : npz[name] for name in npz.files if name != '__metadata__' }, json.loads( str(npz['__metadata__']) )
+    else:
+        with open(os.path.join(filepath, 'metadata.json'), 'r') as f:
+            metadata = json.load(f)
+        names = sorted( f[:-4] for f in os.listdir(filepath) if f.endswith('.npy') )
+        return { name : np.load(os.path.join(filepath, name + '.npy'), mmap_mode='r') for name in names }, metadata
+
+
+def to_arrow(columns, metadata):
+    """
+        Convert columns & metadata to an Arrow table
+
+        1-D numeric columns are wrapped without copying, NxK columns become
+        fixed-size-list columns (without copying, if they are C-contiguous)
+        The metadata is stored (as json) in the schema metadata under b'wis'
+    """
+    pa = _pyarrow()
+    arrays = []
+    for column in columns.values():
+        column = np.asarray(column)
+        if column.ndim == 1:
+            arrays.append( pa.array(column) )
+        else:
+            flat = np.ascontiguousarray(column).reshape(-1)
+            arrays.append( pa.FixedSizeListArray.from_arrays(pa.array(flat), column.shape[1]) )
+    return pa.Table.from_arrays(arrays, names=list(columns), metadata={METADATA_KEY : json.dumps(metadata)})
+
+
+def from_arrow(table):
+    """
+        Convert an Arrow table (as made by to_arrow()) to columns & metadata
+        (numeric columns are not copied, if the table has a single chunk)
+    """
+    pa = _pyarrow()
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        column = column.combine_chunks()
+        if pa.types.is_fixed_size_list(column.type):
+            columns[name] = column.flatten().to_numpy(zero_copy_only=False).reshape(-1, column.type.list_size)
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False)
+    metadata = table.schema.metadata or {}
+    return columns, json.loads(metadata[METADATA_KEY]) if METADATA_KEY in metadata else {}
+
+
+def get_format(filepath, fmt=None):
+    """ Format of a file (inferred from its extension if not supplied) """
+    fmt = fmt or EXTENSIONS.get( os.path.splitext(filepath)[1], 'npy' )
+    assert fmt in FORMATS, 'Supplied format [%r] is not in known/allowed formats [%r]' % (fmt, FORMATS)
+    return fmt
+
+
+def _pyarrow():
+    """ Import pyarrow (only when needed, as it is optional & slow to import) """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('pyarrow is required for Arrow/Parquet files: use the npz or npy formats instead')
+    return pyarrow
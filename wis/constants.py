@@ -10,3 +10,4 @@ Rearth_km = 6378.1363
 au_km = 149597870.700 # This is now a definition
 Rearth_AU = Rearth_km/au_km
 day_s = 86400
+Fearth = 1/298.257223563 # WGS84 flattening
@@ -0,0 +1,203 @@
+"""
+    Functions used by WIS to convert numeric times to the
+    ephemeris-time (ET) epochs required by spiceypy
+
+    Callers that already have their times as plain float arrays
+    (e.g. TDB julian dates, or ET seconds) can use these to skip
+    the construction of astropy Time objects altogether.
+
+    UTC->ET conversion is vectorized by evaluating the same expression
+    used by spice's deltet(), using the leapseconds-kernel variables
+    in the kernel pool (so a leapseconds-kernel must have been loaded).
+    https://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/deltet_c.html
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from constants import day_s
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+J2000_JD   = 2451545.0
+MJD_OFFSET = 2400000.5
+
+# The numeric time formats that can be supplied instead of astropy Time objects
+# --------------------------------------------------------------------------
+TIMEFORMATS = ['et', 'jd_tdb', 'jd_utc', 'mjd_utc']
+
+
+def to_et(times, timeformat, deltet=None):
+    """
+        Convert numeric times to ephemeris-time (ET)
+
+        Parameters
+        ----------
+        times : array of floats
+        timeformat : str
+            One of
+             - 'et'      : ephemeris-time (TDB seconds past J2000)
+             - 'jd_tdb'  : julian date (TDB)
+             - 'jd_utc'  : julian date (UTC)
+             - 'mjd_utc' : modified julian date (UTC)
+        deltet : dict, optional
+            leapseconds-kernel variables for UTC formats (see leapseconds())
+
+        Returns
+        ----------
+        epochs : array of epochs
+            ephemeris-time (ET), as would be returned by the spiceypy utc2et() function
+    """
+    assert timeformat in TIMEFORMATS, 'Supplied timeformat [%r] is not in known/allowed formats [%r]' % (timeformat, TIMEFORMATS)
+    times = np.atleast_1d( np.asarray(times, dtype=float) )
+
+    if timeformat == 'et':
+        return times
+    elif timeformat == 'jd_tdb':
+        return (times - J2000_JD) * day_s
+    elif timeformat == 'jd_utc':
+        return utc_to_et( (times - J2000_JD) * day_s , deltet)
+    else:
+        return utc_to_et( (times - (J2000_JD - MJD_OFFSET)) * day_s , deltet)
+
+
+def leapseconds():
+    """
+        The leapseconds-kernel variables (from the kernel pool) used by utc_to_et()
+
+        Returns
+        ----------
+        deltet : dict
+            'DELTA_T_A', 'K', 'EB', 'M' & 'DELTA_AT' (plain floats/lists, so they can be stored as json)
+    """
+    return { name : [ float(_) for _ in sp.gdpool('DELTET/' + name, 0, 1000) ] for name in ['DELTA_T_A', 'K', 'EB', 'M', 'DELTA_AT'] }
+
+
+def utc_to_et(utc, deltet=None):
+    """
+        Vectorized conversion of UTC to ET
+
+        Parameters
+        ----------
+        utc : array of floats
+            UTC seconds past J2000 (i.e. 86400*(jd_utc - 2451545.0))
+        deltet : dict, optional
+            leapseconds-kernel variables (default: read from the kernel pool, see leapseconds())
+
+        Returns
+        ----------
+        epochs : array of epochs
+            ephemeris-time (ET)
+    """
+    utc = np.asarray(utc, dtype=float)
+
+    # Leapseconds-kernel variables
+    # -----------------------------------------------
+    deltet      = leapseconds() if deltet is None else deltet
+    delta_t_a   = deltet['DELTA_T_A'][0]
+    k           = deltet['K'][0]
+    eb          = deltet['EB'][0]
+    m0, m1      = deltet['M'][:2]
+    delta_at    = np.asarray( deltet['DELTA_AT'] ).reshape(-1, 2)
+
+    # TAI-UTC: look up the number of leapseconds in effect at each epoch
+    # (as in deltet(), epochs before the first entry use the first value minus one)
+    # -----------------------------------------------
+    i   = np.searchsorted(delta_at[:,1], utc, side='right') - 1
+    tt  = utc + np.where(i < 0, delta_at[0, 0] - 1, delta_at[np.maximum(i, 0), 0]) + delta_t_a
+
+    # ET-TT: periodic term
+    # -----------------------------------------------
+    m   = m0 + m1 * tt
+    return tt + k * np.sin( m + eb * np.sin(m) )
+
+
+def epoch_window(times, timeformat=None, margin=120.):
+    """
+        Get an approximate (padded) ET time-window spanning the supplied times
+        
+        Used to select which kernels need to be loaded, so is evaluated without
+        needing any kernels (differences between time-scales are < margin)
+
+        Parameters
+        ----------
+        times : astropy Time object, or array of floats (if timeformat is supplied)
+        timeformat : str, optional
+            format of numeric times (see to_et())
+        margin : float
+            padding (in seconds) added at each end of the window
+
+        Returns
+        ----------
+        (et_start, et_end)
+    """
+    if timeformat is None:
+        jd = np.asarray(times.jd)
+    elif timeformat == 'et':
+        jd = np.asarray(times, dtype=float) / day_s + J2000_JD
+    elif timeformat == 'mjd_utc':
+        jd = np.asarray(times, dtype=float) + MJD_OFFSET
+    else:
+        jd = np.asarray(times, dtype=float)
+    return (np.min(jd) - J2000_JD) * day_s - margin, (np.max(jd) - J2000_JD) * day_s + margin
+
+
+def deduplicate(times, timeformat=None, tolerance=None):
+    """
+        Sort & deduplicate times, so that only unique epochs need to be evaluated
+        (in time order, which also improves the locality of kernel-segment lookups)
+
+        Parameters
+        ----------
+        times : astropy Time object, or array of floats (if timeformat is supplied)
+        timeformat : str, optional
+            format of numeric times (see to_et())
+        tolerance : float, optional
+            if supplied, times within the same tolerance-sized bin [seconds] are
+            treated as the same time (the first of them is evaluated)
+            if not supplied, only identical times are merged
+
+        Returns
+        ----------
+        unique : sorted unique times (of the same type as times)
+        inverse : integer array such that unique[inverse] gives the (possibly rounded) times
+            (None if times were already sorted & unique, so that nothing needs to be scattered)
+        stats : dict
+            'n', 'n_unique', 'dedup_ratio' (= n / n_unique)
+    """
+    # Keys on which to sort/merge
+    # (Time objects are keyed on (jd1, jd2), so that no precision is lost)
+    # -----------------------------------------------
+    if timeformat is None:
+        utc = times.utc
+        jd1, jd2 = np.atleast_1d(utc.jd1), np.atleast_1d(utc.jd2)
+        if tolerance is None:
+            keys = np.stack([jd1, jd2], axis=1)
+        else:
+            keys = np.round( ((jd1 - J2000_JD) * day_s + jd2 * day_s) / tolerance )
+    else:
+        times  = np.atleast_1d( np.asarray(times, dtype=float) )
+        keys   = times if tolerance is None else np.round( times * (1. if timeformat == 'et' else day_s) / tolerance )
+
+    # Sort & merge
+    # -----------------------------------------------
+    _, index, inverse = np.unique(keys, return_index=True, return_inverse=True, axis=0 if keys.ndim == 2 else None)
+    inverse = inverse.reshape(-1)
+    n, n_unique = len(inverse), len(index)
+    stats = {'n' : n, 'n_unique' : n_unique, 'dedup_ratio' : n / n_unique if n_unique else 1.}
+    if n == n_unique and np.all(index == np.arange(n)):
+        return times, None, stats
+    return times[index], inverse, stats
+
+
+def scatter(values, inverse):
+    """ Scatter values evaluated at unique times back to all times (see deduplicate()) """
+    return values if inverse is None else values[inverse]
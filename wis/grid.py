@@ -0,0 +1,130 @@
+"""
+    Observer positions on an evenly spaced grid of times
+
+    Tables at a regular cadence (e.g. every 10 minutes for a year) do not need a
+    Time object per epoch: the epochs are generated arithmetically in ET from
+    (start, stop, step), & evaluated & written to file one chunk at a time:
+
+        import grid
+        table = grid.grid('F51', 2458000.5, 2458365.5, 600., timeformat='jd_tdb', filepath='F51.npy')
+        table['et'], table['x'], table['lt']            # (a memory-map of the written .npy file)
+
+    For ground-based observatories, evaluating the earth's orientation costs one spice
+    call per epoch. On a grid that is denser than a Chebyshev fit needs, positions &
+    light-times are instead evaluated (by wis()) only at the Chebyshev nodes of short
+    intervals (see atlas.chebyshev_nodes()), & interpolated onto the grid.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis                import wis
+from kernel_spec_ground import ground_obscode_dict
+from epochs             import to_et, epoch_window
+from atlas              import chebyshev_nodes, fit, evaluate
+from session            import get_session
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+GRID_DTYPE = [('et', 'f8'), ('x', 'f8'), ('y', 'f8'), ('z', 'f8'), ('lt', 'f8')]
+INTERVAL_S = 7200.      # length of the intervals of the Chebyshev fits [s]
+DEGREE     = 10         # degree of the Chebyshev fits
+
+
+def grid(obscode, start, stop, step, timeformat='jd_tdb', center="SUN", frame = "J2000", abcorr = "NONE",
+         filepath=None, chunk=100000, interpolate=None, session=None):
+    """
+        Evaluate observer positions at evenly spaced epochs
+
+        Parameters
+        ----------
+        obscode : str
+            MPC observation code (ground-based or satellite)
+        start, stop : float
+            first & last times of the grid (in timeformat): the last epoch is the last
+            grid point that is not after stop
+        step : float
+            spacing of the grid [s of ET]
+            (N.B. the grid is evenly spaced in TDB, so not in UTC across a leap-second)
+        timeformat : str
+            format of start & stop (see epochs.to_et())
+        center, frame, abcorr : str
+            see wis() (single center & frame only)
+        filepath : str, optional
+            .npy file to which the table is written (chunk by chunk) & then memory-mapped
+        chunk : int
+            number of epochs evaluated (& written) together
+        interpolate : bool, optional
+            interpolate Chebyshev fits onto the grid (default: for ground-based obscodes,
+            if the grid is denser than the Chebyshev nodes)
+        session : session.Session, optional
+            kernel set to use (default: the module-level kernels)
+
+        Returns
+        ----------
+        table : structured array (a memory-map if filepath is supplied)
+            fields 'et', 'x', 'y', 'z' [AU] & 'lt' [days] (see GRID_DTYPE)
+    """
+    assert isinstance(center, str) and isinstance(frame, str), 'grid() evaluates a single center & frame'
+    assert step > 0 and chunk > 0, 'step & chunk must be positive'
+    if interpolate is None:
+        interpolate = obscode in ground_obscode_dict and step < INTERVAL_S / (DEGREE + 1)
+
+    # The (ET) grid: only its start & size are stored, each chunk's epochs are generated arithmetically
+    # (leapseconds are needed to convert UTC times, so kernels covering the grid are loaded first)
+    # -----------------------------------------------
+    specifier = get_session(session).activate().specifier(obscode)
+    assert specifier is not None, 'Supplied obscode [%r] is not known' % obscode
+    specifier.load(window=epoch_window([start, stop], timeformat))
+    start, stop = to_et([start, stop], timeformat)
+    n = int(np.floor( (stop - start) / step * (1. + 1e-12) )) + 1
+    assert n > 0, 'Grid must have stop >= start'
+
+    if filepath is None:
+        table = np.empty(n, dtype=GRID_DTYPE)
+    else:
+        table = np.lib.format.open_memmap(filepath, mode='w+', dtype=GRID_DTYPE, shape=(n,))
+
+    # Evaluate & write each chunk
+    # -----------------------------------------------
+    for i in range(0, n, chunk):
+        epochs = start + step * np.arange(i, min(i + chunk, n))
+        if interpolate and len(epochs) > DEGREE + 1:
+            posns, ltts = interpolated(obscode, epochs, center=center, frame=frame, abcorr=abcorr, session=session)
+        else:
+            posns, ltts = evaluated(obscode, epochs, center=center, frame=frame, abcorr=abcorr, session=session)
+        rows = table[i:i + len(epochs)]
+        rows['et'], rows['lt'] = epochs, ltts
+        for j, field in enumerate('xyz'):
+            rows[field] = posns[:, j]
+
+    if filepath is not None:
+        table.flush()
+    return table
+
+
+def evaluated(obscode, epochs, center="SUN", frame = "J2000", abcorr = "NONE", session=None):
+    """ Positions [AU] & light-times [days] evaluated by wis() at every epoch """
+    W = wis(obscode, epochs, center=center, frame=frame, abcorr=abcorr, timeformat='et', session=session)
+    return (W.hXYZ if hasattr(W, 'hXYZ') else W.posns), W.ltts
+
+
+def interpolated(obscode, epochs, center="SUN", frame = "J2000", abcorr = "NONE", session=None):
+    """
+        Positions [AU] & light-times [days] interpolated onto (sorted) epochs
+
+        Positions & light-times are evaluated by wis() at the Chebyshev nodes of
+        intervals (of at most INTERVAL_S) spanning the epochs, then fitted (see atlas.fit())
+    """
+    nodes  = chebyshev_nodes(epochs[0], epochs[-1], INTERVAL_S, DEGREE)
+    posns, ltts = evaluated(obscode, nodes.ravel(), center=center, frame=frame, abcorr=abcorr, session=session)
+    coeffs = fit( np.column_stack([posns, ltts]).reshape(nodes.shape + (4,)) )
+    values = evaluate(coeffs, epochs[0], epochs[-1], epochs)
+    return values[:, :3], values[:, 3]
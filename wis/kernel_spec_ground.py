@@ -3,6 +3,7 @@
 # -----------------------------------------
 import os, sys
 import numpy as np
+from collections.abc import Mapping
 
 # -----------------------------------------
 # Local imports
@@ -56,7 +57,37 @@ def get_XYZ_for_all_obscodes( filepath = os.path.join(os.path.dirname(__file__),
 
 
 
-ground_obscode_dict = get_XYZ_for_all_obscodes(GROUND_ONLY = True)
+class ObscodeDict(Mapping):
+    """
+        Read-only dictionary of obscode -> XYZ (as returned by get_XYZ_for_all_obscodes())
+        
+        The obscode file is only read when the dictionary is first used,
+        so that importing wis does not pay for parsing it
+    """
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._dict   = None
+
+    @property
+    def data(self,):
+        if self._dict is None:
+            self._dict = get_XYZ_for_all_obscodes(**self._kwargs)
+        return self._dict
+
+    def __getitem__(self, code):
+        return self.data[code]
+
+    def __iter__(self,):
+        return iter(self.data)
+
+    def __len__(self,):
+        return len(self.data)
+
+    def __contains__(self, code):
+        return code in self.data
+
+
+ground_obscode_dict = ObscodeDict(GROUND_ONLY = True)
 
 
 # Set-up a single downloader to cope with all ground-based obscodes
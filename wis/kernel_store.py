@@ -0,0 +1,448 @@
+"""
+    Functions and Objects used by WIS to keep track of the
+    kernel files that have been downloaded to the local machine
+
+    Kernels are stored by content-hash (so identical files, e.g. the
+    copy of de430 distributed with TESS's kernels, are only stored once)
+    and every kernel is recorded in a single (json) manifest:
+
+        "-95/TESS_EPH_DEF_2018.bsp" : {
+            'url'      : where the file was downloaded from (if known)
+            'path'     : where the content is stored ("shared/<sha256>.bsp")
+            'size'     : size of the file in bytes
+            'sha256'   : hash of the content
+            'mtime'    : when the file was downloaded/added
+            'kind'     : 'SPK', 'PCK', 'KPL/LSK', ...
+            'coverage' : {id : [[start_et, end_et], ...]} for SPK/PCK files
+        }
+
+    Checks of whether a kernel exists (and of how old it is) are then
+    dictionary lookups, rather than directory listings & stat calls.
+
+    The listings of wildcard urls (e.g. the TESS_EPH_DEF* files on STScI)
+    are recorded in a second (json) file, so that they need not be fetched
+    by every process, & so that a re-listing can be diffed against the last one:
+
+        "https://archive.stsci.edu/missions/tess/models/TESS_EPH_DEF*" : {
+            'files'    : matching urls
+            'mtime'    : when the url was listed
+        }
+
+    For clusters, the store can be configured (see from_environment()) with
+     - read-only shared stores (e.g. on NFS, populated once by an admin)
+       which are checked before the per-user writable store
+     - mirror base-urls (including file://) which replace the upstream hosts
+       (naif.jpl.nasa.gov, archive.stsci.edu) when downloading
+        WIS_KERNEL_DIR          : writable store (default "~/.wispykernels")
+        WIS_SHARED_KERNEL_DIRS  : read-only stores (separated by os.pathsep)
+        WIS_KERNEL_MIRRORS      : mirror base-urls (separated by whitespace/commas)
+"""
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import warnings
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import spiceypy as sp
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+# None
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+class KernelStore(object):
+    """
+        KernelStore-Object
+
+        Records the kernel files that are available locally in a manifest,
+        & stores their content in a content-addressed "shared" directory
+        (the expected filepath of each kernel is a link into that directory)
+
+        Parameters
+        ----------
+        root : str, optional
+            directory in which kernels are stored
+            (default is "~/.wispykernels", see define_root())
+        shared_roots : list of str, optional
+            roots of read-only stores, checked before this store
+        mirrors : list of str, optional
+            base-urls that replace the upstream hosts when downloading, e.g.
+            "file:///nfs/kernel-mirror" : "https://naif.jpl.nasa.gov/pub/naif/..." -> "/nfs/kernel-mirror/pub/naif/..."
+            (mirrors are tried in order: upstream hosts are only used if no mirrors are defined)
+        readonly : bool
+            whether the store can be written to
+    """
+
+    def __init__(self, root=None, shared_roots=(), mirrors=(), readonly=False):
+        self._root      = root
+        self._dirs      = set()
+        self._manifest  = None
+        self._changed   = set()
+        self._listings  = None
+        self.readonly   = readonly
+        self.mirrors    = list(mirrors)
+        self.shared     = [ KernelStore(root=shared_root, readonly=True) for shared_root in shared_roots ]
+
+    @classmethod
+    def from_environment(cls,):
+        """ Configure a store using the WIS_KERNEL_DIR, WIS_SHARED_KERNEL_DIRS & WIS_KERNEL_MIRRORS environment variables """
+        return cls( root         = os.environ.get('WIS_KERNEL_DIR') or None,
+                    shared_roots = [ _ for _ in os.environ.get('WIS_SHARED_KERNEL_DIRS', '').split(os.pathsep) if _ ],
+                    mirrors      = [ _ for _ in re.split(r'[\s,]+', os.environ.get('WIS_KERNEL_MIRRORS', '')) if _ ] )
+
+    # Directories
+    # ----------------------------------------------
+    @property
+    def root(self,):
+        """ The (top-level) directory in which kernels are stored (created on first use) """
+        if self._root is None:
+            self._root = define_root()
+        elif not self.readonly and self._root not in self._dirs:
+            self._root = define_root(self._root)
+            self._dirs.add(self._root)
+        return self._root
+
+    def directory(self, subdir=None):
+        """
+            Returns the path to a directory in the store, creating it if it does not exist
+            (directories are only checked/created once per process)
+        """
+        directory = self.root if subdir is None else os.path.join(self.root, subdir)
+        if directory not in self._dirs and not self.readonly:
+            os.makedirs(directory, exist_ok=True)
+            self._dirs.add(directory)
+        return directory
+
+    @property
+    def shared_dir(self,):
+        """ The directory in which kernel content is stored by hash """
+        return self.directory('shared')
+
+    # Manifest
+    # ----------------------------------------------
+    @property
+    def manifest_filepath(self,):
+        return os.path.join(self.root, 'manifest.json')
+
+    @property
+    def manifest(self,):
+        """ The manifest (read from disk on first use) """
+        if self._manifest is None:
+            self._manifest = self._read_manifest()
+        return self._manifest
+
+    def _read_manifest(self,):
+        return _read_json(self.manifest_filepath)
+
+    def save(self,):
+        """
+            Write the manifest to disk
+
+            Entries changed by this process are merged into the manifest currently
+            on disk (so that other processes' additions are not lost), & the file
+            is replaced atomically
+        """
+        if not self._changed:
+            return
+        assert not self.readonly, 'Cannot write to the read-only store %r' % self.root
+        manifest = self._read_manifest()
+        for key in self._changed:
+            if key in self._manifest:
+                manifest[key] = self._manifest[key]
+            else:
+                manifest.pop(key, None)
+        _write_json(self.manifest_filepath, manifest)
+        self._manifest, self._changed = manifest, set()
+
+    # Listings of wildcard urls
+    # ----------------------------------------------
+    @property
+    def listings_filepath(self,):
+        return os.path.join(self.root, 'listings.json')
+
+    @property
+    def listings(self,):
+        """ The recorded listings (read from disk on first use) """
+        if self._listings is None:
+            self._listings = _read_json(self.listings_filepath)
+        return self._listings
+
+    def listing(self, key):
+        """
+            The most recently recorded listing of a wildcard url (searching the read-only shared stores too)
+
+            Returns
+            -------
+            {'files' : list of urls, 'mtime' : when they were listed} : None if the url has not been listed
+        """
+        found = None
+        for store in self.shared + [self]:
+            entry = store.listings.get(key)
+            if entry is not None and (found is None or entry['mtime'] > found['mtime']):
+                found = entry
+        return found
+
+    def record_listing(self, key, files):
+        """
+            Record the listing of a wildcard url
+            (merged into the listings currently on disk, & replaced atomically;
+             a read-only store only records the listing in memory)
+        """
+        entry = {'files' : list(files), 'mtime' : time.time()}
+        self.listings[key] = entry
+        if not self.readonly:
+            listings = _read_json(self.listings_filepath)
+            listings[key] = entry
+            _write_json(self.listings_filepath, listings)
+        return entry
+
+    def key(self, filepath):
+        """ Manifest key of a kernel: its expected filepath, relative to the root """
+        return os.path.relpath(filepath, self.root)
+
+    # Lookups
+    # ----------------------------------------------
+    def locate(self, filepath):
+        """
+            Find the store that holds a kernel (searching the read-only shared stores first)
+            If several stores hold the kernel, the most recently added copy is used
+            
+            Returns
+            -------
+            (store, entry) : (None, None) if the kernel is not in any store
+        """
+        key, found = self.key(filepath), (None, None)
+        for store in self.shared + [self]:
+            entry = store.manifest.get(key)
+            if entry is not None and (found[1] is None or entry['mtime'] > found[1]['mtime']):
+                found = (store, entry)
+        return found
+
+    def get(self, filepath):
+        """ Returns the manifest entry for a kernel (None if it is not in the store) """
+        return self.locate(filepath)[1]
+
+    def has(self, filepath):
+        """ Whether a kernel is in the store """
+        return self.get(filepath) is not None
+
+    def resolve(self, filepath):
+        """ Returns the path at which the content of a kernel is stored """
+        store, entry = self.locate(filepath)
+        if entry is None:
+            raise KeyError('%r is not in the kernel store' % filepath)
+        return os.path.join(store.root, entry['path'])
+
+    def age_in_days(self, filepath):
+        """ Time since the kernel was downloaded/added to the store (None if it is not in the store) """
+        entry = self.get(filepath)
+        return None if entry is None else (time.time() - entry['mtime'])/(3600.*24.)
+
+    # Downloading kernels
+    # ----------------------------------------------
+    def sources(self, url):
+        """ The urls from which a file should be fetched (the mirrors, if any are defined, otherwise the url itself) """
+        return [ mirror.rstrip('/') + urlparse(url).path for mirror in self.mirrors ] or [url]
+
+    def fetch(self, url, directory):
+        """
+            Fetch a file into a directory (from the first of its sources that works)
+            file:// sources are copied, all others are downloaded with wget
+        """
+        for i, source in enumerate(self.sources(url)):
+            try:
+                if source.startswith('file://'):
+                    shutil.copyfile( url2pathname(urlparse(source).path), os.path.join(directory, url.split("/")[-1]) )
+                else:
+                    import wget
+                    wget.download(source, out=directory)
+                return
+            except Exception:
+                if i == len(self.mirrors) - 1 or not self.mirrors:
+                    raise
+
+    # Adding / removing kernels
+    # ----------------------------------------------
+    def add(self, filepath, url=None, save=True):
+        """
+            Add a (downloaded) kernel file to the store
+
+            The file is moved into the shared directory (as <sha256>.<extension>)
+            & replaced by a link, then its coverage is recorded in the manifest
+            (coverage is copied from any existing entry with the same content)
+
+            Parameters
+            ----------
+            filepath : str
+                the expected filepath of the kernel
+            url : str, optional
+                where the kernel was downloaded from
+            save : bool
+                write the manifest to disk
+        """
+        assert not self.readonly, 'Cannot add kernels to the read-only store %r' % self.root
+        stat   = os.stat(filepath)
+        sha256 = file_sha256(filepath)
+        stored = os.path.join(self.shared_dir, sha256 + os.path.splitext(filepath)[1])
+
+        # Move content into the shared directory & link back from the expected location
+        # (if the filesystem does not support symlinks, fall back to a copy-free hardlink)
+        if not os.path.islink(filepath):
+            if os.path.isfile(stored):
+                os.remove(filepath)
+            else:
+                os.replace(filepath, stored)
+            try:
+                os.symlink(stored, filepath)
+            except OSError:
+                os.link(stored, filepath)
+
+        # Coverage only needs to be evaluated once for any given content
+        same = [ entry for entry in self.manifest.values() if entry['sha256'] == sha256 ]
+        entry = {'url' : url, 'path' : os.path.relpath(stored, self.root), 'size' : stat.st_size, 'sha256' : sha256, 'mtime' : stat.st_mtime}
+        entry.update( {'kind' : same[0]['kind'], 'coverage' : same[0]['coverage']} if same else get_kernel_coverage(stored) )
+        if url is None and self.key(filepath) in self.manifest:
+            entry['url'] = self.manifest[self.key(filepath)]['url']
+
+        key = self.key(filepath)
+        self.manifest[key] = entry
+        self._changed.add(key)
+        if save:
+            self.save()
+        return entry
+
+    def remove(self, filepath, save=True, collect=True):
+        """
+            Remove a kernel from the (writable) store
+
+            The stored content is also deleted, unless another kernel still references it
+            (so that e.g. re-downloading a time-critical kernel every day does not leave
+            every previous version behind in the shared directory), or collect=False
+            (e.g. while the content is still furnished: see collect())
+        """
+        assert not self.readonly, 'Cannot remove kernels from the read-only store %r' % self.root
+        key = self.key(filepath)
+        if os.path.islink(filepath) or os.path.isfile(filepath):
+            os.remove(filepath)
+        entry = self.manifest.pop(key, None)
+        if entry is not None:
+            self._changed.add(key)
+            if collect:
+                self.collect(entry['path'])
+        if save:
+            self.save()
+
+    def collect(self, path):
+        """
+            Delete stored content (at path, relative to the root) if no manifest entry references it
+
+            Entries are checked both in memory & in the manifest on disk
+            (except for those changed by this process), so that content still
+            used by kernels that other processes have added is kept
+        """
+        on_disk    = self._read_manifest()
+        referenced = [ entry['path'] for entry in self.manifest.values() ] + \
+                     [ entry['path'] for key, entry in on_disk.items() if key not in self._changed ]
+        stored     = os.path.join(self.root, path)
+        if path not in referenced and os.path.isfile(stored):
+            os.remove(stored)
+
+
+
+def _read_json(filepath):
+    """ Read a json file ({} if it does not exist) """
+    if not os.path.isfile(filepath):
+        return {}
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(filepath, data):
+    """ Write a json file, replacing any existing file atomically """
+    tmp_filepath = '%s.%d' % (filepath, os.getpid())
+    with open(tmp_filepath, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_filepath, filepath)
+
+
+def define_root(download_dir=None):
+    """
+        Returns the default path to the directory where files will be saved
+        or loaded.
+
+        By default, this method will return "~/.wispykernels" and create
+        this directory if it does not exist.
+
+        If the directory cannot be accessed or created, then it returns the local directory (".").
+
+        N.B. Code "borrowed" from eleanor/targetData.py
+
+        Returns
+        -------
+        download_dir : str
+            Path to location of `download_dir` where kernels will be downloaded
+    """
+    download_dir = download_dir or os.path.join(os.path.expanduser('~'), '.wispykernels')
+    if not os.path.isdir(download_dir):
+        # if it doesn't exist, make a new cache directory
+        try:
+            os.mkdir(download_dir)
+        # downloads locally if OS error occurs
+        except OSError:
+            download_dir = '.'
+            warnings.warn('Warning: unable to create {}. '
+                          'Downloading TPFs to the current '
+                          'working directory instead.'.format(download_dir))
+
+    return os.path.realpath(download_dir)
+
+
+def get_kernel_coverage(filepath):
+    """
+        Get the coverage of an individual kernel file
+
+        Returns
+        -------
+        dict
+            'kind'     : 'SPK' or 'PCK' for binary SPK/PCK files, otherwise architecture/type (e.g. 'KPL/LSK')
+            'coverage' : {id : [[start_et, end_et], ...]} for binary SPK/PCK files (empty otherwise)
+    """
+    (arch, kind), coverage = sp.getfat(filepath), {}
+    if arch != 'DAF':
+        kind = '%s/%s' % (arch, kind)
+    if kind == 'SPK':
+        for body in sp.spkobj(filepath):
+            cover = sp.spkcov(filepath, body)
+            coverage[str(body)] = [ list(sp.wnfetd(cover, i)) for i in range(sp.wncard(cover)) ]
+    elif kind == 'PCK':
+        frames = sp.cell_int(1000)
+        sp.pckfrm(filepath, frames)
+        for frame in frames:
+            cover = sp.pckcov(filepath, frame)
+            coverage[str(frame)] = [ list(sp.wnfetd(cover, i)) for i in range(sp.wncard(cover)) ]
+    return {'kind' : kind, 'coverage' : coverage}
+
+
+def file_sha256(filepath, blocksize = 2**20):
+    """ Returns the (hex) sha256 hash of the contents of a file """
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+
+# Define the (default) store through which KernelSpecifiers resolve their files
+# --------------------------------------------------------------------------
+STORE = KernelStore.from_environment()
@@ -7,26 +7,36 @@
 # -----------------------------------------
 # Third-party imports
 # -----------------------------------------
-from bs4 import BeautifulSoup
-import requests
-import glob
-import wget
 import numpy as np
 import os
 import sys
-import spiceypy as sp
-import warnings
 import time
+import spiceypy as sp
+import weakref
+from collections import OrderedDict
+from spiceypy.utils.exceptions import SpiceyError
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 # -----------------------------------------
 # Local imports
 # -----------------------------------------
-# None
+from kernel_store import STORE, get_kernel_coverage, file_sha256   # noqa: F401 (get_kernel_coverage & file_sha256 are re-exported from kernel_store)
 
 # -----------------------------------------
 # WIS functions & classes
 # -----------------------------------------
 
+# Binary kernel types for which coverage is indexed
+# (all other kernels, e.g. LSK, SCLK, text-PCK, CK, are always loaded)
+# --------------------------------------------------------------------------
+INDEXED_KINDS = ['SPK', 'PCK']
+
+# Recorded listings of wildcard urls younger than this [days] are reused, rather than re-listing the url
+# (use KernelSpecifier.sync() to pick up newly published files straight away)
+# --------------------------------------------------------------------------
+LISTING_MAX_AGE = 1.0
+
 class KernelSpecifier(object):
     """
         KernelSpecifier-Object
@@ -40,7 +50,7 @@ class KernelSpecifier(object):
         
     """
     
-    def __init__(self, obscode = None, name = None, files = [] , wildcards = [] , timecritical = [] ):
+    def __init__(self, obscode = None, name = None, files = [] , wildcards = [] , timecritical = [] , store = None , pool = None ):
         
         # Check inputs are as desired
         assert obscode is not None and name is not None and files
@@ -48,13 +58,31 @@ class KernelSpecifier(object):
         # Instantiate class variables from inputs
         self.obscode , self.name, self.files, self.wildcards, self.timecritical = \
             obscode, name, files, wildcards, timecritical
+        
+        # Files are resolved through a KernelStore (by default, the one configured from the environment)
+        self.store = STORE if store is None else store
+        
+        # Kernels are furnished via a KernelPool (by default, the single POOL: a session.Session has its own)
+        self.pool  = POOL if pool is None else pool
             
-        # Define a list of expected local filepaths
-        self.expected_local_kernel_filepaths = self.get_expected_local_kernel_filepaths()
+        # The list of expected local filepaths is only defined when first needed
+        # (listing wildcard urls requires network access)
+        self._expected_local_kernel_filepaths = None
+        
+        # Coverage index (read/built on demand) & the time-windows for which kernels have been loaded
+        self._coverage_index = None
+        self.loaded_windows  = []
         
 
     # Data directories / filepaths
     # ----------------------------------------------
+    @property
+    def expected_local_kernel_filepaths(self,):
+        """ List of expected local filepaths (defined on first use) """
+        if self._expected_local_kernel_filepaths is None:
+            self._expected_local_kernel_filepaths = self.get_expected_local_kernel_filepaths()
+        return self._expected_local_kernel_filepaths
+
     def get_expected_local_kernel_filepaths(self, ):
         destinationDirectory = self.define_download_subdir()
 
@@ -63,7 +91,7 @@ class KernelSpecifier(object):
 
         # if there are any wildcards, get those names too
         for url,wildcard in self.wildcards.items():
-            for f in self._listFD(url, wildcard = wildcard):
+            for f in self.list_wildcard(url, wildcard):
                 expected_filepaths.append( os.path.join( destinationDirectory, f.split('/')[-1] ) )
         
         # return
@@ -73,42 +101,21 @@ class KernelSpecifier(object):
     def define_download_dir(self):
         """
         Returns the default path to the directory where files will be saved
-        or loaded.
-
-        By default, this method will return "~/.wispykernels" and create
-        this directory if it does not exist.
-        
-        If the directory cannot be accessed or created, then it returns the local directory (".").
-        
-        N.B. Code "borrowed" from eleanor/targetData.py
+        or loaded (the root of the KernelStore, by default "~/.wispykernels")
 
         Returns
         -------
         download_dir : str
             Path to location of `download_dir` where kernels will be downloaded
         """
-        download_dir = os.path.join(os.path.expanduser('~'), '.wispykernels')
-        if os.path.isdir(download_dir):
-            return download_dir
-        else:
-            # if it doesn't exist, make a new cache directory
-            try:
-                os.mkdir(download_dir)
-            # downloads locally if OS error occurs
-            except OSError:
-                download_dir = '.'
-                warnings.warn('Warning: unable to create {}. '
-                              'Downloading TPFs to the current '
-                              'working directory instead.'.format(download_dir))
-
-        return download_dir
+        return self.store.directory()
 
     def define_download_subdir(self, ):
         """
             Returns the default path to the subdirectory where files will be saved
             or loaded for a specific satellite obscode
             
-            Uses define_download_dir() to get its parent directly
+            The sub-directory is only checked/created once (by the KernelStore)
             
             Returns
             -------
@@ -119,62 +126,135 @@ class KernelSpecifier(object):
         
         # Manage sub-directory for obscode downloads
         # Ground-based stuff stored at the top-level, satellites get their own sub-dir
-        if self.name == 'GROUND':
-            download_subdir = self.define_download_dir()
-        else:
-            download_subdir = os.path.join( self.define_download_dir(), self.obscode)
-
-        # define a sub-dir path for this obscode
-        if not os.path.isdir( download_subdir ):
-            os.mkdir( download_subdir )
-            
-        return download_subdir
+        return self.store.directory( None if self.name == 'GROUND' else self.obscode )
 
 
     # Download methods
     # ----------------------------------------------
-    def download_data(self,):
+    def download_data(self, force=False):
+        """
+            Download the kernel files that are not yet in the KernelStore
+            (or all of them, if force=True)
+        """
         
         # Download explicitly named files
         for f in self.files:
+            if not force and self.store.has( self.local_filepath(f) ):
+                continue
             print('downloading ...',f)
             try:
-                wget.download(f, out=self.define_download_subdir() )
+                self._download(f)
             except:
                 print("Failed to download %r" % f)
                     
         # Download files using wildcards
         for url,wildcard in self.wildcards.items():
-            for f in self._listFD(url, wildcard = wildcard):
-                wget.download(f, out=self.define_download_subdir() )
+            for f in self.list_wildcard(url, wildcard):
+                if force or not self.store.has( self.local_filepath(f) ):
+                    self._download(f)
+        self.store.save()
     
         # Check whether the download worked
         if self.kernels_have_been_downloaded():
+            self._coverage_index = None
             return True
         else:
             sys.exit('download unsuccessful ... ')
             
-
-    def kernels_have_been_downloaded(self,):
-        """ Check whether all expected kernel files have been downloaded """
-        
-        # Check what files exist locally
-        # -----------------------------------------------
-        downloadedKernelFiles = [ f for f in glob.glob("%s/*" % self.define_download_subdir() ) if os.path.isfile(f) ]
+    def sync(self, furnish=True):
+        """
+            Delta-synchronize the wildcard urls (e.g. newly published TESS_EPH_DEF* files)
+            
+            Each wildcard url is re-listed & diffed against its previously recorded listing:
+            only files that are new (or not yet in the KernelStore) are downloaded, & they are
+            added to the expected kernels. If this specifier's kernels are loaded, the additions
+            are furnished into the running process (via KernelPool.furnish(), which re-furnishes
+            the loaded set in the expected order, so kernel priority is preserved).
+            
+            Returns
+            -------
+            added : list of the expected local filepaths of the added kernels
+        """
+        added = []
+        for url,wildcard in self.wildcards.items():
+            previous = self.store.listing( listing_key(url, wildcard) )
+            previous = [] if previous is None else previous['files']
+            for f in self.list_wildcard(url, wildcard, refresh=True):
+                local_filepath = self.local_filepath(f)
+                if f in previous and self.store.has(local_filepath):
+                    continue
+                if not self.store.has(local_filepath):
+                    self._download(f)
+                added.append(local_filepath)
+        self.store.save()
         
-        # Compare against the files that *should* exist
-        # returns True if all expected files have been downloaded
+        # Add to the expected kernels (if they have already been defined) & furnish the additions
+        # (in their expected position: KernelPool.furnish() re-furnishes only from the first addition onward)
         # -----------------------------------------------
-        return np.all( [ f in downloadedKernelFiles for f in self.expected_local_kernel_filepaths ] )
+        if self._expected_local_kernel_filepaths is not None:
+            self._expected_local_kernel_filepaths += [ f for f in added if f not in self._expected_local_kernel_filepaths ]
+        if added:
+            self._coverage_index = None
+            if furnish and self.name in self.pool:
+                self.pool.furnish( self, [ self.store.resolve(f) for f in added ] )
+        return added
+
+    def local_filepath(self, url):
+        """ The expected local filepath of the kernel downloaded from url """
+        return os.path.join( self.define_download_subdir() , url.split("/")[-1] )
+
+    def _download(self, url):
+        """
+            Download a single file & add it to the KernelStore
+            (any previous copy is removed first, so that the file is saved under its expected name)
+            
+            If the previous copy is furnished, the new copy takes its place in every KernelPool
+            before the previous content is deleted (spice cannot unload a file that no longer exists)
+        """
+        local_filepath = self.local_filepath(url)
+        stale = self.store.resolve(local_filepath) if self.store.has(local_filepath) else None
+        self.store.remove(local_filepath, save=False, collect=False)
+        self.store.fetch(url, self.define_download_subdir() )
+        self.store.add(local_filepath, url=url, save=False)
+        if stale is not None:
+            for pool in list(POOLS):
+                pool.replace( stale, self.store.resolve(local_filepath) )
+            self.store.collect( os.path.relpath(stale, self.store.root) )
+
+    def kernels_have_been_downloaded(self,):
+        """
+            Check whether all expected kernel files have been downloaded
+            (i.e. are recorded in the KernelStore's manifest)
+        """
+        return all( self.store.has(f) for f in self.expected_local_kernel_filepaths )
             
 
 
+    def list_wildcard(self, url, wildcard, refresh=False):
+        """
+            List the (upstream) urls of the files matching a wildcard
+            
+            The listing recorded in the KernelStore is reused if it is younger than
+            LISTING_MAX_AGE days (unless refresh=True), otherwise the url is re-listed
+            (& the new listing recorded)
+        """
+        key      = listing_key(url, wildcard)
+        recorded = self.store.listing(key)
+        if not refresh and recorded is not None and (time.time() - recorded['mtime'])/(3600.*24.) < LISTING_MAX_AGE:
+            return recorded['files']
+        return self.store.record_listing(key, self._listFD(url, wildcard = wildcard))['files']
+
     def _listFD(self , url, wildcard=''):
         '''
             List all the files in a url
             Allows a wildcard of the form stem*end
             Stolen from
             https://stackoverflow.com/questions/11023530/python-to-list-http-files-and-directories
+            
+            The url is listed via the store's first mirror (if any): file:// mirrors are listed directly
+            The returned urls are always those of the upstream host
+            
+            N.B. requests & bs4 are only imported when a listing is actually needed
         '''
         
         # Split wildcard (if it contains "*")
@@ -187,56 +267,411 @@ class KernelSpecifier(object):
         else:
             sys.exit('Cannot parse wildcards with >=2 asterisks in them ... [%r]' % wildcard)
 
-        # Get page ...
-        page = requests.get(url).text
+        # Get names ...
+        source = self.store.sources(url)[0]
+        if source.startswith('file://'):
+            hrefs = os.listdir( url2pathname(urlparse(source).path) )
+        else:
+            import requests
+            from bs4 import BeautifulSoup
+            
+            # Get page ...
+            page = requests.get(source).text
 
-        # Parse page
-        soup = BeautifulSoup(page, 'html.parser')
+            # Parse page
+            soup = BeautifulSoup(page, 'html.parser')
+            hrefs = [ node.get('href') for node in soup.find_all('a') ]
         
         # Return matching filenames
-        return [url + '/' + node.get('href') for node in soup.find_all('a') if \
-            isinstance(node.get('href'), str ) and \
-            node.get('href').startswith(wildcardStart) and \
-            node.get('href').endswith(wildcardEnd) ]
+        return [url + '/' + href for href in hrefs if \
+            isinstance(href, str ) and \
+            href.startswith(wildcardStart) and \
+            href.endswith(wildcardEnd) ]
 
 
 
     def force_timecritical_download(self,):
         """ we may want to ensure we have "fresh" copies of some files """
         for f in self.timecritical:
-            filename       = f.split("/")[-1]
-            local_filepath = os.path.join( self.define_download_subdir() , filename)
-            age_in_days    =  (time.time() - os.path.getmtime(local_filepath))/(3600.*24.)
-            if age_in_days > 1.0 :
+            age_in_days = self.store.age_in_days( os.path.join( self.define_download_subdir() , f.split("/")[-1] ) )
+            if age_in_days is not None and age_in_days > 1.0 :
                 try:
-                    os.rename(local_filepath , local_filepath+"old")
-                    wget.download(f, out=self.define_download_subdir() )
+                    self._download(f)
+                    self.store.save()
+                    self._coverage_index = None
                 except:
                     print("Failed to download %r" % f)
          
 
 
+    # Files in the KernelStore
+    # ----------------------------------------------
+    def store_kernels(self,):
+        """
+            Add any expected kernels that exist locally but are not yet in the KernelStore
+            (e.g. files downloaded by previous versions of wis)
+            
+            Files that are already in the store are only looked up, so this is cheap to repeat
+        """
+        missing = [ f for f in self.expected_local_kernel_filepaths if not self.store.has(f) and os.path.isfile(f) ]
+        for kernel_filepath in missing:
+            self.store.add(kernel_filepath, save=False)
+        if missing:
+            self.store.save()
+            self._coverage_index = None
+
+    def resolve_kernels(self,):
+        """
+            Paths at which the content of the expected kernels is stored
+            (a file shared between specifiers, e.g. de430, has a single path)
+        """
+        return [ self.store.resolve(f) for f in self.expected_local_kernel_filepaths ]
+
+    # Coverage index
+    # ----------------------------------------------
+    def build_coverage_index(self,):
+        """
+            Build an index of the SPK/PCK coverage of every expected kernel file
+            
+            Coverage is recorded per body (SPK) / frame-class-id (PCK), using spkcov/pckcov,
+            when a file is added to the KernelStore, so the index is assembled from the manifest
+            
+            Returns
+            -------
+            index : dict
+                filename -> manifest entry {'url', 'path', 'size', 'sha256', 'mtime', 'kind', 'coverage' : {id : [[start_et, end_et], ...]} }
+        """
+        self.store_kernels()
+        self._coverage_index = { os.path.basename(f) : self.store.get(f) for f in self.expected_local_kernel_filepaths }
+        return self._coverage_index
+
+    def get_coverage_index(self,):
+        """ Get the coverage index (building it if it does not yet exist / is incomplete) """
+        if self._coverage_index is None or len(self._coverage_index) != len(self.expected_local_kernel_filepaths):
+            self.build_coverage_index()
+        return self._coverage_index
+
+    def select_kernels(self, window=None):
+        """
+            Select the kernel files needed for the time-window (et_start, et_end)
+            
+            SPK/PCK files are only selected if their coverage overlaps the window
+            All other kernels are always selected
+            The order of the selected files is the same as the expected order (i.e. kernel priority is preserved)
+            
+            Files are resolved through the KernelStore, so a file shared between specifiers has a single path
+        """
+        stored = self.resolve_kernels()
+        if window is None:
+            return stored
+        
+        index  = self.get_coverage_index()
+        start, end = window
+        return [ stored_filepath for kernel_filepath, stored_filepath in zip(self.expected_local_kernel_filepaths, stored) if \
+            index[os.path.basename(kernel_filepath)]['kind'] not in INDEXED_KINDS or \
+            np.any( [ s <= end and e >= start for intervals in index[os.path.basename(kernel_filepath)]['coverage'].values() for s,e in intervals ] ) ]
+
+    def uncovered(self, epochs, idcode, kind='SPK'):
+        """
+            Identify the epochs that are *not* covered by the kernels for a given body / frame-class
+            
+            Parameters
+            ----------
+            epochs : array of epochs
+                as returned by the spiceypy utc2et() function
+            idcode : int or str
+                body-code (for kind='SPK') or frame-class-id (for kind='PCK')
+            kind : str
+                'SPK' or 'PCK'
+            
+            Returns
+            -------
+            uncovered : boolean array
+                True for epochs outside coverage
+                (None if idcode is not in any of the kernels of this type)
+        """
+        intervals = [ interval for entry in self.get_coverage_index().values() if entry['kind'] == kind \
+                        for interval in entry['coverage'].get( str(int(idcode)) , [] ) ]
+        if not intervals:
+            return None
+        return uncovered_mask(epochs, intervals)
+
+    def check_coverage(self, epochs, bodies=(), frames=()):
+        """
+            Assert that all epochs are covered for the supplied bodies (SPK) & frame-class-ids (PCK)
+            Allows uncovered epochs to be reported up-front, rather than waiting for a spice error
+            
+            N.B. Bodies/frames that are not in any of this specifier's kernels are not checked
+        """
+        for idcode, kind in [(_, 'SPK') for _ in bodies] + [(_, 'PCK') for _ in frames]:
+            mask = self.uncovered(epochs, idcode, kind=kind)
+            assert mask is None or not np.any(mask), \
+                '%d epochs are outside the %s coverage of %r for %s: e.g. %r' % (np.sum(mask), kind, idcode, self.name, np.asarray(epochs)[mask][:5])
+
     # Load method(s)
     # ----------------------------------------------
-    def load(self,):
-        """ load the kernels into memory """
+    def load(self, window=None):
+        """
+            load the kernels into memory
+            
+            If a time-window (et_start, et_end) is supplied, SPK/PCK kernels are only
+            loaded if their coverage overlaps the window (see select_kernels())
+        """
 
         # Ensure time-critical files are up-to-date
         # -----------------------------------------------
         self.force_timecritical_download()
 
         # Try to open the local kernel files
+        # NB: Files are furnished via the (bounded) kernel-pool
+        # NB: Any previously downloaded files not yet in the KernelStore are added to it first
         # -----------------------------------------------
         try:
-            sp.furnsh( self.expected_local_kernel_filepaths )
+            self.store_kernels()
+            self.pool.furnish( self, self.select_kernels(window) )
 
-        # If the local files don't exist
+        # If the local files don't exist (are not in the store / cannot be read by spice)
         #  - Download from the interwebs
         #  - Attempt to load again
         # -----------------------------------------------
-        except:
+        except (KeyError, OSError, SpiceyError):
             self.download_data()
-            sp.furnsh(self.expected_local_kernel_filepaths)
+            self.pool.furnish( self, self.select_kernels(window) )
+
+        self.loaded_windows.append( (-np.inf, np.inf) if window is None else tuple(window) )
+
+    def ensure_loaded(self, epochs):
+        """
+            Load the kernels needed for the epochs (if they are not already covered by a previous load)
+            Otherwise just make sure that this specifier's kernels have the highest priority in the pool
+        """
+        start, end = np.min(epochs), np.max(epochs)
+        if not np.any( [ s <= start and end <= e for s,e in self.loaded_windows ] ):
+            self.load( window=(start, end) )
+        else:
+            self.pool.furnish( self, [] )
+
+
+
+class KernelPool(object):
+    """
+        KernelPool-Object
+        
+        Manages the set of kernels that are furnished into spice, so that a
+        long-running process does not accumulate every specifier's kernels forever.
+        
+        Kernels are tracked as one set per KernelSpecifier. When the pool exceeds its cap
+        (number of files and/or bytes), the least-recently-used sets are unloaded
+        (files shared with sets that remain loaded are kept).
+        
+        Spice gives priority to the most recently loaded kernels, so whenever a set
+        is used after another set has been furnished, its files are re-furnished to put
+        it back on top (e.g. so that CASSINI's naif0009.tls does not silently replace
+        the naif0012.tls used for ground-based calculations).
+        
+        Spice has a single kernel pool per process, but several KernelPools can exist
+        (e.g. one per session.Session): only the *active* pool has its files furnished.
+        A pool is activated whenever it furnishes anything; if another pool was active,
+        that pool's files are unloaded & this pool's files are re-furnished (see activate()).
+        
+        Parameters
+        ----------
+        max_files : int, optional
+            maximum number of (distinct) kernel files to keep loaded
+        max_bytes : int, optional
+            maximum total size of (distinct) kernel files to keep loaded
+    """
+    
+    def __init__(self, max_files=None, max_bytes=None):
+        self.max_files, self.max_bytes = max_files, max_bytes
+        
+        # name -> (specifier, list of filepaths), in least- to most-recently-used order
+        self._sets  = OrderedDict()
+        # filepath -> size in bytes (for the distinct files that are loaded)
+        self._sizes = {}
+        # name of the set that was most recently furnished (i.e. that has the highest priority)
+        self._top   = None
+        POOLS.add(self)
+    
+    def furnish(self, specifier, filepaths):
+        """
+            Furnish kernel files for a specifier, giving them the highest priority
+            
+            The specifier's set of loaded files is extended by the supplied filepaths
+            Its files are only (re-)furnished if required (new files / loss of priority)
+            
+            New files are placed in the specifier's expected order, so that files selected by
+            a later (windowed) load do not take priority over files that come after them in
+            the specification: only the files from the first addition onward are (re-)furnished
+            (i.e. additions that come last in the specification are simply furnished)
+        """
+        self.activate()
+        name = specifier.name
+        _, loaded = self._sets.get(name, (specifier, []))
+        new = [ f for f in filepaths if f not in loaded ]
+        if new:
+            order  = { f : i for i, f in enumerate(specifier.resolve_kernels()) }
+            loaded = sorted(loaded + new, key=lambda f: order.get(f, len(order)))
+        
+        # Re-furnishing a file moves it to the top of spice's priority list
+        # (files already loaded, by this or any other set, are unloaded first
+        #  so that spice does not hold duplicate entries for them)
+        if self._top != name:
+            furnish = loaded
+        else:
+            furnish = loaded[ min( loaded.index(f) for f in new ) : ] if new else []
+        already = [ f for f in furnish if f in self._sizes ]
+        if already:
+            sp.unload( already )
+        if furnish:
+            sp.furnsh( furnish )
+        
+        for f in new:
+            self._sizes.setdefault( f, os.path.getsize(f) )
+        self._sets.pop(name, None)
+        self._sets[name] = (specifier, loaded)
+        self._top = name
+        self.enforce()
+    
+    def replace(self, old, new):
+        """
+            Swap a superseded file (e.g. a time-critical kernel that has been re-downloaded) for its replacement
+            
+            The replacement takes the superseded file's place in every set (& in spice's priority order):
+            only the files from that place onward are re-furnished. The superseded file is unloaded,
+            so its content can then be deleted
+        """
+        files = self.files()
+        if old == new or old not in files:
+            return
+        i = files.index(old)
+        for _, filepaths in self._sets.values():
+            filepaths[:] = list(dict.fromkeys( new if f == old else f for f in filepaths ))
+        self._sizes.pop(old)
+        self._sizes.setdefault( new, os.path.getsize(new) )
+        if self.active:
+            sp.unload( files[i:] )
+            sp.furnsh( self.files()[i:] )
+    
+    def unload(self, name):
+        """ Unload the set of kernels for the named specifier (keeping any files used by other sets) """
+        specifier, filepaths = self._sets.pop(name)
+        in_use = set( f for _, files in self._sets.values() for f in files )
+        for f in filepaths:
+            if f not in in_use:
+                if self.active:
+                    sp.unload(f)
+                self._sizes.pop(f, None)
+        specifier.loaded_windows = []
+        if self._top == name:
+            self._top = None
+    
+    def clear(self,):
+        """ Unload everything in the pool """
+        for name in list(self._sets):
+            self.unload(name)
+    
+    def enforce(self,):
+        """ Unload least-recently-used sets until the pool is within its cap (the most recent set is always kept) """
+        while len(self._sets) > 1 and \
+            ( (self.max_files is not None and self.n_files > self.max_files) or \
+              (self.max_bytes is not None and self.n_bytes > self.max_bytes) ):
+            self.unload( next(iter(self._sets)) )
+    
+    def activate(self,):
+        """
+            Make this the pool whose kernels are furnished into spice
+            
+            Nothing is done if this pool is already active. Otherwise the active pool's files are
+            unloaded, & this pool's files are re-furnished in their previous priority order
+            (so the loaded windows of its specifiers remain valid, & nothing is re-downloaded)
+        """
+        global ACTIVE_POOL
+        if ACTIVE_POOL is self:
+            return
+        if ACTIVE_POOL is not None and ACTIVE_POOL.n_files:
+            sp.unload( list(ACTIVE_POOL._sizes) )
+            ACTIVE_POOL._top = None
+        ACTIVE_POOL = self
+        
+        files = self.files()
+        if files:
+            sp.furnsh( files )
+        self._top = next(reversed(self._sets)) if self._sets else None
+    
+    def files(self,):
+        """
+            The distinct files of the pool, in the order in which they are furnished (lowest priority first)
+            (files shared by several sets take the priority of the most recently used set)
+        """
+        files = [ f for _, filepaths in self._sets.values() for f in filepaths ]
+        return list(dict.fromkeys(files[::-1]))[::-1]
+    
+    @property
+    def active(self,):
+        """ Whether this pool's files are the ones furnished into spice """
+        return ACTIVE_POOL is self
+    
+    @property
+    def n_files(self,):
+        """ Number of distinct kernel files loaded """
+        return len(self._sizes)
+    
+    @property
+    def n_bytes(self,):
+        """ Total size of the distinct kernel files loaded """
+        return sum(self._sizes.values())
+    
+    def contents(self,):
+        """
+            Describe the contents of the pool
+            
+            Returns
+            -------
+            list of dicts (one per loaded set, from least- to most-recently-used)
+                'name', 'files', 'bytes'
+        """
+        return [ {'name' : name, 'files' : list(files), 'bytes' : sum(self._sizes[f] for f in files)} for name, (_, files) in self._sets.items() ]
+
+    def __contains__(self, name):
+        return name in self._sets
+
+
+
+# Define the (default) pool through which all kernels are furnished
+# By default the pool is unbounded: set POOL.max_files / POOL.max_bytes to limit it
+# (every pool is tracked, so that a re-downloaded kernel can be swapped in wherever it is loaded)
+# --------------------------------------------------------------------------
+POOLS = weakref.WeakSet()
+POOL = KernelPool()
+ACTIVE_POOL = POOL
+
+
+
+def listing_key(url, wildcard):
+    """ Key under which the listing of a wildcard url is recorded in the KernelStore """
+    return url.rstrip('/') + '/' + wildcard
+
+
+
+def uncovered_mask(epochs, intervals):
+    """
+        Vectorized lookup of whether epochs fall outside a set of (possibly overlapping) intervals
+        
+        Parameters
+        ----------
+        epochs : array of epochs
+        intervals : list of [start, end] pairs
+        
+        Returns
+        -------
+        uncovered : boolean array
+    """
+    intervals = np.asarray(sorted(intervals), dtype=float).reshape(-1, 2)
+    starts, ends = intervals[:,0], np.maximum.accumulate(intervals[:,1])
+    epochs = np.asarray(epochs, dtype=float)
+    i = np.searchsorted(starts, epochs, side='right') - 1
+    return (i < 0) | (epochs > ends[np.maximum(i, 0)])
 
 
 
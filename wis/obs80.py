@@ -0,0 +1,258 @@
+"""
+    Functions used by WIS to read MPC 80-column observation files
+    and to evaluate the heliocentric position of the observer for
+    every observation in the file.
+
+    As well as "normal" ground-based observations, this handles
+     - satellite observations (note2 = 'S'), which carry their own
+       geocentric offset on a second line (note2 = 's')
+     - roving observations (obscode 247, note2 = 'V'), which carry their own
+       longitude, latitude & altitude on a second line (note2 = 'v')
+
+    Everything is done using fixed-width slicing of a NumPy character-array,
+    so that files with millions of lines can be handled without per-line python
+    https://www.minorplanetcenter.net/iau/info/OpticalObs.html
+    https://www.minorplanetcenter.net/iau/info/SatelliteObs.html
+    https://www.minorplanetcenter.net/iau/info/RovingObs.html
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from kernel_spec_ground     import ground_obscode_dict , GRND
+from constants              import Rearth_km, au_km, Fearth
+from wis                    import body_fixed_rotations, inertial_rotation
+from epochs                 import to_et
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+# Geocentric obs-codes (excluded from ground_obscode_dict as they are not "ground" sites)
+GEOCENTRIC_OBSCODES = ['500', '244']
+
+
+def read_obs80(filepath):
+    """
+        Read an MPC 80-column observation file
+
+        Second lines of satellite/roving observations are merged into
+        the first line of the observation to which they belong
+
+        Parameters
+        ----------
+        filepath : str
+            path to file of 80-column observations
+
+        Returns
+        ----------
+        obs : dict of arrays (one element per observation)
+            'obscode'    : observatory code (3 character string)
+            'note2'      : note2 column of the (first) line
+            'jd_utc'     : julian date (UTC) of the observation
+            'offset_km'  : Nx3 geocentric J2000 equatorial offset of satellite observers [km]
+            'lon_deg', 'lat_deg', 'alt_m' : geodetic location of roving observers
+            (the last 4 are NaN for observations to which they do not apply)
+    """
+    chars = _read_chars(filepath)
+
+    # Identify second-lines & the first-lines to which they belong
+    # -----------------------------------------------
+    note2   = chars[:, 14]
+    second  = (note2 == b's') | (note2 == b'v')
+    i_second= np.flatnonzero(second)
+    first   = chars[~second]
+    i_first = np.searchsorted( np.flatnonzero(~second), i_second - 1 )
+    assert np.all( np.flatnonzero(~second)[i_first] == i_second - 1 ), \
+        'Found a second-line (note2 = s/v) that does not follow a first-line'
+
+    # Basic quantities for every observation
+    # -----------------------------------------------
+    n   = len(first)
+    obs = {
+        'obscode'   : _field(first, 77, 80, 'U3'),
+        'note2'     : _field(first, 14, 15, 'U1'),
+        'jd_utc'    : calendar_to_jd( _field(first, 15, 19, float), _field(first, 20, 22, float), _field(first, 23, 32, float) ),
+        'offset_km' : np.full((n,3), np.nan),
+        'lon_deg'   : np.full(n, np.nan),
+        'lat_deg'   : np.full(n, np.nan),
+        'alt_m'     : np.full(n, np.nan),
+    }
+
+    # Satellite offsets: km if col 33 == '1', AU if col 33 == '2'
+    # -----------------------------------------------
+    sat = note2[i_second] == b's'
+    if np.any(sat):
+        lines  = chars[i_second[sat]]
+        offset = np.stack( [ _signed_field(lines, col, col+11) for col in (34, 46, 58) ], axis=1 )
+        offset[ lines[:, 32] == b'2' ] *= au_km
+        obs['offset_km'][ i_first[sat] ] = offset
+
+    # Roving locations
+    # -----------------------------------------------
+    rov = ~sat
+    if np.any(rov):
+        lines  = chars[i_second[rov]]
+        obs['lon_deg'][ i_first[rov] ] = _field(lines, 34, 44, float)
+        obs['lat_deg'][ i_first[rov] ] = _field(lines, 45, 55, float)
+        obs['alt_m'][ i_first[rov] ]   = _field(lines, 56, 61, float)
+
+    return obs
+
+
+def observer_posns(obs, center="SUN", frame = "J2000", abcorr = "NONE"):
+    """
+        Evaluate the position of the observer for every observation
+
+        - ground-based : rotated observatory posn + geocenter
+        - satellite    : supplied geocentric offset + geocenter
+        - roving       : geodetic->earth-fixed conversion, rotated + geocenter
+
+        Parameters
+        ----------
+        obs : dict of arrays
+            as returned by read_obs80()
+        center  : coordinate center
+            ...
+        frame   : coordinate frame
+            ...
+        abcorr  :
+            ...
+
+        Returns
+        ----------
+        posns : positions of observers
+            Nx3 array of XYZ in [AU]
+            (NaN for observations whose observer position could not be determined)
+    """
+    GRND.load()
+    n = len(obs['obscode'])
+
+    # Convert the times to the required format for spiceypy
+    # (many observations share the same time, so only convert unique ones)
+    # -----------------------------------------------
+    jd, inverse = np.unique(obs['jd_utc'], return_inverse=True)
+    unique_epochs = to_et(jd, 'jd_utc')
+    epochs = unique_epochs[inverse]
+
+    # Get the position of the geocenter (evaluated at unique epochs only)
+    # -----------------------------------------------
+    geocenter, _ = sp.spkpos('399', unique_epochs, frame, abcorr, center)
+    geocenter    = np.asarray(geocenter).reshape(-1,3)[inverse]
+
+    # Earth-fixed observer positions [km] for ground-based & roving observers
+    # -----------------------------------------------
+    body_fixed = np.full((n,3), np.nan)
+    codes, code_inverse = np.unique(obs['obscode'], return_inverse=True)
+    table = np.array([ ground_obscode_dict[code] * Rearth_km if code in ground_obscode_dict else
+                       np.zeros(3) if code in GEOCENTRIC_OBSCODES else
+                       np.full(3, np.nan) for code in codes ]).reshape(-1,3)
+    body_fixed[:] = table[code_inverse]
+
+    rov = np.isfinite(obs['lon_deg'])
+    body_fixed[rov] = geodetic_to_body_fixed(obs['lon_deg'][rov], obs['lat_deg'][rov], obs['alt_m'][rov] / 1000.)
+
+    # Satellites carry their own (inertial) offsets, so are not rotated with the earth
+    # -----------------------------------------------
+    sat = np.isfinite(obs['offset_km'][:,0])
+    body_fixed[sat] = np.nan
+
+    # Rotate earth-fixed positions into the required frame
+    # (the rotations are evaluated at unique epochs only)
+    # -----------------------------------------------
+    offset = np.full((n,3), np.nan)
+    rot = np.isfinite(body_fixed[:,0])
+    rot_epochs, rot_inverse = np.unique(epochs[rot], return_inverse=True)
+    rotations   = body_fixed_rotations(rot_epochs, frame=frame)[rot_inverse.reshape(-1)]
+    offset[rot] = np.einsum('nij,nj->ni', rotations, body_fixed[rot])
+    offset[sat] = obs['offset_km'][sat] if frame == 'J2000' else \
+        np.dot( obs['offset_km'][sat], inertial_rotation('J2000', frame).T )
+
+    return (geocenter + offset) / au_km
+
+
+def obs80_posns(filepath, center="SUN", frame = "J2000", abcorr = "NONE"):
+    """
+        Convenience function: read an 80-column observation file
+        and evaluate the observer position for each observation
+
+        Returns
+        ----------
+        obs : dict of arrays
+            as returned by read_obs80()
+        posns : positions of observers
+            Nx3 array of XYZ in [AU]
+    """
+    obs = read_obs80(filepath)
+    return obs, observer_posns(obs, center=center, frame=frame, abcorr=abcorr)
+
+
+def calendar_to_jd(year, month, day):
+    """
+        Convert (gregorian) calendar dates to julian dates
+
+        Parameters
+        ----------
+        year, month : arrays of integer-valued years & months
+        day : array of (fractional) day-of-month
+
+        Returns
+        ----------
+        jd : array of julian dates
+    """
+    year, month = np.asarray(year, dtype=int), np.asarray(month, dtype=int)
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12*a - 3
+    jdn = (153*m + 2)//5 + 365*y + y//4 - y//100 + y//400 - 32045
+    return jdn - 0.5 + np.asarray(day, dtype=float)
+
+
+def geodetic_to_body_fixed(lon_deg, lat_deg, alt_km):
+    """
+        Convert geodetic longitude/latitude/altitude to earth-fixed XYZ [km]
+        (WGS84 ellipsoid)
+    """
+    lon, lat = np.radians(lon_deg), np.radians(lat_deg)
+    e2 = Fearth * (2. - Fearth)
+    N  = Rearth_km / np.sqrt(1. - e2*np.sin(lat)**2)
+    return np.stack( [ (N + alt_km) * np.cos(lat) * np.cos(lon),
+                       (N + alt_km) * np.cos(lat) * np.sin(lon),
+                       (N*(1. - e2) + alt_km) * np.sin(lat) ], axis=1 )
+
+
+def _read_chars(filepath):
+    """ Read a file of 80-column lines into an Nx80 character-array """
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+
+    # Fast path: every record is exactly 80 characters + newline
+    if len(raw) % 81 == 0 and np.all( np.frombuffer(raw, dtype='S1')[80::81] == b'\n' ):
+        return np.frombuffer(raw, dtype='S1').reshape(-1, 81)[:, :80]
+
+    # Otherwise allow for "\r\n", trailing-whitespace being stripped, blank lines, ...
+    lines = np.array( [ line for line in raw.splitlines() if line.strip() ], dtype='S80' )
+    return lines.view('S1').reshape(-1, 80)
+
+
+def _field(chars, start, end, dtype):
+    """ Convert the (0-based) columns [start:end] of a character-array """
+    field = np.ascontiguousarray(chars[:, start:end]).view('S%d' % (end-start)).ravel()
+    if dtype is float:
+        blank = np.char.strip(field) == b''
+        field = np.where(blank, b'0', field).astype(float)
+        field[blank] = np.nan
+        return field
+    return field.astype(dtype)
+
+
+def _signed_field(chars, start, end):
+    """ Convert columns with a leading sign-character, e.g. "- 5634.1734" """
+    sign = np.where(chars[:, start] == b'-', -1., 1.)
+    return sign * _field(chars, start+1, end, float)
@@ -0,0 +1,218 @@
+"""
+    Compact container for the observer positions evaluated by wis.py
+
+    A Result holds, for N epochs,
+     - 'epochs' : ephemeris-time (ET, TDB seconds past J2000)
+     - 'posns'  : Nx3 XYZ observer positions [AU]
+     - 'vels'   : Nx3 observer velocities [AU/day] (optional)
+     - 'ltts'   : light-times [days]
+    together with the obscode, center, frame & abcorr used to evaluate them.
+
+    All of the columns are carved out of a single contiguous float64 buffer,
+    one contiguous block per column ([epochs | posns | vels | ltts]), so that
+     - a Result costs one allocation (rather than one array per attribute)
+     - every column is a C-contiguous, zero-copy numpy view of the buffer
+    Slicing a Result gives a Result whose columns are views of the same buffer;
+    concatenating Results copies them into a new buffer.
+
+    A Result can also be extended in-place (see Result.merge()): the buffer
+    is allocated with spare capacity, which is doubled whenever it runs out,
+    so that repeatedly adding a few epochs costs amortized O(1) per epoch
+    rather than a full reallocation each time.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import numpy as np
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+COLUMNS = ['epochs', 'posns', 'vels', 'ltts']
+WIDTHS  = {'epochs' : 1, 'posns' : 3, 'vels' : 3, 'ltts' : 1}
+META    = ['obscode', 'center', 'frame', 'abcorr']
+
+
+class Result(object):
+    """
+        Observer positions (& light-times, optional velocities) at a set of epochs
+
+        Parameters
+        ----------
+        epochs : N array of ET
+        posns : Nx3 array of XYZ [AU]
+        ltts : N array of light-times [days]
+        vels : Nx3 array of velocities [AU/day], optional
+        buffer : 1-D array, optional
+            the buffer of which the columns are views (see empty())
+        capacity : int, optional
+            number of epochs for which the buffer has space (see merge())
+        obscode, center, frame, abcorr : optional
+            how the positions were evaluated
+
+        Notes
+        -----
+        Use Result.empty() to allocate a Result backed by a single buffer,
+        into which positions are then written in-place
+    """
+
+    __slots__ = ['buffer', 'capacity'] + COLUMNS + META
+
+    def __init__(self, epochs, posns, ltts, vels=None, buffer=None, capacity=None, obscode=None, center=None, frame=None, abcorr=None):
+        self.epochs, self.posns, self.ltts, self.vels = epochs, posns, ltts, vels
+        self.buffer, self.capacity = buffer, capacity
+        self.obscode, self.center, self.frame, self.abcorr = obscode, center, frame, abcorr
+
+    @classmethod
+    def empty(cls, n, velocities=False, capacity=None, **meta):
+        """
+            Allocate a Result for n epochs, with every column a view of one contiguous buffer
+
+            Parameters
+            ----------
+            n : int
+                number of epochs
+            velocities : bool
+                whether to allocate a velocity column
+            capacity : int, optional
+                number of epochs for which space is allocated (default n)
+            **meta :
+                obscode, center, frame, abcorr
+        """
+        capacity = n if capacity is None else capacity
+        assert capacity >= n, 'capacity [%d] < n [%d]' % (capacity, n)
+        columns = [ c for c in COLUMNS if velocities or c != 'vels' ]
+        buffer  = np.empty(capacity * sum( WIDTHS[c] for c in columns ), dtype=np.float64)
+        return cls(buffer=buffer, capacity=capacity, **_views(buffer, columns, n, capacity), **meta)
+
+    # Metadata & columns
+    # ----------------------------------------------
+    @property
+    def meta(self,):
+        """ dict of obscode, center, frame, abcorr """
+        return { m : getattr(self, m) for m in META }
+
+    @property
+    def columns(self,):
+        """ dict of the (non-empty) columns """
+        return { c : getattr(self, c) for c in COLUMNS if getattr(self, c) is not None }
+
+    @property
+    def nbytes(self,):
+        """ Memory used by the columns """
+        return sum( column.nbytes for column in self.columns.values() )
+
+    # Sequence behaviour
+    # ----------------------------------------------
+    def __len__(self,):
+        return len(self.epochs)
+
+    def __getitem__(self, index):
+        """
+            Select epochs: a slice gives views of the same buffer (no copy),
+            an integer/boolean array gives copies (as for numpy arrays)
+        """
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+        columns = { c : column[index] for c, column in self.columns.items() }
+        return Result(buffer=self.buffer if isinstance(index, slice) else None, **columns, **self.meta)
+
+    # In-place extension
+    # ----------------------------------------------
+    def merge(self, other):
+        """
+            Add the epochs of another Result to this one, in-place
+
+            If the epochs of this Result are sorted, the other epochs are inserted in
+            time-order (otherwise they are appended). The buffer is only reallocated
+            (with doubled capacity) when it is full, or if this Result has no spare
+            capacity of its own (e.g. it is a slice, or its positions are held in a caller's buffer)
+
+            Returns
+            ----------
+            self
+        """
+        n, m = len(self), len(other)
+        if m == 0:
+            return self
+        assert self.vels is None or other.vels is not None, 'Cannot merge a Result without velocities into one with velocities'
+        columns = [ c for c in COLUMNS if c != 'vels' or self.vels is not None ]
+        if not self._owns_columns() or n + m > self.capacity:
+            self._reallocate( max(n + m, 2 * n) )
+        full = _views(self.buffer, columns, n + m, self.capacity)
+
+        # Destinations of the existing & new rows (all existing rows stay put if the new ones come after them)
+        # -----------------------------------------------
+        order = np.argsort(other.epochs, kind='stable')
+        new   = other.epochs[order]
+        if n and np.all(np.diff(self.epochs) >= 0) and new[0] < self.epochs[-1]:
+            dest_old = np.arange(n) + np.searchsorted(new, self.epochs, side='left')
+            dest_new = np.arange(m) + np.searchsorted(self.epochs, new, side='right')
+        else:
+            dest_old, dest_new = None, np.arange(n, n + m)
+
+        for c in columns:
+            if dest_old is not None:
+                full[c][dest_old] = full[c][:n]
+            full[c][dest_new] = getattr(other, c)[order]
+            setattr(self, c, full[c])
+        return self
+
+    def _owns_columns(self,):
+        """ Whether the columns are the leading rows of the blocks of this Result's own buffer """
+        if self.capacity is None:
+            return False
+        columns = [ c for c in COLUMNS if c != 'vels' or self.vels is not None ]
+        views   = _views(self.buffer, columns, len(self), self.capacity)
+        return all( getattr(self, c).__array_interface__['data'][0] == views[c].__array_interface__['data'][0] and
+                    getattr(self, c).shape == views[c].shape and getattr(self, c).dtype == np.float64 for c in columns )
+
+    def _reallocate(self, capacity):
+        """ Move the columns into a new buffer with space for capacity epochs """
+        new = Result.empty(len(self), velocities=self.vels is not None, capacity=capacity, **self.meta)
+        for c, column in new.columns.items():
+            column[...] = getattr(self, c)
+        self.buffer, self.capacity = new.buffer, new.capacity
+        for c, column in new.columns.items():
+            setattr(self, c, column)
+
+    def __iter__(self,):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self,):
+        return 'Result(n=%d, obscode=%r, center=%r, frame=%r, abcorr=%r%s)' % (
+            len(self), self.obscode, self.center, self.frame, self.abcorr, ', velocities' if self.vels is not None else '')
+
+    def copy(self,):
+        """ Copy into a new (single, contiguous) buffer """
+        return concatenate([self])
+
+
+def _views(buffer, columns, n, capacity):
+    """ Views of the first n rows of each column-block of a buffer allocated for capacity epochs """
+    views, start = {}, 0
+    for c in columns:
+        block = buffer[start:start + capacity * WIDTHS[c]]
+        views[c] = block[:n] if WIDTHS[c] == 1 else block[:n * WIDTHS[c]].reshape(n, WIDTHS[c])
+        start += capacity * WIDTHS[c]
+    return views
+
+
+def concatenate(results):
+    """
+        Concatenate Results into a new Result (backed by a single new buffer)
+
+        Velocities are kept only if every Result has them;
+        metadata is kept where it agrees between all of the Results (else None)
+    """
+    results = list(results)
+    assert results, 'Nothing to concatenate'
+    velocities = all( r.vels is not None for r in results )
+    meta = { m : getattr(results[0], m) if all( getattr(r, m) == getattr(results[0], m) for r in results ) else None for m in META }
+    out = Result.empty(sum( len(r) for r in results ), velocities=velocities, **meta)
+    for c, column in out.columns.items():
+        np.concatenate([ getattr(r, c) for r in results ], out=column)
+    return out
@@ -0,0 +1,317 @@
+"""
+    Long-lived wis server, answering position requests over a Unix socket
+
+    Short-lived scripts pay for importing wis, building the obscode tables &
+    furnishing the planetary/earth-orientation kernels before evaluating
+    anything. A server pays for these once, and then keeps the kernels (&
+    every cache) warm for all subsequent requests:
+
+        wis --serve                         # (or: python server.py)
+
+        import server
+        R = server.remote_wis('F51', jd_utc, timeformat='jd_utc')   # result.Result
+        R.posns, R.ltts
+
+    Protocol (all little-endian)
+     - request  : header (REQUEST : magic b'WISQ', timeformat, flags, len(names), n)
+                  + names   : "obscode\\0center\\0frame\\0abcorr" (ascii)
+                  + times   : n float64
+     - response : header (RESPONSE : magic b'WISR', status, n)
+                  + if status == OK    : n float64 epochs, n*3 float64 posns [AU], n float64 ltts [days]
+                                         (i.e. the buffer of a result.Result, received in-place)
+                  + if status == ERROR : n bytes of error message (utf-8)
+    A connection can carry any number of request/response pairs.
+
+    Connections are handled in separate threads, but CSPICE is not thread-safe,
+    so every evaluation is serialized by a single lock.
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import os
+import sys
+import socket
+import struct
+import tempfile
+import threading
+import socketserver
+import signal
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from epochs import TIMEFORMATS, J2000_JD
+from result import Result
+from constants import day_s
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+DEFAULT_SOCKET  = os.environ.get('WIS_SOCKET', os.path.join(tempfile.gettempdir(), 'wis-%d.sock' % os.getuid()))
+REQUEST         = struct.Struct('<4sBBHI')
+RESPONSE        = struct.Struct('<4sB3xI')
+REQUEST_MAGIC   = b'WISQ'
+RESPONSE_MAGIC  = b'WISR'
+OK, NONE, ERROR = 0, 1, 2
+FLAG_EXCLUDE_AS_GEO, FLAG_UNKNOWN_AS_GEO = 1, 2
+
+
+# Server
+# ----------------------------------------------
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+        Threaded Unix-socket server: one thread per connection,
+        with all spice work serialized by self.lock
+    """
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.n_requests = 0
+        socketserver.UnixStreamServer.__init__(self, path, Handler)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """ Answer the requests arriving on a connection (until it is closed) """
+
+    def handle(self,):
+        while True:
+            request = read_request(self.rfile)
+            if request is None:
+                return
+            with self.server.lock:
+                self.server.n_requests += 1
+                status, payload = evaluate_request(*request)
+            write_response(self.wfile, status, payload)
+
+
+def serve(path=None, preload=True, ready=None):
+    """
+        Run a server until interrupted
+
+        Parameters
+        ----------
+        path : str, optional
+            path of the Unix socket (default DEFAULT_SOCKET, or $WIS_SOCKET)
+        preload : bool
+            furnish the ground-based kernels (planetary ephemeris, earth orientation) up-front
+        ready : threading.Event, optional
+            set once the server is accepting connections
+
+        Returns
+        ----------
+        exit status (0 on success)
+    """
+    path = DEFAULT_SOCKET if path is None else path
+    from kernel_spec_ground import GRND
+    if preload:
+        GRND.load()
+
+    # A socket left behind by a server that is no longer running is replaced
+    # -----------------------------------------------
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+                sys.exit('A wis server is already running on %r' % path)
+            except ConnectionRefusedError:
+                os.remove(path)
+
+    # Stop cleanly (removing the socket) when terminated
+    # -----------------------------------------------
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    with Server(path) as server:
+        print('wis: serving on %r' % path, file=sys.stderr)
+        if ready is not None:
+            ready.set()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+    return 0
+
+
+def evaluate_request(obscode, times, center, frame, abcorr, timeformat, flags):
+    """
+        Evaluate a request with wis() (on the server)
+
+        Returns
+        ----------
+        status : OK, NONE (wis() does not know the obscode) or ERROR
+        payload : list of arrays to send (OK) or error message (ERROR)
+    """
+    from wis import wis
+    try:
+        W = wis(obscode, times, center=center, frame=frame, abcorr=abcorr, timeformat=timeformat,
+                EXCLUDE_AS_GEO=bool(flags & FLAG_EXCLUDE_AS_GEO), UNKNOWN_AS_GEO=bool(flags & FLAG_UNKNOWN_AS_GEO))
+    except (Exception, SystemExit) as e:
+        return ERROR, repr(e)
+    if W is None:
+        return NONE, None
+    R = W.result
+    return OK, [R.epochs, np.asarray(R.posns, dtype=np.float64), R.ltts]
+
+
+# Client
+# ----------------------------------------------
+class Client(object):
+    """
+        Connection to a wis server
+
+        Parameters
+        ----------
+        path : str, optional
+            path of the Unix socket (default DEFAULT_SOCKET, or $WIS_SOCKET)
+    """
+
+    def __init__(self, path=None):
+        self.path = DEFAULT_SOCKET if path is None else path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+        self.rfile = self.sock.makefile('rb')
+
+    def wis(self, obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE_AS_GEO = False, UNKNOWN_AS_GEO = False, timeformat=None):
+        """
+            Evaluate observer positions on the server (see wis.wis())
+
+            times are either an astropy Time object, or a numeric array if timeformat is supplied
+            (a single center & frame only: the server returns the positions of one Result)
+
+            Returns
+            ----------
+            result.Result (epochs, posns [AU], ltts [days]), or None if the server does not know the obscode
+        """
+        _check_names(center, frame)
+        times, timeformat = _numeric_times(times, timeformat)
+        flags = (FLAG_EXCLUDE_AS_GEO if EXCLUDE_AS_GEO else 0) | (FLAG_UNKNOWN_AS_GEO if UNKNOWN_AS_GEO else 0)
+        write_request(self.sock, obscode, times, center, frame, abcorr, timeformat, flags)
+        return read_response(self.rfile, obscode=obscode, center=center, frame=frame, abcorr=abcorr)
+
+    def close(self,):
+        self.rfile.close()
+        self.sock.close()
+
+    def __enter__(self,):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_clients = {}
+
+def remote_wis(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE_AS_GEO = False, UNKNOWN_AS_GEO = False, timeformat=None, path=None):
+    """
+        Evaluate observer positions on a wis server (mirrors wis.wis())
+
+        Uses a connection (per socket path) that is opened on first use & then kept open
+        (a single center & frame only)
+
+        Returns
+        ----------
+        result.Result (epochs, posns [AU], ltts [days]), or None if the server does not know the obscode
+    """
+    _check_names(center, frame)
+    path = DEFAULT_SOCKET if path is None else path
+    if path not in _clients:
+        _clients[path] = Client(path)
+    return _clients[path].wis(obscode, times, center=center, frame=frame, abcorr=abcorr,
+                              EXCLUDE_AS_GEO=EXCLUDE_AS_GEO, UNKNOWN_AS_GEO=UNKNOWN_AS_GEO, timeformat=timeformat)
+
+
+def _check_names(center, frame):
+    assert isinstance(center, str) and isinstance(frame, str), \
+        'A wis server evaluates a single center & frame: supplied center=%r, frame=%r' % (center, frame)
+
+
+def _numeric_times(times, timeformat):
+    """ Astropy Time objects are sent as ET (TDB seconds past J2000), without loss of precision """
+    if timeformat is None:
+        tdb = times.tdb
+        return ((np.atleast_1d(tdb.jd1) - J2000_JD) + np.atleast_1d(tdb.jd2)) * day_s, 'et'
+    assert timeformat in TIMEFORMATS, 'Supplied timeformat [%r] is not in known/allowed formats [%r]' % (timeformat, TIMEFORMATS)
+    return times, timeformat
+
+
+# Messages
+# ----------------------------------------------
+def write_request(sock, obscode, times, center, frame, abcorr, timeformat, flags=0):
+    """ Send a request (times are sent as the raw float64 buffer) """
+    names = '\0'.join([obscode, center, frame, abcorr]).encode('ascii')
+    times = np.ascontiguousarray(np.atleast_1d(times), dtype='<f8')
+    sock.sendall( REQUEST.pack(REQUEST_MAGIC, TIMEFORMATS.index(timeformat), flags, len(names), len(times)) + names )
+    sock.sendall( memoryview(times).cast('B') )
+
+
+def read_request(f):
+    """
+        Read a request (None if the connection has been closed)
+
+        Returns
+        ----------
+        obscode, times, center, frame, abcorr, timeformat, flags
+    """
+    header = f.read(REQUEST.size)
+    if len(header) < REQUEST.size:
+        return None
+    magic, timeformat, flags, n_names, n = REQUEST.unpack(header)
+    assert magic == REQUEST_MAGIC, 'Not a wis request'
+    obscode, center, frame, abcorr = _read_exactly(f, n_names).decode('ascii').split('\0')
+    times = np.empty(n, dtype='<f8')
+    _read_into(f, times)
+    return obscode, times, center, frame, abcorr, TIMEFORMATS[timeformat], flags
+
+
+def write_response(f, status, payload):
+    """ Send a response (arrays are sent as their raw float64 buffers) """
+    if status == OK:
+        f.write( RESPONSE.pack(RESPONSE_MAGIC, status, len(payload[0])) )
+        for array in payload:
+            f.write( memoryview(np.ascontiguousarray(array, dtype='<f8')).cast('B') )
+    elif status == ERROR:
+        message = payload.encode('utf-8')
+        f.write( RESPONSE.pack(RESPONSE_MAGIC, status, len(message)) + message )
+    else:
+        f.write( RESPONSE.pack(RESPONSE_MAGIC, status, 0) )
+    f.flush()
+
+
+def read_response(f, **meta):
+    """ Read a response straight into the buffer of a new Result (raises RuntimeError if the server failed) """
+    magic, status, n = RESPONSE.unpack( _read_exactly(f, RESPONSE.size) )
+    assert magic == RESPONSE_MAGIC, 'Not a wis response'
+    if status == ERROR:
+        raise RuntimeError('wis server: %s' % _read_exactly(f, n).decode('utf-8'))
+    if status == NONE:
+        return None
+    R = Result.empty(n, **meta)
+    _read_into(f, R.buffer)
+    return R
+
+
+def _read_exactly(f, n):
+    data = f.read(n)
+    if len(data) < n:
+        raise ConnectionError('wis server closed the connection')
+    return data
+
+
+def _read_into(f, array):
+    view, start = memoryview(array).cast('B'), 0
+    while start < len(view):
+        n = f.readinto(view[start:])
+        if not n:
+            raise ConnectionError('wis connection closed')
+        start += n
+
+
+
+if __name__ == '__main__':
+    sys.exit(serve(sys.argv[1] if len(sys.argv) > 1 else None))
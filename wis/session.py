@@ -0,0 +1,109 @@
+"""
+    Sessions: a kernel set, together with its caches & configuration
+
+    By default wis uses a single, module-level kernel set (GRND, satellite_obscode_dict,
+    the kernel POOL & the KernelStore configured from the environment). A Session owns
+    its own copies of these, so that e.g. results from two planetary ephemerides can be
+    compared in one process, or different users can be given different kernel stores:
+
+        import session
+        DE440 = session.Session('de440', ground_files=[DE440_URL] + session.DEFAULT.ground.files[1:])
+        W430  = wis.wis('F51', times)
+        W440  = wis.wis('F51', times, session=DE440)
+
+    Spice has one kernel pool per process, so only one session's kernels are furnished at
+    a time: the pool is only switched when the session in use changes (see kernels.KernelPool.activate()).
+    Switching does not clear anything else: each session keeps its loaded windows, coverage
+    indices & cached rotations, so switching back re-furnishes the same files without re-reading or downloading.
+"""
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from kernels                import KernelSpecifier, KernelPool, POOL
+from kernel_store           import STORE
+from kernel_spec_ground     import GRND, ground_obscode_dict
+from kernel_spec_satellites import satellite_obscode_dict
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+class Session(object):
+    """
+        Session-Object
+
+        Owns a kernel set (the ground-based & satellite KernelSpecifiers), the KernelPool
+        through which they are furnished, the KernelStore from which they are resolved,
+        & the caches that depend on them
+
+        Parameters
+        ----------
+        name : str, optional
+            name of the session
+        ground_files : list of urls, optional
+            the kernels used for ground-based obscodes (default: those of GRND)
+        store : kernel_store.KernelStore, optional
+            where kernels are stored/downloaded (default: the KernelStore configured from the environment)
+        max_files, max_bytes : int, optional
+            cap on this session's KernelPool (see kernels.KernelPool)
+    """
+
+    def __init__(self, name=None, ground_files=None, store=None, max_files=None, max_bytes=None):
+        self.name  = name
+        self.store = STORE if store is None else store
+        self.pool  = KernelPool(max_files=max_files, max_bytes=max_bytes)
+        self.ground     = self._copy_specifier(GRND, files=ground_files)
+        self.satellites = { obscode : self._copy_specifier(K) for obscode, K in satellite_obscode_dict.items() }
+        self.rotations  = {}
+
+    @classmethod
+    def wrap(cls, name, ground, satellites, pool, store):
+        """ A session around an existing kernel set (used for the module-level DEFAULT session) """
+        session = cls.__new__(cls)
+        session.name, session.ground, session.satellites, session.pool, session.store = name, ground, satellites, pool, store
+        session.rotations = {}
+        return session
+
+    def _copy_specifier(self, K, files=None):
+        """ A KernelSpecifier with the same specification as K, that uses this session's store & pool """
+        files = K.files if files is None else list(files)
+        return KernelSpecifier(obscode=K.obscode, name=K.name, files=files, wildcards=K.wildcards,
+                               timecritical=[ f for f in K.timecritical if f in files ], store=self.store, pool=self.pool)
+
+    # Kernels
+    # ----------------------------------------------
+    def activate(self,):
+        """ Make this session's kernels the ones furnished into spice (nothing is done if they already are) """
+        self.pool.activate()
+        return self
+
+    @property
+    def active(self,):
+        """ Whether this session's kernels are the ones furnished into spice """
+        return self.pool.active
+
+    def specifier(self, obscode):
+        """ The KernelSpecifier of this session that handles an obscode (None if the obscode is unknown) """
+        if obscode in ground_obscode_dict:
+            return self.ground
+        return self.satellites.get(obscode)
+
+    def clear(self,):
+        """ Unload this session's kernels & empty its caches """
+        self.pool.clear()
+        self.rotations.clear()
+
+    def __repr__(self,):
+        return 'Session(%r, %d kernel files loaded%s)' % (self.name, self.pool.n_files, ', active' if self.active else '')
+
+
+
+# Define the (default) session around the module-level kernel set
+# --------------------------------------------------------------------------
+DEFAULT = Session.wrap('default', GRND, satellite_obscode_dict, POOL, STORE)
+
+
+def get_session(session=None):
+    """ The supplied session (or the DEFAULT session if None) """
+    return DEFAULT if session is None else session
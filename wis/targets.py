@@ -0,0 +1,159 @@
+"""
+    Batched observer -> target vectors
+
+    Evaluates the (light-time corrected) vectors from many observers (obscodes)
+    to many targets (any body in the loaded SPKs, e.g. planets & small bodies)
+    at many times, in one call:
+
+        vecs, ltts = targets.target_vectors(['F51', 'C51'], ['MARS BARYCENTER', '2000001'], jd_tdb, timeformat='jd_tdb')
+        vecs.shape == (2, 2, len(jd_tdb), 3)
+
+    Rather than calling spkpos(target, epoch, frame, 'LT', observer) for every
+    (observer, target, epoch) - which is not possible anyway for ground-based
+    observers, as they are not spice bodies - this
+     - evaluates the (barycentric) position of each observer once, using wis()
+     - evaluates each target at all (observer, epoch) pairs in one batched call
+     - iterates the light-time equation  lt = |target(t - lt) - observer(t)| / c
+       for all (observer, epoch) pairs at once
+    The light-time correction is that of spice's abcorr
+     - 'NONE' : geometric vectors
+     - 'LT'   : a single light-time iteration (as spice 'LT')
+     - 'CN'   : iterated until converged (as spice 'CN')
+    (stellar aberration corrections, '+S', are not supported)
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import spiceypy as sp
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis        import wis
+from constants  import au_km, day_s
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+ABCORRS        = ['NONE', 'LT', 'CN']
+MAX_ITERATIONS = 10     # for abcorr = 'CN'
+CONVERGENCE_S  = 1e-9   # for abcorr = 'CN': light-time change [s] below which iteration stops
+
+
+def target_vectors(obscodes, targets, times, frame = "J2000", abcorr = "LT", timeformat=None):
+    """
+        Evaluate the vectors from many observers to many targets at many times
+
+        Parameters
+        ----------
+        obscodes : list of str
+            MPC observation codes of the observers (any obscode handled by wis())
+        targets : list of str
+            spice names/ids of targets in the loaded SPKs
+        times : astropy Time object, or numeric array if timeformat is supplied
+            times at which the observers observe the targets
+        frame : str
+            (inertial) coordinate frame: the light-time equation is only solved in an inertial frame
+        abcorr : str
+            light-time correction: one of ABCORRS
+        timeformat : str, optional
+            format of numeric times (see epochs.to_et())
+
+        Returns
+        ----------
+        vecs : (n_obs, n_targets, n_times, 3) array
+            observer -> target vectors [AU]
+            (NaN for observers that wis() does not know)
+        ltts : (n_obs, n_targets, n_times) array
+            one-way light-times [days]
+    """
+    abcorr = abcorr.upper()
+    assert abcorr in ABCORRS, 'Supplied abcorr [%r] is not in known/allowed corrections [%r]' % (abcorr, ABCORRS)
+    code = sp.namfrm(frame)
+    assert code != 0 and sp.frinfo(code)[1] == 1, 'Frame [%r] is not a known inertial frame (so cannot be used for light-time corrected vectors)' % frame
+    obscodes, targets = list(obscodes), list(targets)
+
+    # Barycentric positions of the observers, evaluated once [km]
+    # -----------------------------------------------
+    epochs, observers = observer_positions(obscodes, times, frame=frame, timeformat=timeformat)
+    n_obs, n_times = observers.shape[:2]
+    valid = np.isfinite(observers[:, 0, 0])
+
+    # Light-time corrected vectors to each target (for all observers & epochs at once)
+    # -----------------------------------------------
+    vecs = np.full((n_obs, len(targets), n_times, 3), np.nan)
+    ltts = np.full((n_obs, len(targets), n_times), np.nan)
+    for j, target in enumerate(targets):
+        vecs[valid, j], ltts[valid, j] = light_time_vectors(target, epochs, observers[valid], frame=frame, abcorr=abcorr)
+
+    vecs /= au_km
+    ltts /= day_s
+    return vecs, ltts
+
+
+def observer_positions(obscodes, times, frame = "J2000", timeformat=None):
+    """
+        Evaluate the solar-system-barycentric positions of observers
+
+        Returns
+        ----------
+        epochs : n_times array of ET
+        posns : (n_obs, n_times, 3) array of positions [km]
+            (NaN for observers that wis() does not know)
+    """
+    epochs, posns = None, []
+    for obscode in obscodes:
+        W = wis(obscode, times, center="SSB", frame=frame, timeformat=timeformat)
+        if W is None:
+            posns.append(None)
+            continue
+        epochs = W.epochs
+        posns.append( (W.hXYZ if hasattr(W, 'hXYZ') else W.posns) * au_km )
+    assert epochs is not None, 'None of the supplied obscodes [%r] are known' % obscodes
+    return epochs, np.stack([ np.full((len(epochs), 3), np.nan) if p is None else p for p in posns ])
+
+
+def light_time_vectors(target, epochs, observers, frame = "J2000", abcorr = "LT"):
+    """
+        Evaluate light-time corrected vectors from observers to a target
+
+        The target is evaluated at all (observer, epoch) pairs in one spkpos call per iteration
+
+        Parameters
+        ----------
+        target : str
+            spice name/id of the target
+        epochs : n_times array of ET
+            times of observation
+        observers : (n_obs, n_times, 3) array
+            barycentric positions of the observers [km]
+        frame, abcorr : str
+            see target_vectors()
+
+        Returns
+        ----------
+        vecs : (n_obs, n_times, 3) array of observer -> target vectors [km]
+        ltts : (n_obs, n_times) array of light-times [s]
+    """
+    c = sp.clight()
+
+    # Geometric vectors: the target position at the epochs is common to all observers
+    # -----------------------------------------------
+    posns, _ = sp.spkpos(target, epochs, frame, "NONE", "SSB")
+    vecs = np.asarray(posns).reshape(-1, 3)[np.newaxis] - observers
+    ltts = np.linalg.norm(vecs, axis=-1) / c
+    if abcorr == "NONE":
+        return vecs, ltts
+
+    # Fixed-point iteration of the light-time equation
+    # -----------------------------------------------
+    for _ in range(1 if abcorr == "LT" else MAX_ITERATIONS):
+        posns, _ = sp.spkpos(target, (epochs[np.newaxis] - ltts).ravel(), frame, "NONE", "SSB")
+        vecs = np.asarray(posns).reshape(observers.shape) - observers
+        ltts, previous = np.linalg.norm(vecs, axis=-1) / c, ltts
+        if np.max(np.abs(ltts - previous)) < CONVERGENCE_S:
+            break
+    return vecs, ltts
@@ -0,0 +1,201 @@
+"""
+    Validation harness for the observer positions evaluated by wis.py
+
+    Runs a "mode" (any function that evaluates observer positions) against a
+    set of reference positions (e.g. tests/data/reference_positions.json, taken
+    from JPL Horizons queries), and reports
+     - max & RMS position error [km]
+     - max & RMS angular error [mas], i.e. the position error as seen from the center
+     - throughput [evaluations per second]
+    so that the speed / accuracy trade-off of any faster (approximate or cached)
+    way of evaluating positions is measured, and can be enforced by check().
+
+    A mode is a function
+        mode(obscode, times, center="SUN", frame="J2000", timeformat="jd_tdb") -> Nx3 positions [km]
+    New modes can be registered in MODES (see the @register decorator)
+
+    Run from the command-line as
+        python validation.py reference_positions.json --mode spice
+"""
+
+# -----------------------------------------
+# Third-party imports
+# -----------------------------------------
+import sys
+import json
+import argparse
+from timeit import default_timer as timer
+import numpy as np
+
+# -----------------------------------------
+# Local imports
+# -----------------------------------------
+from wis        import wis
+from constants  import au_km
+
+# -----------------------------------------
+# WIS functions & classes
+# -----------------------------------------
+
+MAS_PER_RADIAN = 180. / np.pi * 3600. * 1000.
+UNITS_KM       = {'km' : 1., 'AU' : au_km}
+
+MODES = {}
+
+def register(name):
+    """ Decorator to register a function as a positional mode """
+    def decorator(mode):
+        MODES[name] = mode
+        return mode
+    return decorator
+
+
+@register('spice')
+def spice_posns(obscode, times, center="SUN", frame = "J2000", timeformat="jd_tdb"):
+    """ The default path: wis() with numeric times """
+    W = wis(obscode, np.asarray(times), center=center, frame=frame, timeformat=timeformat)
+    return (W.hXYZ if hasattr(W, 'hXYZ') else W.posns) * au_km
+
+
+@register('astropy')
+def astropy_posns(obscode, times, center="SUN", frame = "J2000", timeformat="jd_tdb"):
+    """ wis() with astropy Time objects (the path used by most callers) """
+    from astropy.time import Time
+    assert timeformat in ['jd_tdb', 'jd_utc']
+    W = wis(obscode, Time(times, format='jd', scale=timeformat[3:]), center=center, frame=frame)
+    return (W.hXYZ if hasattr(W, 'hXYZ') else W.posns) * au_km
+
+
+def load_cases(filepath):
+    """
+        Read a file of reference positions
+
+        Returns
+        ----------
+        cases : list of dicts
+            'name', 'obscode', 'center', 'frame', 'timeformat', 'times', 'tolerance_km', 'source'
+            + 'xyz_km' : Nx3 array of reference positions [km]
+    """
+    with open(filepath, 'r') as f:
+        cases = json.load(f)['cases']
+    for case in cases:
+        case['times']  = np.asarray(case['times'], dtype=float)
+        case['xyz_km'] = np.asarray(case['xyz'], dtype=float) * UNITS_KM[case['units']]
+    return cases
+
+
+def validate(mode='spice', cases=None, filepath=None, repeat=3):
+    """
+        Run a positional mode against reference positions
+
+        Parameters
+        ----------
+        mode : str or function
+            name of a registered mode (see MODES), or a mode-function
+        cases : list of dicts, optional
+            as returned by load_cases()
+        filepath : str, optional
+            file of reference positions (used if cases are not supplied)
+        repeat : int
+            number of timed repetitions (the fastest is reported)
+            each case is evaluated once before timing, so that kernel loading is not timed
+
+        Returns
+        ----------
+        report : dict
+            'mode', 'n', 'seconds', 'evals_per_s', 'max_km', 'rms_km', 'max_mas', 'rms_mas', 'passed'
+            'cases' : list of per-case dicts with the same errors, the 'tolerance_km' & any 'error'
+    """
+    name = mode if isinstance(mode, str) else getattr(mode, '__name__', repr(mode))
+    mode = MODES[mode] if isinstance(mode, str) else mode
+    cases = load_cases(filepath) if cases is None else cases
+
+    results, err_km, err_mas, seconds = [], [], [], 0.
+    for case in cases:
+        args   = (case['obscode'], case['times'])
+        kwargs = {'center' : case['center'], 'frame' : case['frame'], 'timeformat' : case['timeformat']}
+        result = {'name' : case['name'], 'n' : len(case['times']), 'tolerance_km' : case.get('tolerance_km')}
+
+        # Evaluate (a failure to evaluate, e.g. missing kernels, fails the case)
+        # -----------------------------------------------
+        try:
+            posns = np.asarray( mode(*args, **kwargs) ).reshape(-1, 3)
+            times = []
+            for _ in range(repeat):
+                start = timer()
+                mode(*args, **kwargs)
+                times.append(timer() - start)
+        except (Exception, SystemExit) as e:
+            result.update( {'error' : repr(e), 'passed' : False} )
+            results.append(result)
+            continue
+
+        # Position & angular errors
+        # -----------------------------------------------
+        km  = np.linalg.norm(posns - case['xyz_km'], axis=1)
+        mas = km / np.linalg.norm(case['xyz_km'], axis=1) * MAS_PER_RADIAN
+        result.update( summarize(km, mas) )
+        result['passed'] = result['tolerance_km'] is None or bool(result['max_km'] <= result['tolerance_km'])
+        results.append(result)
+        err_km.append(km)
+        err_mas.append(mas)
+        seconds += min(times)
+
+    n = sum( r['n'] for r in results if 'error' not in r )
+    report = {'mode' : name, 'n' : n, 'seconds' : seconds, 'evals_per_s' : n / seconds if seconds > 0 else np.inf, 'cases' : results}
+    report.update( summarize(np.concatenate(err_km) if err_km else np.array([np.nan]),
+                             np.concatenate(err_mas) if err_mas else np.array([np.nan])) )
+    report['passed'] = all( r['passed'] for r in results )
+    return report
+
+
+def summarize(km, mas):
+    """ Max & RMS of position [km] & angular [mas] errors """
+    return {'max_km'  : float(np.max(km)),  'rms_km'  : float(np.sqrt(np.mean(km**2))),
+            'max_mas' : float(np.max(mas)), 'rms_mas' : float(np.sqrt(np.mean(mas**2)))}
+
+
+def check(report, max_km=None, max_mas=None, min_evals_per_s=None):
+    """
+        Assert that a validation report meets the per-case tolerances
+        (& optionally overall limits on error & throughput)
+    """
+    failed = [ r['name'] for r in report['cases'] if not r['passed'] ]
+    assert not failed, 'Mode %r failed the reference cases %r:\n%s' % (report['mode'], failed, format_report(report))
+    assert max_km is None or report['max_km'] <= max_km, \
+        'Mode %r max error %.6g km > %.6g km' % (report['mode'], report['max_km'], max_km)
+    assert max_mas is None or report['max_mas'] <= max_mas, \
+        'Mode %r max error %.6g mas > %.6g mas' % (report['mode'], report['max_mas'], max_mas)
+    assert min_evals_per_s is None or report['evals_per_s'] >= min_evals_per_s, \
+        'Mode %r throughput %.6g evals/s < %.6g evals/s' % (report['mode'], report['evals_per_s'], min_evals_per_s)
+
+
+def format_report(report):
+    """ Format a validation report as a table """
+    lines = ['%-40s %5s %12s %12s %12s %12s %10s' % ('case', 'n', 'max [km]', 'rms [km]', 'max [mas]', 'rms [mas]', 'tol [km]')]
+    for r in report['cases']:
+        if 'error' in r:
+            lines.append('%-40s %5d  ERROR: %s' % (r['name'], r['n'], r['error']))
+        else:
+            lines.append('%-40s %5d %12.6g %12.6g %12.6g %12.6g %10s%s' % (r['name'], r['n'], r['max_km'], r['rms_km'], r['max_mas'], r['rms_mas'],
+                         r['tolerance_km'], '' if r['passed'] else '  FAILED'))
+    lines.append('%-40s %5d %12.6g %12.6g %12.6g %12.6g' % ('ALL (mode=%s)' % report['mode'], report['n'], report['max_km'], report['rms_km'], report['max_mas'], report['rms_mas']))
+    lines.append('throughput: %.6g evaluations/s' % report['evals_per_s'])
+    return '\n'.join(lines)
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate a positional mode against reference positions')
+    parser.add_argument('filepath', help='file of reference positions (json)')
+    parser.add_argument('--mode', choices=sorted(MODES), default='spice')
+    parser.add_argument('--max-km', type=float, default=None)
+    parser.add_argument('--max-mas', type=float, default=None)
+    args = parser.parse_args()
+
+    report = validate(args.mode, filepath=args.filepath)
+    print( format_report(report) )
+    try:
+        check(report, max_km=args.max_km, max_mas=args.max_mas)
+    except AssertionError as e:
+        sys.exit(str(e))
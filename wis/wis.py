@@ -25,8 +25,9 @@
 # -----------------------------------------
 import spiceypy as sp
 import numpy as np
-from astropy.time import Time
+from numpy.lib.recfunctions import structured_to_unstructured
 import os
+import sys
 
 # -----------------------------------------
 # Local imports
@@ -35,29 +36,47 @@ import os
 #    from .kernels import Manager
 #    from .satellite_obscodes import obscodeDict
 #except:
-from kernel_spec_satellites import satellite_obscode_dict
-from kernel_spec_ground     import ground_obscode_dict , GRND
+from kernel_spec_satellites import satellite_obscode_dict             # noqa: F401 (re-exported: kernels are used through a session)
+from kernel_spec_ground     import ground_obscode_dict , GRND       # noqa: F401
 from constants              import excluded_obscode_dict , Rearth_AU, au_km, day_s, Rearth_km
+from epochs                 import to_et, epoch_window, deduplicate, scatter, TIMEFORMATS
+from result                 import Result
+from session                import get_session
 
 # -----------------------------------------
 # WIS functions & classes
 # -----------------------------------------
 
 
-def wis(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE_AS_GEO = False, UNKNOWN_AS_GEO = False):
+def wis(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE_AS_GEO = False, UNKNOWN_AS_GEO = False, out=None, dtype=None, layout='rows', timeformat=None, tolerance=None, keep_intermediates=False, session=None):
     """
     WIP Code to generalize from Satellite Obs-Codes to *Any* Obs-Code
     
     NB, the input variables could do with having more user-friendly names
+    
+    out, dtype & layout control where/how the observer positions are written (see output_buffer())
+    
+    times can be supplied as a plain numeric array if timeformat is specified (see epochs.to_et())
+    
+    times are sorted & deduplicated before evaluation: tolerance [s] also merges times closer than tolerance (see epochs.deduplicate())
+    
+    the epochs, positions & light-times are held in a single Result (W.result, see result.py);
+    intermediate vectors (e.g. the rotated observatory vector) are only kept if keep_intermediates=True
+    
+    center can be a list of centers, e.g. ['SUN', 'SSB'], to get positions w.r.t. all of them in one pass
+    
+    frame can be a list of inertial frames, e.g. ['J2000', 'ECLIPJ2000'], to get positions in all of them in one pass
+    
+    session selects the kernel set (& caches) to use (see session.Session): by default, the module-level kernels
     """
     
     # If the obscode is a ground-based site that we can work with, return Ground class
     if obscode in ground_obscode_dict:
-        return Ground(obscode, times,  center=center, frame=frame,abcorr =abcorr)
+        return Ground(obscode, times,  center=center, frame=frame,abcorr =abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates, session=session)
 
     # If the obscode is a satellite one that we can work with, return Satellite class
-    elif obscode in satellite_obscode_dict:
-        return Satellite(obscode, times,  center=center, frame=frame,abcorr =abcorr)
+    elif obscode in get_session(session).satellites:
+        return Satellite(obscode, times,  center=center, frame=frame,abcorr =abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates, session=session)
     
     # Allow for the possibility of treating some obs-codes differently
     # (I am thinking of roving code 247)
@@ -65,7 +84,7 @@ def wis(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE
         print('That obscode is listed as being one that wis.py should specifically exclude')
         if EXCLUDE_AS_GEO:
             print('Proceeding as if from the geocenter')
-            return Ground('500', times,  center=center, frame=frame,abcorr =abcorr)
+            return Ground('500', times,  center=center, frame=frame,abcorr =abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates, session=session)
         else:
             return None
 
@@ -74,11 +93,313 @@ def wis(obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", EXCLUDE
         print('That obscode is unknown by wis.py')
         if UNKNOWN_AS_GEO:
             print('Proceeding as if from the geocenter')
-            return Ground('500', times,  center=center, frame=frame,abcorr =abcorr)
+            return Ground('500', times,  center=center, frame=frame,abcorr =abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates, session=session)
         else:
             return None
 
 
+def get_epochs(times, timeformat=None):
+    """
+        Convert the supplied times to the format required by spiceypy
+        
+        Parameters
+        ----------
+        times   : astropy Time object
+            http://docs.astropy.org/en/stable/time/
+            or a numeric array if timeformat is supplied
+        timeformat : str, optional
+            format of numeric times (see epochs.to_et())
+            
+        Returns
+        ----------
+        epochs : array of epochs
+            ephemeris-time (ET), as returned by the spiceypy utc2et() function
+    """
+    if timeformat is not None:
+        return to_et(times, timeformat)
+    return np.array([sp.utc2et('JD'+str(jdutc)) for jdutc in times.utc.jd])
+
+
+def is_astropy_time(times):
+    """
+        Whether times is an astropy Time object
+        
+        astropy is slow to import, so it is not imported by wis.py:
+        if astropy.time has not already been imported, times cannot be a Time object
+    """
+    return 'astropy.time' in sys.modules and isinstance(times, sys.modules['astropy.time'].Time)
+
+
+def rotate_body_fixed(vecs, epochs, frame = "J2000"):
+    """
+        Rotate earth-fixed (ITRF93) vectors into the requested frame at each epoch
+        
+        Uses pxform to get the matrix that transforms position vectors from ITRF93 (not IAU_EARTH)
+        https://naif.jpl.nasa.gov/pub/naif/toolkit_docs/FORTRAN/spicelib/pxform.html
+        
+        Parameters
+        ----------
+        vecs : earth-fixed vector(s)
+            either a single 3-vector (used at all epochs) or an Nx3 array (one per epoch)
+        epochs : array of epochs
+            as returned by the spiceypy utc2et() function
+        frame: Reference frame of output vectors.
+            type ref: str
+            
+        Returns
+        ----------
+        rotated vectors : Nx3 array
+            in the same units as the input vectors
+    """
+    vecs = np.broadcast_to(vecs, (len(epochs), 3))
+    return np.einsum('nij,nj->ni', body_fixed_rotations(epochs, frame=frame), vecs).reshape(-1, 3)
+
+
+def body_fixed_rotations(epochs, frame = "J2000"):
+    """
+        The matrices that rotate earth-fixed (ITRF93) vectors into the requested frame at each epoch
+        
+        Returns
+        ----------
+        rotations : Nx3x3 array
+    """
+    return np.array( [ sp.pxform( 'ITRF93', frame, epoch ) for epoch in epochs ] ).reshape(-1, 3, 3)
+
+
+def output_buffer(n, out=None, dtype=None, layout='rows'):
+    """
+        Get the array into which N observer positions will be written
+        
+        Allows callers to supply their own buffer (e.g. a memory-mapped array
+        or an array backed by a shared-memory block) which is written into in-place,
+        and/or to select the dtype & layout of a newly allocated buffer.
+        
+        Parameters
+        ----------
+        n : int
+            number of positions
+        out : numpy array, optional
+            an Nx3 or 3xN array, or a length-N structured array with
+            three (equally-typed) fields, e.g. [('x','f4'),('y','f4'),('z','f4')]
+        dtype : numpy dtype, optional
+            dtype of newly allocated buffer (default float64)
+            N.B. float32 only preserves ~1e-7 relative precision (~15 km at 1 AU)
+        layout : str
+            layout of newly allocated buffer
+             - 'rows'       : Nx3
+             - 'columns'    : 3xN (i.e. each component is contiguous)
+             - 'structured' : length-N structured array with fields x, y, z
+        
+        Returns
+        ----------
+        out : numpy array
+            the buffer as it should be handed back to the user
+        view : numpy array
+            an Nx3 view of out into which positions are to be written
+    """
+    if out is None:
+        dtype = np.dtype(np.float64 if dtype is None else dtype)
+        assert layout in ['rows', 'columns', 'structured'], 'Unknown layout [%r]' % layout
+        if layout == 'rows':
+            out = np.empty((n, 3), dtype=dtype)
+            return out, out
+        elif layout == 'columns':
+            out = np.empty((3, n), dtype=dtype)
+            return out, out.T
+        else:
+            out = np.empty(n, dtype=[('x', dtype), ('y', dtype), ('z', dtype)])
+
+    # Get an Nx3 view of the supplied/allocated buffer
+    # (NB: a supplied 3x3 buffer is taken to be Nx3)
+    # -----------------------------------------------
+    if out.dtype.names is not None:
+        assert len(out.dtype.names) == 3 and out.shape == (n,), 'Structured out must have 3 fields & shape (%d,)' % n
+        view = structured_to_unstructured(out, copy=False)
+        assert np.shares_memory(view, out), 'Fields of structured out must share a single dtype'
+    else:
+        assert out.shape in [(n, 3), (3, n)], 'Supplied out has shape %r, but expected (%d, 3) or (3, %d)' % (out.shape, n, n)
+        view = out if out.shape == (n, 3) else out.T
+    return out, view
+
+
+def get_result(n, obscode, center, frame, abcorr):
+    """
+        Allocate the Result (see result.py) holding the epochs, positions & light-times of N evaluations
+        (recording the base center & frame, to which the positions refer)
+    """
+    return Result.empty(n, obscode=obscode, center=split_centers(center, abcorr)[0], frame=split_frames(frame)[0], abcorr=abcorr)
+
+
+def result_buffer(result, out=None, dtype=None, layout='rows'):
+    """
+        The buffer into which positions are to be written (see output_buffer()):
+        positions are written straight into the Result, unless the caller supplies
+        their own buffer, or asks for a dtype/layout other than float64 rows
+    """
+    if out is None and layout == 'rows' and np.dtype(np.float64 if dtype is None else dtype) == np.float64:
+        return result.posns
+    return out
+
+
+def split_centers(center, abcorr = "NONE"):
+    """
+        Split a center (or list of centers) into the base center & any additional centers
+        
+        Positions w.r.t. additional centers are derived from those w.r.t. the base center
+        by adding geometric offsets, so this is only valid if abcorr = 'NONE'
+    """
+    centers = [center] if isinstance(center, str) else list(center)
+    assert len(centers) == 1 or abcorr == "NONE", 'Multiple centers %r can only be used with abcorr = "NONE"' % centers
+    return centers[0], centers[1:]
+
+
+def add_centers(posns, base, centers, epochs, frame = "J2000", layout='rows', inverse=None):
+    """
+        Get positions w.r.t. additional centers from positions w.r.t. a base center
+        
+        For each additional center, the offset of the base center is evaluated in one batched spkpos call
+        (rather than repeating every spice call made to get the base-center positions)
+        
+        Parameters
+        ----------
+        posns : Nx3 array
+            positions w.r.t. base in [AU]
+        base : str
+            base center
+        centers : list of str
+            additional centers
+        epochs : array of epochs
+            as returned by the spiceypy utc2et() function
+        frame: Reference frame of output vectors.
+            type ref: str
+        layout : str
+            layout of the returned arrays (see output_buffer())
+        inverse : integer array, optional
+            if supplied, epochs are unique epochs & posns[i] is at epochs[inverse[i]] (see epochs.deduplicate())
+        
+        Returns
+        ----------
+        dict : center -> positions w.r.t. center (same dtype as posns)
+    """
+    result = {}
+    for center in centers:
+        offsets, _ = sp.spkpos(base, epochs, frame, "NONE", center) # [km]
+        offsets = scatter( np.divide(offsets, au_km, out=offsets), inverse ) # AU
+        result[center], view = output_buffer(len(posns), dtype=posns.dtype, layout=layout)
+        np.add(posns, offsets, out=view, casting='same_kind')
+    return result
+
+
+def split_frames(frame):
+    """
+        Split a frame (or list of frames) into the base frame & any additional frames
+        
+        Positions in additional frames are derived from those in the base frame
+        by a constant rotation, so all frames must be inertial
+    """
+    frames = [frame] if isinstance(frame, str) else list(frame)
+    return frames[0], frames[1:]
+
+
+def inertial_rotation(from_frame, to_frame, session=None):
+    """
+        Get the (constant) rotation matrix between two inertial frames
+        
+        Cached (per session, as frames are defined by the session's kernels),
+        so that repeated requests for the same pair of frames do not call spice
+    """
+    rotations = get_session(session).rotations
+    if (from_frame, to_frame) not in rotations:
+        for frame in [from_frame, to_frame]:
+            assert sp.frinfo( sp.namfrm(frame) )[1] == 1, 'Frame [%r] is not an inertial frame' % frame
+        rotations[(from_frame, to_frame)] = sp.pxform(from_frame, to_frame, 0.0)
+    return rotations[(from_frame, to_frame)]
+
+
+def add_frames(posns, base, frames, layout='rows', session=None):
+    """
+        Get positions in additional (inertial) frames from positions in a base (inertial) frame
+        
+        Each additional frame is a single vectorized matmul with a cached constant rotation
+        (rather than repeating every spice call made to get the base-frame positions)
+        
+        Parameters
+        ----------
+        posns : Nx3 array
+            positions in the base frame
+        base : str
+            base frame
+        frames : list of str
+            additional frames
+        layout : str
+            layout of the returned arrays (see output_buffer())
+        session : session.Session, optional
+            session whose rotation cache is used
+        
+        Returns
+        ----------
+        dict : frame -> positions in frame (same dtype as posns)
+    """
+    result = {}
+    for frame in frames:
+        result[frame], view = output_buffer(len(posns), dtype=posns.dtype, layout=layout)
+        np.matmul(posns, inertial_rotation(base, frame, session=session).T, out=view, casting='same_kind')
+    return result
+
+
+def extend(W, times, timeformat=None, tolerance=1e-3):
+    """
+        Extend the positions held by a Ground/Satellite object to additional times, in-place
+        
+        Only epochs not already held are evaluated (with the same obscode, center, frame & abcorr),
+        & they are merged into W.result (in time-order, if the held epochs are sorted).
+        The result buffer grows by doubling its capacity when full (see result.Result.merge()),
+        so that repeatedly extending by a few epochs does not reallocate everything each time.
+        
+        Afterwards the positions, epochs & light-times of W are views of the (grown) result,
+        (i.e. with layout='rows' & dtype float64, whatever layout/dtype/out was originally requested)
+        
+        Parameters
+        ----------
+        W : Ground or Satellite object
+            evaluated for a single center & frame
+        times : astropy Time object, or numeric array if timeformat is supplied
+        timeformat : str, optional
+            format of numeric times (see epochs.to_et())
+        tolerance : float
+            epochs within tolerance [s] of a held epoch are taken to be already held
+            (the same time supplied as a Time object & as a number can differ by ~microseconds)
+        
+        Returns
+        ----------
+        n_new : int
+            number of epochs that were evaluated & added
+    """
+    assert isinstance(W.center, str) and isinstance(W.frame, str), 'Only results for a single center & frame can be extended'
+    unique, _, _ = deduplicate(times, timeformat)
+    epochs = get_epochs(unique, timeformat)
+    held   = np.sort(W.result.epochs)
+    if len(held):
+        i      = np.searchsorted(held, epochs)
+        nearest= np.minimum( np.abs(epochs - held[np.maximum(i - 1, 0)]), np.abs(held[np.minimum(i, len(held) - 1)] - epochs) )
+        epochs = epochs[ nearest > tolerance ]
+    if len(epochs):
+        new = type(W)(W.obscode, epochs, center=W.center, frame=W.frame, abcorr=W.abcorr, timeformat='et', session=W.session)
+        W.result.merge(new.result)
+
+    # Point the attributes of W at the merged result
+    # (intermediates no longer match the epochs, so are released)
+    # -----------------------------------------------
+    positions = 'hXYZ' if isinstance(W, Ground) else 'posns'
+    for intermediate in ['obs_vec_rot', 'posns']:
+        if intermediate != positions and hasattr(W, intermediate):
+            delattr(W, intermediate)
+    setattr(W, positions, W.result.posns)
+    W.epochs, W.ltts, W.layout = W.result.epochs, W.result.ltts, 'rows'
+    W.centers, W.frames = {W.center : W.result.posns}, {W.frame : W.result.posns}
+    return len(epochs)
+
+
 class Satellite(object):
     """
         Object to manage the calculation of satellite locations.
@@ -102,7 +423,7 @@ class Satellite(object):
 
     """
     
-    def __init__(self, obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE"):
+    def __init__(self, obscode, times,  center="SUN", frame = "J2000", abcorr = "NONE", out=None, dtype=None, layout='rows', timeformat=None, tolerance=None, keep_intermediates=False, session=None):
         """
             Initialize the Satellite object
             
@@ -120,44 +441,94 @@ class Satellite(object):
                 http://docs.astropy.org/en/stable/time/
             center  : coordinate center
                 ...
+            out, dtype, layout :
+                where/how the positions are written (see output_buffer())
+            timeformat : str, optional
+                format of times, if supplied as a numeric array (see epochs.to_et())
+            tolerance : float, optional
+                times within tolerance [s] are evaluated once (see epochs.deduplicate())
+            keep_intermediates : bool
+                unused (satellites have no intermediate vectors): accepted for symmetry with Ground
+            session : session.Session, optional
+                kernel set (& caches) to use (default: the module-level kernels)
             
         """
         
+        # Switch to the session's kernels (if they are not already furnished)
+        # -----------------------------------------------
+        self.session = get_session(session).activate()
 
         # Assert that the inputs are formatted correctly
         # -----------------------------------------------
-        self.obscode, self.time, self.center = self._check_input_formats(obscode, times, center)
+        self.obscode, self.time, self.center = self._check_input_formats(obscode, times, center, timeformat)
 
-        # Get "KernelSpecifier" instance from dict
-        # Try to load the spiceypy kernels
+        # Get "KernelSpecifier" instance from the session's dict
+        # Try to load the spiceypy kernels (only those covering the requested times)
         # -----------------------------------------------
-        satellite_obscode_dict[self.obscode].load()
+        self.session.satellites[self.obscode].load(window=epoch_window(times, timeformat))
 
         # By default we will calculate the positions at the time of instantiation
         # -----------------------------------------------
-        self.get_posns(obscode, times,  center=center, frame = frame, abcorr = abcorr)
+        self.get_posns(obscode, times,  center=center, frame = frame, abcorr = abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates)
         
         
         
-    def get_posns(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE"):
-        """ """
+    def get_posns(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE", out=None, dtype=None, layout='rows', timeformat=None, tolerance=None, keep_intermediates=False):
+        """
+            Evaluate the position of the satellite at the supplied times
+            
+            Times are sorted & deduplicated first (optionally merging times within tolerance [s]),
+            so spice is only called for unique epochs (see epochs.deduplicate())
+        """
 
-        # Convert the supplied time to the required format for spiceypy
+        # Sort & deduplicate the times, then convert them to the required format for spiceypy (using the session's kernels)
+        # (the requested frame, aberration-correction & layout are recorded alongside the positions)
+        # -----------------------------------------------
+        self.session.activate()
+        unique, inverse, self.stats = deduplicate(times, timeformat, tolerance=tolerance)
+        epochs = get_epochs(unique, timeformat)
+        self.frame, self.abcorr, self.layout = frame, abcorr, layout
+        self.result = get_result(self.stats['n'], obscode, center, frame, abcorr)
+        self.result.epochs[:] = scatter(epochs, inverse)
+        self.epochs = self.result.epochs
+        
+        # Make sure kernels covering the epochs are loaded
+        # & report any epochs outside kernel coverage up-front (rather than waiting for a spice error)
         # -----------------------------------------------
-        self.epochs = np.array([sp.utc2et('JD'+str(jdutc)) for jdutc in self.time.utc.jd])
+        self.session.satellites[obscode].ensure_loaded(epochs)
+        self.session.satellites[obscode].check_coverage(epochs, bodies=[obscode])
         
-        # Evaluate the position of the satellite using the loaded kernels
+        # Evaluate the position of the satellite using the loaded kernels (at the unique epochs)
+        # (w.r.t. the base center: additional centers are added afterwards)
+        # -----------------------------------------------
+        center, additional_centers = split_centers(center, abcorr)
+        frame, additional_frames = split_frames(frame)
+        posns, ltts = sp.spkpos(obscode, epochs, frame ,abcorr, center ) # [km, s]
+        self.posns, view = output_buffer(len(self.epochs), out=result_buffer(self.result, out, dtype, layout), dtype=dtype, layout=layout)
+        self.convert(posns=scatter(posns, inverse), out=view) # AU
+        self.ltts  = self.convert(ltts=scatter(ltts, inverse), out=self.result.ltts)   # Day
+        self.result.posns = view
+
+        # Positions w.r.t. all requested centers
+        # -----------------------------------------------
+        self.centers = {center : self.posns}
+        self.centers.update( add_centers(view, center, additional_centers, epochs, frame=frame, layout=layout, inverse=inverse) )
+
+        # Positions (w.r.t. the base center) in all requested frames
         # -----------------------------------------------
-        self.posns, self.ltts = sp.spkpos(obscode, self.epochs, frame ,abcorr, center ) # [km, s]
-        self.posns = self.convert(posns=self.posns) # AU
-        self.ltts  = self.convert(ltts=self.ltts)   # Day
+        self.frames = {frame : self.posns}
+        self.frames.update( add_frames(view, frame, additional_frames, layout=layout, session=self.session) )
 
-    def convert(self, posns=None, ltts=None):
-        """ Conversion is always km->AU, s->Day """
+    def extend(self, times, timeformat=None, tolerance=1e-3):
+        """ Extend the positions to additional times, evaluating only new epochs (see extend()) """
+        return extend(self, times, timeformat=timeformat, tolerance=tolerance)
+
+    def convert(self, posns=None, ltts=None, out=None):
+        """ Conversion is always km->AU, s->Day (written into out if supplied) """
         if posns is not None:
-            return np.asarray(posns) / au_km
+            return np.divide(posns, au_km, out=out)
         if ltts is not None:
-            return np.asarray(ltts) / day_s
+            return np.divide(ltts, day_s, out=out)
 
 
 
@@ -199,7 +570,7 @@ class Satellite(object):
         return np.array(states), np.array(ltts)
 
 
-    def _check_input_formats(self, obscode, time, center):
+    def _check_input_formats(self, obscode, time, center, timeformat=None):
         """
             Assert that the inputs are formatted correctly
             
@@ -211,6 +582,8 @@ class Satellite(object):
                 http://docs.astropy.org/en/stable/time/
             center  : coordinate center
                 ...
+            timeformat : str, optional
+                if supplied, time is a numeric array (see epochs.to_et())
             
             Returns
             ----------
@@ -226,12 +599,17 @@ class Satellite(object):
             
         # Assert that the obscode is one that we know how to handle
         # -----------------------------------------------
-        assert obscode in satellite_obscode_dict, 'Supplied obscode [%r] is not in known/allowed codes [%r] from file.' % (obscode,list(satellite_obscode_dict.keys()) )
+        assert obscode in self.session.satellites, 'Supplied obscode [%r] is not in known/allowed codes [%r] from file.' % (obscode,list(self.session.satellites.keys()) )
         
         # Assert supplied time is of the correct format
+        # (numeric times are only allowed with an explicit timeformat)
         # -----------------------------------------------
-        assert isinstance(time , Time )
-        time = time.utc
+        if timeformat is None:
+            assert is_astropy_time(time)
+            time = time.utc
+        else:
+            assert timeformat in TIMEFORMATS, 'Supplied timeformat [%r] is not in known/allowed formats [%r]' % (timeformat, TIMEFORMATS)
+            time = np.atleast_1d( np.asarray(time, dtype=float) )
 
         return obscode, time, center
 
@@ -266,24 +644,28 @@ class Ground(object):
 
     """
 
-    def __init__(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE"):
+    def __init__(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE", out=None, dtype=None, layout='rows', timeformat=None, tolerance=None, keep_intermediates=False, session=None):
         """ May want/need to change the variable-names later """
         print("wis.py, Ground ... ")
         
+        # Switch to the session's kernels (if they are not already furnished)
+        # -----------------------------------------------
+        self.session = get_session(session).activate()
+        
         # Assert that the inputs are formatted correctly
         # -----------------------------------------------
-        self.obscode, self.time, self.center = self._check_input_formats(obscode, times, center)
+        self.obscode, self.time, self.center = self._check_input_formats(obscode, times, center, timeformat)
         
-        # Try to load the spiceypy kernels
+        # Try to load the spiceypy kernels (only those covering the requested times)
         # NB: We are passing in a *GENERAL* KernelSpecifier to handle everything for ground-based obs-codes
         # -----------------------------------------------
-        GRND.load()
+        self.session.ground.load(window=epoch_window(times, timeformat))
 
         # By default we will calculate the positions at the time of instantiation
         # -----------------------------------------------
-        self.get_posns(obscode, times,  center=center, frame = frame, abcorr = abcorr)
+        self.get_posns(obscode, times,  center=center, frame = frame, abcorr = abcorr, out=out, dtype=dtype, layout=layout, timeformat=timeformat, tolerance=tolerance, keep_intermediates=keep_intermediates)
         
-    def _check_input_formats(self, obscode, time, center):
+    def _check_input_formats(self, obscode, time, center, timeformat=None):
         """
             Assert that the inputs are formatted correctly
             
@@ -295,6 +677,8 @@ class Ground(object):
                 http://docs.astropy.org/en/stable/time/
             center  : coordinate center
                 ...
+            timeformat : str, optional
+                if supplied, time is a numeric array (see epochs.to_et())
             
             Returns
             ----------
@@ -313,54 +697,116 @@ class Ground(object):
         assert obscode in ground_obscode_dict, 'Supplied obscode [%r] is not in known/allowed codes [%r] from file.' % (obscode,list(ground_obscode_dict.keys()) )
         
         # Assert supplied time is of the correct format
+        # (numeric times are only allowed with an explicit timeformat)
         # -----------------------------------------------
-        assert isinstance(time , Time )
-        time = time.utc
+        if timeformat is None:
+            assert is_astropy_time(time)
+            time = time.utc
+        else:
+            assert timeformat in TIMEFORMATS, 'Supplied timeformat [%r] is not in known/allowed formats [%r]' % (timeformat, TIMEFORMATS)
+            time = np.atleast_1d( np.asarray(time, dtype=float) )
 
         return obscode, time, center
 
 
 
         
-    def get_posns(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE"):
+    def get_posns(self, obscode, times,  center="Sun", frame = "J2000", abcorr = "NONE", out=None, dtype=None, layout='rows', timeformat=None, tolerance=None, keep_intermediates=False):
         """
+            Evaluate the position of the observatory at the supplied times
+            
+            The observatory position (hXYZ) is written into out (if supplied),
+            otherwise into a new buffer of the requested dtype & layout (see output_buffer())
+            
+            Times are sorted & deduplicated first (optionally merging times within tolerance [s]),
+            so spice is only called for unique epochs (see epochs.deduplicate())
+            
+            The rotated observatory vector (obs_vec_rot) & geocenter position (posns)
+            are only kept if keep_intermediates=True
         """
     
-        # Convert the supplied time to the required format for spiceypy
+        # Sort & deduplicate the times, then convert them to the required format for spiceypy (using the session's kernels)
+        # (the requested frame, aberration-correction & layout are recorded alongside the positions)
         # -----------------------------------------------
-        self.epochs = np.array([sp.utc2et('JD'+str(jdutc)) for jdutc in times.utc.jd])
+        self.session.activate()
+        unique, inverse, self.stats = deduplicate(times, timeformat, tolerance=tolerance)
+        epochs = get_epochs(unique, timeformat)
+        self.frame, self.abcorr, self.layout = frame, abcorr, layout
+        self.result = get_result(self.stats['n'], obscode, center, frame, abcorr)
+        self.result.epochs[:] = scatter(epochs, inverse)
+        self.epochs = self.result.epochs
+
+        # Make sure kernels covering the epochs are loaded
+        # & report any epochs outside kernel coverage up-front (rather than waiting for a spice error)
+        # NB: 3000 is the frame-class-id of ITRF93 
+        # -----------------------------------------------
+        self.session.ground.ensure_loaded(epochs)
+        self.session.ground.check_coverage(epochs, bodies=['399'], frames=[3000])
 
         # Get observatory posn for specific obs-code supplied
         # NB: this is in fractions of an earth-radius
         # So will probably need multiplying by 6378.1363/149597870.700 to get to AU
         # -----------------------------------------------
         self.obs_vec = ground_obscode_dict[obscode] * Rearth_km
+        frame, additional_frames = split_frames(frame)
 
         # Use pxform to return the matrix that transforms position vectors from ITRF93 (not IAU_EARTH) frame to J2000 frame at specified epoch.
         # Rotate the observatory posn vec to the required frame ( the J2000 default means this would be EQUATORIAL)
         #https://naif.jpl.nasa.gov/pub/naif/toolkit_docs/FORTRAN/spicelib/pxform.html
         #https://spiceypy.readthedocs.io/en/v2.3.1/documentation.html#spiceypy.spiceypy.pxform
+        # (rotations are only evaluated at the unique epochs)
         # -----------------------------------------------
-        self.obs_vec_rot = np.array( [ np.dot( sp.pxform( 'ITRF93', frame, epoch ) , self.obs_vec) for epoch in self.epochs ] )
-        self.obs_vec_rot_AU = self.obs_vec_rot / au_km
+        obs_vec_rot = scatter( rotate_body_fixed(self.obs_vec, epochs, frame=frame), inverse )
 
         # Get the position of the geocenter
         # ( the default frame=J2000 & center=SUN means this would be HELIOCENTRIC EQUATORIAL)
+        # (w.r.t. the base center: additional centers are added afterwards)
         # -----------------------------------------------
-        self.posns, self.ltts = sp.spkpos('399', self.epochs, frame ,abcorr, center )
-        self.posns = self.convert(posns=self.posns) # AU
-        self.ltts  = self.convert(ltts=self.ltts)   # Day
+        center, additional_centers = split_centers(center, abcorr)
+        posns, ltts = sp.spkpos('399', epochs, frame ,abcorr, center ) # [km, s]
+        posns, ltts = scatter(posns, inverse), scatter(ltts, inverse)
 
         # Combine vectors to get the posn vec of the observatory
         # ( the default frame=J2000 & center=SUN means this would be HELIOCENTRIC EQUATORIAL)
+        # NB: Sums & conversions are done in-place to avoid intermediate copies
+        # -----------------------------------------------
+        self.hXYZ, view = output_buffer(len(self.epochs), out=result_buffer(self.result, out, dtype, layout), dtype=dtype, layout=layout)
+        np.add(obs_vec_rot, posns, out=view, casting='same_kind')
+        self.convert(posns=view, out=view)      # AU
+        self.ltts  = self.convert(ltts=ltts, out=self.result.ltts)   # Day
+        self.result.posns = view
+
+        # The rotated observatory vector [km] & the geocenter position [AU] are
+        # intermediates: they are only kept (as obs_vec_rot & posns) if requested
+        # -----------------------------------------------
+        if keep_intermediates:
+            self.obs_vec_rot = obs_vec_rot
+            self.posns = self.convert(posns=posns, out=posns) # AU
+
+        # Observatory positions w.r.t. all requested centers
         # -----------------------------------------------
-        self.hXYZ = self.obs_vec_rot_AU + self.posns
+        self.centers = {center : self.hXYZ}
+        self.centers.update( add_centers(view, center, additional_centers, epochs, frame=frame, layout=layout, inverse=inverse) )
+
+        # Observatory positions (w.r.t. the base center) in all requested frames
+        # -----------------------------------------------
+        self.frames = {frame : self.hXYZ}
+        self.frames.update( add_frames(view, frame, additional_frames, layout=layout, session=self.session) )
+
+    @property
+    def obs_vec_rot_AU(self,):
+        """ Rotated observatory posn vec in AU (evaluated on demand, rather than stored) """
+        return self.obs_vec_rot / au_km
         
 
-    def convert(self, posns=None, ltts=None):
-        """ Conversion is always km->AU, s->Day """
+    def extend(self, times, timeformat=None, tolerance=1e-3):
+        """ Extend the positions to additional times, evaluating only new epochs (see extend()) """
+        return extend(self, times, timeformat=timeformat, tolerance=tolerance)
+
+    def convert(self, posns=None, ltts=None, out=None):
+        """ Conversion is always km->AU, s->Day (written into out if supplied) """
         if posns is not None:
-            return np.asarray(posns) / au_km
+            return np.divide(posns, au_km, out=out)
         if ltts is not None:
-            return np.asarray(ltts) / day_s
+            return np.divide(ltts, day_s, out=out)
 